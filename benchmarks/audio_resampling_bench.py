@@ -0,0 +1,62 @@
+"""
+Throughput benchmark for the capture and playback audio conversion stages.
+
+Streams 60 seconds of synthetic audio through CaptureConverter / PlaybackConverter in
+100 ms batches (the send loop's batch size) and in 1024-frame callback-sized batches,
+and reports how many times faster than real time each conversion runs.
+
+Usage:
+    uv run python -m benchmarks.audio_resampling_bench
+"""
+import time
+
+import numpy as np
+
+from src.modules.audio_conversion import CaptureConverter, PlaybackConverter
+
+API_RATE = 24000
+DURATION_SECONDS = 60
+CASES = [
+    ("capture 48000 Hz stereo -> 24000 Hz mono", "capture", 48000, 2),
+    ("capture 44100 Hz stereo -> 24000 Hz mono", "capture", 44100, 2),
+    ("capture 16000 Hz mono -> 24000 Hz mono", "capture", 16000, 1),
+    ("playback 24000 Hz mono -> 48000 Hz stereo", "playback", 48000, 2),
+    ("playback 24000 Hz mono -> 44100 Hz stereo", "playback", 44100, 2),
+]
+
+
+def synthetic_pcm16(rate: int, channels: int, seconds: int = DURATION_SECONDS) -> bytes:
+    t = np.arange(rate * seconds) / rate
+    signal = 8000 * np.sin(2 * np.pi * 440 * t) + 2000 * np.sin(2 * np.pi * 3100 * t)
+    return np.repeat(signal, channels).astype(np.int16).tobytes()
+
+
+def run_case(direction: str, device_rate: int, device_channels: int, batch_ms: float) -> float:
+    if direction == "capture":
+        converter = CaptureConverter(device_rate, device_channels, API_RATE)
+        audio = synthetic_pcm16(device_rate, device_channels)
+        frame_bytes = 2 * device_channels
+        batch_bytes = int(device_rate * batch_ms / 1000) * frame_bytes
+    else:
+        converter = PlaybackConverter(API_RATE, device_rate, device_channels)
+        audio = synthetic_pcm16(API_RATE, 1)
+        batch_bytes = int(API_RATE * batch_ms / 1000) * 2
+
+    start = time.perf_counter()
+    for offset in range(0, len(audio), batch_bytes):
+        converter.convert(audio[offset:offset + batch_bytes])
+    elapsed = time.perf_counter() - start
+    return DURATION_SECONDS / elapsed
+
+
+def main():
+    print(f"{DURATION_SECONDS} s of audio per case; figures are multiples of real time\n")
+    print(f"{'case':<45} {'100 ms batches':>15} {'~43 ms batches':>15}")
+    for label, direction, device_rate, device_channels in CASES:
+        batched = run_case(direction, device_rate, device_channels, batch_ms=100)
+        callback_sized = run_case(direction, device_rate, device_channels, batch_ms=1024 / 24)
+        print(f"{label:<45} {batched:>14.0f}x {callback_sized:>14.0f}x")
+
+
+if __name__ == "__main__":
+    main()
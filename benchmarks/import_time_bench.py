@@ -0,0 +1,91 @@
+"""
+Import-time profile of the assistant entry points.
+
+Runs each entry module in a fresh interpreter with `python -X importtime`, then reports
+the wall time of the import (median of several runs), the cumulative time per
+top-level package and the slowest individual modules.
+
+Usage:
+    uv run python -m benchmarks.import_time_bench [--runs 5] [--top 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+ENTRY_MODULES = [
+    "src.modules.tools.base.tools",
+    "src.modules.tools.pulumi.pulumi",
+    "src.modules.assistant",
+    "src.realtime_api_async_python.main",
+]
+
+
+def benchmark_env(work_dir: str) -> dict:
+    personalization_file = os.path.join(work_dir, "personalization.json")
+    with open(personalization_file, "w") as f:
+        json.dump({}, f)
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    env["PERSONALIZATION_FILE"] = personalization_file
+    env["SCRATCH_PAD_DIR"] = os.path.join(work_dir, "scratchpad")
+    env["ACTIVE_MEMORY_FILE"] = os.path.join(work_dir, "active_memory.json")
+    env["PYTHONPATH"] = os.getcwd() + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def timed_import(module: str, env: dict, cwd: str) -> float:
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    result = subprocess.run([sys.executable, "-c", code], env=env, cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(module: str, env: dict, cwd: str) -> list:
+    """Returns (self_us, cumulative_us, module_name) for every module imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, cwd=cwd, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        env = benchmark_env(work_dir)
+        for module in ENTRY_MODULES:
+            timings = [timed_import(module, env, work_dir) for _ in range(args.runs)]
+            rows = import_profile(module, env, work_dir)
+
+            by_package = defaultdict(int)
+            for self_us, _, name in rows:
+                by_package[name.strip().split(".")[0]] += self_us
+
+            print(f"\n=== {module}: {statistics.median(timings) * 1000:.0f} ms median of {args.runs} runs, "
+                  f"{len(rows)} modules imported")
+            print("  top-level packages by total self time:")
+            for package, total_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+                print(f"    {total_us / 1000:8.1f} ms  {package}")
+            print("  slowest modules (self time):")
+            for self_us, cumulative_us, name in sorted(rows, reverse=True)[:args.top]:
+                print(f"    {self_us / 1000:8.1f} ms  (cumulative {cumulative_us / 1000:7.1f} ms)  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
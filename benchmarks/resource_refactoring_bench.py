@@ -0,0 +1,94 @@
+"""
+Benchmark for single-pass resource renaming in perform_resource_refactoring.
+
+Generates a synthetic ~50k-line Pulumi program and compares the previous
+two-`re.subn`-passes-per-finding approach against `replace_quoted_strings`.
+
+Usage:
+    uv run python -m benchmarks.resource_refactoring_bench
+"""
+import os
+import re
+import time
+
+# The refactor module builds an OpenAI client at import time; no request is made here.
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.modules.tools.pulumi.refactor import replace_quoted_strings
+
+TARGET_LINES = 50_000
+FINDING_COUNT = 200
+
+
+def generate_pulumi_program(target_lines: int = TARGET_LINES) -> tuple:
+    lines = ["import pulumi", "import pulumi_aws", ""]
+    resource_names = []
+    index = 0
+    while len(lines) < target_lines:
+        resource_name = f"S3Bucket00generated{index:05d}00xYz"
+        resource_names.append(resource_name)
+        lines.extend(
+            [
+                f"s3_bucket_{index} = pulumi_aws.s3.Bucket(",
+                f'    "{resource_name}",',
+                f'    bucket="{resource_name.lower()}",',
+                '    acl="private",',
+                "    opts=pulumi.ResourceOptions(protect=True),",
+                ")",
+                f"pulumi.export('{resource_name}', s3_bucket_{index}.id)",
+                "",
+            ]
+        )
+        index += 1
+    return "\n".join(lines), resource_names
+
+
+def legacy_replace_quoted_strings(source_code: str, replacements: dict) -> tuple:
+    counts = {}
+    for old_string, new_string in replacements.items():
+        escaped_old_string = re.escape(old_string)
+        source_code, double_quoted = re.subn(
+            f'"{escaped_old_string}"', f'"{new_string}"', source_code
+        )
+        source_code, single_quoted = re.subn(
+            f"'{escaped_old_string}'", f"'{new_string}'", source_code
+        )
+        counts[old_string] = double_quoted + single_quoted
+    return source_code, counts
+
+
+def time_it(func, *args) -> tuple:
+    start_time = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start_time
+
+
+def main():
+    source_code, resource_names = generate_pulumi_program()
+    step = max(1, len(resource_names) // FINDING_COUNT)
+    replacements = {
+        name: f"generated_bucket_{i}"
+        for i, name in enumerate(resource_names[::step][:FINDING_COUNT])
+    }
+    print(
+        f"Program: {source_code.count(chr(10)) + 1} lines, {len(source_code)} bytes, "
+        f"{len(replacements)} findings"
+    )
+
+    (legacy_source, legacy_counts), legacy_duration = time_it(
+        legacy_replace_quoted_strings, source_code, replacements
+    )
+    (new_source, new_counts), new_duration = time_it(
+        replace_quoted_strings, source_code, replacements
+    )
+
+    assert legacy_source == new_source, "single-pass output differs from legacy output"
+    assert legacy_counts == new_counts, "single-pass counts differ from legacy counts"
+
+    print(f"legacy (2 passes per finding): {legacy_duration:.4f} seconds")
+    print(f"single pass:                   {new_duration:.4f} seconds")
+    print(f"speedup:                       {legacy_duration / new_duration:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
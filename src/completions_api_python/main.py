@@ -2,7 +2,6 @@ import asyncio
 import os
 import json
 import argparse
-import inspect
 import logging
 from openai import AsyncOpenAI
 # import ChatCompletion
@@ -10,44 +9,50 @@ from openai import AsyncStream
 from openai.types.chat import ChatCompletion, ChatCompletionChunk
 from dotenv import load_dotenv
 from src.modules.assistant import AssistantAPI
+from src.modules.audio_io import NullAudioSource
+from src.modules.conversation import ConversationContext
+from src.modules.tokens import token_usage, track_llm_call
 from src.modules.logging import log_tool_call, log_error, log_info, setup_logging
-from src.modules.tools.base.tools import function_map, tools
-from src.modules.tools.pulumi.pulumi import tools as pulumi_tools, function_map as pulumi_function_map
-from src.modules.dnd.models import Character, Spell, Monster, Item, Weapon, Armor, Skill, Campaign, Act, Chapter, Area, Location, NPC
+from src.modules.tools import ToolConcurrency, load_default_tools
+from src.modules.utils import ModelName, model_name_to_id
 
 # Load environment variables
 load_dotenv()
 
+# Follow-up completions with tool results allowed per user message
+MAX_TOOL_ROUNDS = 8
+
 class CompletionsAPI(AssistantAPI):
     def __init__(self, prompts=None, debug=False):
-        super().__init__(prompts, debug=debug)
+        # Text only: no audio device is needed
+        super().__init__(prompts, debug=debug, mic=NullAudioSource())
         self.client = AsyncOpenAI(
             # This is the default and can be omitted
             api_key=self.api_key,
         )
-        self.messages = []  # To keep track of the conversation history
-        # self.tools = tools
-        self.tools = tools + pulumi_tools
-        self.function_map = {**function_map, **pulumi_function_map}
-        self.model = "gpt-4-0613"
+        self.tool_registry = load_default_tools()
+        # Parallel tool calls need a model that supports the tools interface
+        self.model = model_name_to_id[ModelName.base_model]
+        # Conversation history, compacted to stay within a token budget
+        self.conversation = ConversationContext(model=self.model)
 
     async def run(self):
-        if self.prompts:
-            await self.send_initial_prompts()
-        else:
-            while True:
-                # Capture user input
-                user_input = input("You: ")
-                if user_input.lower() in {"exit", "quit"}:
-                    break
-                # Append user's message
-                self.messages.append({"role": "user", "content": user_input})
-                # Get assistant's response
-                assistant_reply = await self.stream_completion(self.messages)
-                # Append assistant's reply
-                self.messages.append({"role": "assistant", "content": assistant_reply})
-                print()
-                # print(f"\nAssistant: {assistant_reply}")
+        try:
+            if self.prompts:
+                await self.send_initial_prompts()
+            else:
+                while True:
+                    # Capture user input without blocking background summarization
+                    user_input = await asyncio.to_thread(input, "You: ")
+                    if user_input.lower() in {"exit", "quit"}:
+                        break
+                    self.conversation.add_user_message(user_input)
+                    await self.stream_completion(self.conversation)
+                    print()
+        finally:
+            await self.conversation.close()
+            if token_usage.stats:
+                self.logger.info(f"Token usage: {json.dumps(token_usage.summary())}")
 
     async def initialize_session(self, websocket=None):
         # No initialization needed for the completions API
@@ -56,17 +61,17 @@ class CompletionsAPI(AssistantAPI):
     async def send_initial_prompts(self, websocket=None):
         if self.prompts:
             for prompt in self.prompts:
-                self.messages.append({"role": "user", "content": prompt})
-                assistant_reply = self.stream_completion(self.messages)
-                self.messages.append({"role": "assistant", "content": assistant_reply})
-                print(f"\nAssistant: {assistant_reply}")
+                self.conversation.add_user_message(prompt)
+                await self.stream_completion(self.conversation)
+                print()
 
     async def handle_event(self, event, websocket=None):
         # No event handling needed for the completions API
         pass
 
     async def execute_function(self, function_name, arguments):
-        if function_name in self.function_map:
+        spec = self.tool_registry.get(function_name)
+        if spec is not None:
             # Parse arguments if they are provided as a JSON string
             if isinstance(arguments, str):
                 try:
@@ -84,16 +89,15 @@ class CompletionsAPI(AssistantAPI):
 
             # Execute the function and handle any execution errors
             try:
-                # Check if the function is a coroutine (asynchronous function)
-                function = self.function_map[function_name]
-                if inspect.iscoroutinefunction(function):
-                    result = await function(**arguments)
-                else:
-                    result = function(**arguments)
+                result = await spec.call(arguments)
                 log_tool_call(self.logger, function_name, arguments, result)
                 # Print the result to the console
                 print(f"\n🛠️ Function '{function_name}' executed successfully. Result: {result}")
                 return json.dumps(result)
+            except asyncio.TimeoutError:
+                error_message = f"Function '{function_name}' timed out."
+                log_error(self.logger, error_message)
+                return json.dumps({"error": error_message})
             except Exception as e:
                 error_message = f"Error executing function '{function_name}': {str(e)}"
                 log_error(self.logger, error_message)
@@ -103,81 +107,118 @@ class CompletionsAPI(AssistantAPI):
             log_error(self.logger, error_message)
             return json.dumps({"error": error_message})
 
-    async def stream_completion(self, messages):
-        content_buffer = [
-            f"\nAssistant: ",
-        ]
-        print("\nAssistant: ")
+    async def stream_completion(self, conversation):
+        """
+        Streams the assistant's reply, running any tool calls it makes along the way.
 
-        function_name_buffer = None
-        arguments_buffer = []
+        All tool calls of a response are executed together and their results are sent back
+        in one follow-up completion, which streams like the first. The assistant's messages
+        and the tool results are added to `conversation`, which may then start summarizing
+        older turns in the background.
 
+        Returns:
+            str: The text of the final response.
+        """
+        print("\nAssistant: ")
         try:
+            for _ in range(MAX_TOOL_ROUNDS):
+                content, tool_calls = await self.stream_response(conversation.request_messages())
+                if not tool_calls:
+                    conversation.add({"role": "assistant", "content": content})
+                    conversation.schedule_compaction()
+                    return content + "\n"
+                conversation.add({"role": "assistant", "content": content or None, "tool_calls": tool_calls})
+                results = await self.execute_tool_calls(tool_calls)
+                for tool_call, result in zip(tool_calls, results):
+                    conversation.add({"role": "tool", "tool_call_id": tool_call["id"], "content": result})
+            self.logger.warning(f"Stopped after {MAX_TOOL_ROUNDS} rounds of tool calls.")
+            conversation.schedule_compaction()
+            return "[Stopped after too many rounds of tool calls]\n"
+        except Exception as e:
+            log_error(self.logger, f"An error occurred during the completion stream: {e}")
+            return ""
+
+    async def stream_response(self, messages):
+        """
+        Streams one completion, printing its text as it arrives.
+
+        Returns:
+            tuple: The response text and its tool calls as chat message `tool_calls` entries.
+        """
+        content_buffer = []
+        # Parallel tool calls arrive interleaved; every delta carries the index of its call
+        tool_calls = {}
+
+        with track_llm_call(self.model, messages, call_site="completions_api") as call:
             stream: AsyncStream[ChatCompletionChunk] = await self.client.chat.completions.create(
-                model=self.model,  # Use a compatible model
+                model=self.model,
                 messages=messages,
-                # functions=tools,
-                functions=self.tools,
-                function_call="auto",
-                stream=True
+                tools=self.tool_registry.chat_tools(),
+                tool_choice="auto",
+                stream=True,
+                # The final chunk then carries the request's token usage
+                stream_options={"include_usage": True},
             )
             async for chunk in stream:
-                choice=chunk.choices[0]
+                if getattr(chunk, "usage", None):
+                    call.usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
                 if self.logger.isEnabledFor(logging.DEBUG):
                     self.logger.debug(choice)
-                # Check if this chunk contains part of a function call
-                if choice.delta.function_call:
-                    self.logger.debug(f"Function call: {choice.delta.function_call}")
-                # Accumulate the function name if it's present in the chunk
-                    if choice.delta.function_call.name:
-                        function_name_buffer = choice.delta.function_call.name
-
-                    # Accumulate arguments in chunks
-                    if choice.delta.function_call.arguments:
-                        arguments_buffer.append(choice.delta.function_call.arguments)
 
                 if choice.delta.content:
-                    print(choice.delta.content or "", end="")
-                    content_buffer.append(choice.delta.content or "")
-
-                if self.logger.isEnabledFor(logging.DEBUG):
-                    self.logger.debug(f"Function name buffer: {function_name_buffer}")
-
-                # Handle finish reasons
-                if choice.finish_reason:
-                    if choice.finish_reason == "function_call":
-                        # Execute the function call
-                        full_arguments = "".join(arguments_buffer)
-                        self.logger.info(f"Complete function call: {function_name_buffer} with arguments {full_arguments}")
-                        result = await self.execute_function(function_name_buffer, full_arguments)
-                        content_buffer.append(result)
-                        # Reset buffers for next function call
-                        function_name_buffer = None
-                        arguments_buffer = []
-
-                        # Reset buffers for next function call
-                        function_name_buffer = None
-                        arguments_buffer = []
-
-                    elif choice.finish_reason == "stop":
-                        # Model completed its response
-                        self.logger.info("Response completed by model.")
-                        break  # Optional: Exit if you want to end here
-
-                    elif choice.finish_reason == "length":
-                        # Response was cut off due to token limit
-                        self.logger.warning("Response length limit reached. Consider re-prompting for full answer.")
-                        content_buffer.append("[Response truncated due to length limit]")
-
-                    elif choice.finish_reason == "content_filter":
-                        # Content moderation was triggered
-                        self.logger.warning("Response filtered due to content moderation.")
-                        content_buffer.append("[Response was filtered due to content moderation]")
-
-            return "".join(content_buffer) + "\n"
-        except Exception as e:
-            log_error(self.logger, f"An error occurred during the completion stream: {e}")
-            return ""
+                    print(choice.delta.content, end="", flush=True)
+                    content_buffer.append(choice.delta.content)
+
+                for delta in choice.delta.tool_calls or []:
+                    tool_call = tool_calls.setdefault(
+                        delta.index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}}
+                    )
+                    if delta.id:
+                        tool_call["id"] = delta.id
+                    if delta.function and delta.function.name:
+                        tool_call["function"]["name"] += delta.function.name
+                    if delta.function and delta.function.arguments:
+                        tool_call["function"]["arguments"] += delta.function.arguments
+
+                if choice.finish_reason == "length":
+                    # Response was cut off due to token limit
+                    self.logger.warning("Response length limit reached. Consider re-prompting for full answer.")
+                    content_buffer.append("[Response truncated due to length limit]")
+                elif choice.finish_reason == "content_filter":
+                    # Content moderation was triggered
+                    self.logger.warning("Response filtered due to content moderation.")
+                    content_buffer.append("[Response was filtered due to content moderation]")
+
+        return "".join(content_buffer), [tool_calls[index] for index in sorted(tool_calls)]
+
+    async def execute_tool_calls(self, tool_calls):
+        """
+        Executes the tool calls of one response and returns their JSON results in call order.
+
+        Shared tools run concurrently through asyncio.gather. Exclusive tools write the
+        scratch pad or memory, so they run after those, one at a time, in the order called.
+        """
+        def is_shared(tool_call):
+            spec = self.tool_registry.get(tool_call["function"]["name"])
+            return spec is not None and spec.concurrency == ToolConcurrency.shared
+
+        shared = [index for index, tool_call in enumerate(tool_calls) if is_shared(tool_call)]
+        self.logger.info(f"Executing {len(tool_calls)} tool call(s), {len(shared)} concurrently")
+
+        results = [None] * len(tool_calls)
+        shared_results = await asyncio.gather(*(
+            self.execute_function(tool_calls[index]["function"]["name"], tool_calls[index]["function"]["arguments"])
+            for index in shared
+        ))
+        for index, result in zip(shared, shared_results):
+            results[index] = result
+        for index, tool_call in enumerate(tool_calls):
+            if results[index] is None:
+                results[index] = await self.execute_function(tool_call["function"]["name"], tool_call["function"]["arguments"])
+        return results
 
 def main():
     print("Starting OpenAI API assistant...")
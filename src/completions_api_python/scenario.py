@@ -6,6 +6,7 @@ import random
 import json
 import os
 import argparse
+from src.modules.tokens import track_llm_call
 
 client = OpenAI()
 LOG_FILE = "scenario.log"
@@ -104,14 +105,17 @@ def process_dialog_with_ai(scenario: Scenario, roll: int, debug: bool):
 
     log_event(f"Prompt being sent to OpenAI:\n{prompt}")
 
-    completion = client.beta.chat.completions.parse(
-        model="gpt-4o-2024-08-06",
-        messages=[
-            {"role": "system", "content": scenario.backstory},
-            {"role": "user", "content": prompt},
-        ],
-        response_format=OutcomeResponse,
-    )
+    messages = [
+        {"role": "system", "content": scenario.backstory},
+        {"role": "user", "content": prompt},
+    ]
+    with track_llm_call("gpt-4o-2024-08-06", messages, call_site="scenario") as call:
+        completion = client.beta.chat.completions.parse(
+            model="gpt-4o-2024-08-06",
+            messages=messages,
+            response_format=OutcomeResponse,
+        )
+        call.usage = completion.usage
 
     if completion.choices and completion.choices[0].message.parsed:
         outcome_response = completion.choices[0].message.parsed
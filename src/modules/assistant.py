@@ -3,7 +3,6 @@ import asyncio
 import os
 import json
 import argparse
-import openai
 import base64
 import time
 import websockets
@@ -13,25 +12,18 @@ from websockets.exceptions import ConnectionClosedError
 from dotenv import load_dotenv
 from src.modules.logging import log_error, log_info, log_warning, log_ws_event, log_tool_call, setup_logging
 from src.modules.async_microphone import AsyncMicrophone
-from src.modules.audio import play_audio
-from src.modules.tools.base import function_map, tools
-from src.modules.utils import (
-    RUN_TIME_TABLE_LOG_JSON,
-    SESSION_INSTRUCTIONS,
-    PREFIX_PADDING_MS,
-    SILENCE_THRESHOLD,
-    SILENCE_DURATION_MS,
-)
+from src.modules.metrics import metrics
 import sys
 
 class AssistantAPI(metaclass=abc.ABCMeta):
     """Base class for assistant implementations."""
     
-    def __init__(self, prompts=None, debug=False):
+    def __init__(self, prompts=None, debug=False, mic=None):
         self.prompts = prompts
         self.api_key = self.get_api_key()
         self.exit_event = asyncio.Event()
-        self.mic = AsyncMicrophone()
+        # Any AudioSource; the default microphone only opens its device when recording starts
+        self.mic = mic if mic is not None else AsyncMicrophone()
 
         # Initialize state variables
         self.logger = self.setup_logging("assistant", debug)
@@ -48,17 +40,7 @@ class AssistantAPI(metaclass=abc.ABCMeta):
 
 
     def log_runtime(self, function_or_name: str, duration: float):
-        jsonl_file = RUN_TIME_TABLE_LOG_JSON
-        time_record = {
-            "timestamp": datetime.now().isoformat(),
-            "function": function_or_name,
-            "duration": f"{duration:.4f}",
-        }
-        with open(jsonl_file, "a") as file:
-            json.dump(time_record, file)
-            file.write("\n")
-
-        self.logger.info(f"⏰ {function_or_name}() took {duration:.4f} seconds")
+        metrics.record(function_or_name, duration)
 
 
     def get_api_key(self):
@@ -1,54 +1,73 @@
-import pyaudio
-import queue
 import logging
-from src.modules.utils import FORMAT, CHANNELS, RATE, CHUNK
+from src.modules.lazy import lazy_import
+from src.modules.utils import RATE, CHUNK
+from src.modules.audio_conversion import CaptureConverter, native_device_format
+from src.modules.audio_io import AudioSource
+
+# PortAudio is only loaded when a device is opened
+pyaudio = lazy_import("pyaudio")
+
+
+class AsyncMicrophone(AudioSource):
+    """PyAudio input device source; the device is opened on the first start_recording()."""
 
-class AsyncMicrophone:
     def __init__(self):
+        super().__init__()
+        self.p = None
+        self.stream = None
+        self.converter = None
+
+    def open(self):
         self.p = pyaudio.PyAudio()
+        # Capture at the device's own format and convert to mono 24 kHz in batches
+        self.device_rate, self.device_channels = native_device_format(self.p, input=True)
+        self.converter = CaptureConverter(self.device_rate, self.device_channels, RATE)
         self.stream = self.p.open(
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RATE,
+            format=pyaudio.paInt16,
+            channels=self.device_channels,
+            rate=self.device_rate,
             input=True,
-            frames_per_buffer=CHUNK,
+            frames_per_buffer=int(CHUNK * self.device_rate / RATE),
             stream_callback=self.callback,
         )
-        self.queue = queue.Queue()
-        self.is_recording = False
-        self.is_receiving = False
-        logging.info("AsyncMicrophone initialized")
+        logging.info(
+            f"AsyncMicrophone initialized ({self.device_rate} Hz, {self.device_channels} channel(s))"
+        )
 
     def callback(self, in_data, frame_count, time_info, status):
-        if self.is_recording and not self.is_receiving:
-            self.queue.put(in_data)
+        self.push(in_data)
         return (None, pyaudio.paContinue)
 
     def start_recording(self):
-        self.is_recording = True
+        super().start_recording()
         logging.info("Started recording")
 
     def stop_recording(self):
-        self.is_recording = False
+        super().stop_recording()
         logging.info("Stopped recording")
 
     def start_receiving(self):
-        self.is_receiving = True
-        self.is_recording = False
+        super().start_receiving()
         logging.info("Started receiving assistant response")
 
     def stop_receiving(self):
-        self.is_receiving = False
+        super().stop_receiving()
         logging.info("Stopped receiving assistant response")
 
     def get_audio_data(self):
-        data = b""
-        while not self.queue.empty():
-            data += self.queue.get()
+        data = super().get_audio_data()
+        if not data:
+            return None
+        data = self.converter.convert(data)
         return data if data else None
 
     def close(self):
+        super().close()
+        if self.stream is None:
+            return
         self.stream.stop_stream()
         self.stream.close()
         self.p.terminate()
+        self.stream = None
+        self.is_open = False
         logging.info("AsyncMicrophone closed")
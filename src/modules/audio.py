@@ -1,19 +1,27 @@
 import asyncio
-import pyaudio
+import queue
+import threading
 import logging
-from src.modules.utils import FORMAT, CHANNELS, RATE
+from src.modules.lazy import lazy_import
+from src.modules.utils import RATE
+from src.modules.audio_conversion import PlaybackConverter, native_device_format
+from src.modules.audio_io import AudioSink
+
+# PortAudio is only loaded when a device is opened
+pyaudio = lazy_import("pyaudio")
 
 
 async def play_audio(audio_data):
     p = pyaudio.PyAudio()
-    stream = p.open(format=FORMAT, channels=CHANNELS, rate=RATE, output=True)
-    stream.write(audio_data)
+    device_rate, device_channels = native_device_format(p, input=False)
+    stream = p.open(format=pyaudio.paInt16, channels=device_channels, rate=device_rate, output=True)
+    stream.write(PlaybackConverter(RATE, device_rate, device_channels).convert(audio_data))
 
     # Add a small delay of silence at the end to prevent popping, and weird cuts off sounds
     silence_duration = 0.4
-    silence_frames = int(RATE * silence_duration)
+    silence_frames = int(device_rate * silence_duration)
     silence = b"\x00" * (
-        silence_frames * CHANNELS * 2
+        silence_frames * device_channels * 2
     )  # 2 bytes per sample for 16-bit audio
     stream.write(silence)
 
@@ -24,3 +32,110 @@ async def play_audio(audio_data):
     stream.close()
     p.terminate()
     logging.debug("Audio playback completed")
+
+
+class PyAudioSink(AudioSink):
+    """Plays each response on the default output device, opened per response."""
+
+    async def play(self, audio_data):
+        await play_audio(audio_data)
+
+
+# Playback is written in slices of this length so a stop takes effect almost immediately
+PLAYBACK_SLICE_MS = 20
+
+
+class AudioPlayer:
+    """
+    Plays PCM16 chunks as they arrive and can be stopped mid-playback (barge-in).
+
+    Chunks are written to the output device by a background thread in short slices.
+    `stop()` drops everything queued or half-written, and the number of bytes actually
+    played is tracked per conversation item so the server-side item can be truncated
+    to what the user heard.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.generation = 0
+        self.played_bytes = {}
+        self.current_item_id = None
+        self.p = None
+        self.stream = None
+        self.thread = None
+
+    def _ensure_started(self):
+        if self.thread is not None:
+            return
+        self.p = pyaudio.PyAudio()
+        device_rate, device_channels = native_device_format(self.p, input=False)
+        self.converter = PlaybackConverter(RATE, device_rate, device_channels)
+        frame_bytes = device_channels * 2  # 2 bytes per sample for 16-bit audio
+        self.bytes_per_ms = device_rate * frame_bytes / 1000
+        self.slice_bytes = int(self.bytes_per_ms * PLAYBACK_SLICE_MS) // frame_bytes * frame_bytes
+        self.stream = self.p.open(format=pyaudio.paInt16, channels=device_channels, rate=device_rate, output=True)
+        self.thread = threading.Thread(target=self._run, name="audio-player", daemon=True)
+        self.thread.start()
+
+    def enqueue(self, audio_data, item_id=None):
+        self._ensure_started()
+        self.queue.put((self.generation, item_id, self.converter.convert(audio_data)))
+
+    def _run(self):
+        while True:
+            entry = self.queue.get()
+            if entry is None:
+                self.queue.task_done()
+                break
+            generation, item_id, audio_data = entry
+            try:
+                for start in range(0, len(audio_data), self.slice_bytes):
+                    if generation != self.generation:
+                        break
+                    self.current_item_id = item_id
+                    audio_slice = audio_data[start:start + self.slice_bytes]
+                    self.stream.write(audio_slice)
+                    self.played_bytes[item_id] = self.played_bytes.get(item_id, 0) + len(audio_slice)
+            finally:
+                self.queue.task_done()
+
+    @property
+    def is_playing(self) -> bool:
+        # Counts chunks that are queued or still being written
+        return self.queue.unfinished_tasks > 0
+
+    def played_ms(self, item_id=None) -> int:
+        if self.thread is None:
+            return 0
+        item_id = item_id if item_id is not None else self.current_item_id
+        return int(self.played_bytes.get(item_id, 0) / self.bytes_per_ms)
+
+    def stop(self):
+        """Drops queued and in-progress audio. Returns the interrupted item id, or None if nothing was playing."""
+        was_playing = self.is_playing
+        self.generation += 1
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.queue.task_done()
+        if self.thread is not None:
+            self.converter.reset()
+        logging.debug("Audio playback stopped")
+        return self.current_item_id if was_playing else None
+
+    async def wait_until_done(self, poll_interval=0.05):
+        while self.is_playing:
+            await asyncio.sleep(poll_interval)
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.stop()
+        self.queue.put(None)
+        self.thread.join(timeout=1)
+        self.stream.stop_stream()
+        self.stream.close()
+        self.p.terminate()
+        self.thread = None
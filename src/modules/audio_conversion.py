@@ -0,0 +1,147 @@
+from math import gcd
+
+import numpy as np
+
+# Filter taps per polyphase branch; more taps give a sharper anti-aliasing cutoff
+RESAMPLER_TAPS_PER_PHASE = 24
+
+# Kaiser window shape parameter for the prototype low-pass filter
+RESAMPLER_KAISER_BETA = 8.0
+
+# Cutoff as a fraction of the lower Nyquist frequency, leaving room for the transition band
+RESAMPLER_CUTOFF = 0.9
+
+
+def design_polyphase_filter(up: int, down: int, taps_per_phase: int = RESAMPLER_TAPS_PER_PHASE) -> np.ndarray:
+    """
+    Designs a windowed-sinc low-pass filter and splits it into `up` polyphase branches.
+
+    Returns:
+        np.ndarray: Shape (up, taps_per_phase); row p holds the taps h[p + k * up].
+    """
+    length = up * taps_per_phase
+    cutoff = RESAMPLER_CUTOFF * 0.5 / max(up, down)
+    m = np.arange(length) - (length - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * m) * np.kaiser(length, RESAMPLER_KAISER_BETA)
+    # Each output sample only sees one in `up` taps, so scale to keep unity gain
+    taps *= up / taps.sum()
+    return taps.reshape(taps_per_phase, up).T.astype(np.float32)
+
+
+class Resampler:
+    """
+    Streaming rational-ratio polyphase resampler for mono float32 audio.
+
+    Output sample n reads the input at position n * down / up. Only the taps of the
+    matching polyphase branch are applied, so no zero-stuffed signal is ever built.
+    The tail of each batch is kept so consecutive batches join without discontinuities.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, taps_per_phase: int = RESAMPLER_TAPS_PER_PHASE):
+        divisor = gcd(in_rate, out_rate)
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        self.taps_per_phase = taps_per_phase
+        self.filters = design_polyphase_filter(self.up, self.down, taps_per_phase)
+        self.reset()
+
+    def reset(self):
+        # Start with a zeroed history so the first output sample has a full window
+        self.history = np.zeros(self.taps_per_phase - 1, dtype=np.float32)
+        self.history_start = -(self.taps_per_phase - 1)
+        self.next_output = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self.up == self.down:
+            return samples.astype(np.float32, copy=False)
+
+        buffer = np.concatenate([self.history, samples.astype(np.float32, copy=False)])
+        buffer_end = self.history_start + len(buffer)
+
+        # Outputs whose newest input sample, (n * down) // up, is already available
+        last_output = (buffer_end * self.up - 1) // self.down
+        positions = np.arange(self.next_output, last_output + 1, dtype=np.int64) * self.down
+        newest = positions // self.up - self.history_start
+        phases = positions % self.up
+
+        windows = np.lib.stride_tricks.sliding_window_view(buffer, self.taps_per_phase)
+        # Window i covers buffer[i:i + taps]; reverse it so column k holds the input k samples back
+        output = np.einsum(
+            "nk,nk->n",
+            windows[newest - (self.taps_per_phase - 1)][:, ::-1],
+            self.filters[phases],
+        )
+
+        self.next_output = last_output + 1
+        keep_from = (self.next_output * self.down) // self.up - (self.taps_per_phase - 1)
+        self.history = buffer[keep_from - self.history_start:]
+        self.history_start = keep_from
+        return output.astype(np.float32, copy=False)
+
+
+def pcm16_to_float(audio_data: bytes, channels: int) -> np.ndarray:
+    """Decodes interleaved PCM16 and downmixes it to mono float32."""
+    samples = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32)
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def float_to_pcm16(samples: np.ndarray, channels: int) -> bytes:
+    """Encodes mono float32 as interleaved PCM16, duplicating it to every channel."""
+    if channels > 1:
+        samples = np.repeat(samples, channels)
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16).tobytes()
+
+
+class CaptureConverter:
+    """Converts device capture audio (any rate, any channel count) to mono PCM16 at the API rate."""
+
+    def __init__(self, device_rate: int, device_channels: int, target_rate: int):
+        self.device_channels = device_channels
+        self.resampler = Resampler(device_rate, target_rate)
+        self.is_passthrough = device_rate == target_rate and device_channels == 1
+        self.remainder = b""
+
+    def convert(self, audio_data: bytes) -> bytes:
+        if self.is_passthrough:
+            return audio_data
+        # Keep partial frames for the next batch
+        frame_bytes = 2 * self.device_channels
+        data = self.remainder + audio_data
+        usable = len(data) - len(data) % frame_bytes
+        self.remainder = data[usable:]
+        return float_to_pcm16(self.resampler.process(pcm16_to_float(data[:usable], self.device_channels)), 1)
+
+
+class PlaybackConverter:
+    """Converts mono PCM16 at the API rate to the output device's rate and channel count."""
+
+    def __init__(self, source_rate: int, device_rate: int, device_channels: int):
+        self.device_channels = device_channels
+        self.resampler = Resampler(source_rate, device_rate)
+        self.is_passthrough = device_rate == source_rate and device_channels == 1
+        self.remainder = b""
+
+    def convert(self, audio_data: bytes) -> bytes:
+        if self.is_passthrough:
+            return audio_data
+        data = self.remainder + audio_data
+        usable = len(data) - len(data) % 2
+        self.remainder = data[usable:]
+        return float_to_pcm16(self.resampler.process(pcm16_to_float(data[:usable], 1)), self.device_channels)
+
+    def reset(self):
+        self.resampler.reset()
+        self.remainder = b""
+
+
+def native_device_format(p, input: bool) -> tuple:
+    """
+    Returns the (rate, channels) of the default input or output device of a PyAudio instance.
+
+    Capture is limited to two channels, since the extra channels are averaged away anyway.
+    """
+    info = p.get_default_input_device_info() if input else p.get_default_output_device_info()
+    max_channels = int(info["maxInputChannels"] if input else info["maxOutputChannels"])
+    return int(info["defaultSampleRate"]), max(1, min(max_channels, 2))
@@ -0,0 +1,161 @@
+import logging
+import queue
+import time
+import wave
+from typing import Optional
+
+from .audio_conversion import CaptureConverter
+
+# The realtime API's pcm16 format: 24 kHz, mono, 16-bit little-endian
+REALTIME_SAMPLE_RATE = 24000
+
+# Silence appended after a WAV source ends, so server VAD detects the end of speech
+WAV_TRAILING_SILENCE_MS = 1000
+
+
+class AudioSource:
+    """
+    Base class for assistant audio inputs (the interface AsyncMicrophone implements).
+
+    Captured audio is queued while recording and not receiving an assistant response,
+    and `get_audio_data` returns it as 24 kHz mono PCM16. Subclasses acquire their
+    resources in `open`, which runs on the first `start_recording`, so constructing a
+    source never touches hardware.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.is_recording = False
+        self.is_receiving = False
+        self.is_open = False
+
+    def open(self):
+        pass
+
+    def push(self, audio_data: bytes):
+        if self.is_recording and not self.is_receiving:
+            self.queue.put(audio_data)
+
+    def start_recording(self):
+        if not self.is_open:
+            self.open()
+            self.is_open = True
+        self.is_recording = True
+
+    def stop_recording(self):
+        self.is_recording = False
+
+    def start_receiving(self):
+        self.is_receiving = True
+        self.is_recording = False
+
+    def stop_receiving(self):
+        self.is_receiving = False
+
+    def get_audio_data(self) -> Optional[bytes]:
+        chunks = []
+        while not self.queue.empty():
+            chunks.append(self.queue.get())
+        return b"".join(chunks) if chunks else None
+
+    def close(self):
+        self.is_recording = False
+
+
+class StreamAudioSource(AudioSource):
+    """Audio fed by a network stream (e.g. gRPC StreamAudio) through `push`."""
+
+
+class NullAudioSource(AudioSource):
+    """A source that never produces audio, for text-only assistants."""
+
+    def push(self, audio_data: bytes):
+        pass
+
+
+class WavFileSource(AudioSource):
+    """
+    Plays a WAV file into the assistant as if it were spoken into a microphone.
+
+    Any rate or channel count is converted to the realtime format. With `realtime=True`
+    audio is released at the pace it would be captured; otherwise it is all available at
+    once. Some trailing silence is added at the end so the server detects end of speech.
+    """
+
+    def __init__(self, file_path: str, realtime: bool = True, trailing_silence_ms: int = WAV_TRAILING_SILENCE_MS):
+        super().__init__()
+        self.file_path = file_path
+        self.realtime = realtime
+        self.trailing_silence_ms = trailing_silence_ms
+        self.audio = b""
+        self.position = 0
+        self.started_at = None
+
+    def open(self):
+        with wave.open(self.file_path, "rb") as wav_file:
+            if wav_file.getsampwidth() != 2:
+                raise ValueError(f"{self.file_path} must be 16-bit PCM.")
+            converter = CaptureConverter(wav_file.getframerate(), wav_file.getnchannels(), REALTIME_SAMPLE_RATE)
+            audio = converter.convert(wav_file.readframes(wav_file.getnframes()))
+        silence = b"\x00\x00" * (REALTIME_SAMPLE_RATE * self.trailing_silence_ms // 1000)
+        self.audio = audio + silence
+        logging.info(f"WavFileSource loaded {len(audio) // 2 / REALTIME_SAMPLE_RATE:.1f} s from {self.file_path}")
+
+    def start_recording(self):
+        super().start_recording()
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+
+    def get_audio_data(self) -> Optional[bytes]:
+        if not self.is_recording or self.is_receiving or self.position >= len(self.audio):
+            return None
+        if self.realtime:
+            due = int((time.monotonic() - self.started_at) * REALTIME_SAMPLE_RATE) * 2
+        else:
+            due = len(self.audio)
+        end = min(max(due, self.position), len(self.audio))
+        audio_data = self.audio[self.position:end]
+        self.position = end
+        return audio_data or None
+
+    @property
+    def is_exhausted(self) -> bool:
+        return self.is_open and self.position >= len(self.audio)
+
+
+class AudioSink:
+    """Base class for assistant audio outputs; receives 24 kHz mono PCM16 per response."""
+
+    async def play(self, audio_data: bytes):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class NullAudioSink(AudioSink):
+    """Discards audio, e.g. when it is delivered to a remote client through events."""
+
+    async def play(self, audio_data: bytes):
+        pass
+
+
+class WavFileSink(AudioSink):
+    """Appends every response's audio to a WAV file, opened on the first response."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.wav_file = None
+
+    async def play(self, audio_data: bytes):
+        if self.wav_file is None:
+            self.wav_file = wave.open(self.file_path, "wb")
+            self.wav_file.setnchannels(1)
+            self.wav_file.setsampwidth(2)
+            self.wav_file.setframerate(REALTIME_SAMPLE_RATE)
+        self.wav_file.writeframes(audio_data)
+
+    def close(self):
+        if self.wav_file is not None:
+            self.wav_file.close()
+            self.wav_file = None
@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .llm import chat_prompt
+from .session_context import get_scratch_pad_dir
+from .tokens import count_message_tokens
+from .utils import ModelName, model_name_to_id
+
+# Prompt tokens the history may use before older turns are summarized
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "8000"))
+
+# Newest turns that are always sent verbatim and never summarized
+CONVERSATION_RECENT_TURNS = int(os.getenv("CONVERSATION_RECENT_TURNS", "6"))
+
+# Summarize once the history reaches this fraction of the budget, leaving room while the summary is written
+COMPACTION_THRESHOLD = 0.75
+
+SUMMARY_MAX_WORDS = 300
+
+# Tool results are cut to this many characters in the transcript that gets summarized
+SUMMARY_TOOL_RESULT_CHARS = 500
+
+SUMMARY_CACHE_FILE = "conversation_summaries.json"
+
+# Summaries kept in the cache file; the oldest are dropped first
+SUMMARY_CACHE_MAX_ENTRIES = 200
+
+
+async def summarize_with_llm(prompt: str) -> str:
+    return await asyncio.to_thread(chat_prompt, prompt, model_name_to_id[ModelName.fast_model])
+
+
+def render_transcript(turns: List[List[dict]]) -> str:
+    lines = []
+    for turn in turns:
+        for message in turn:
+            if message.get("content"):
+                content = message["content"]
+                if message["role"] == "tool":
+                    content = content[:SUMMARY_TOOL_RESULT_CHARS]
+                lines.append(f"{message['role']}: {content}")
+            for tool_call in message.get("tool_calls") or []:
+                lines.append(f"assistant called {tool_call['function']['name']}({tool_call['function']['arguments']})")
+    return "\n".join(lines)
+
+
+class SummaryCache:
+    """
+    Persists conversation summaries keyed by what they summarize.
+
+    A summary is keyed by the hash of the previous summary and the folded messages, so
+    replaying a conversation (e.g. the same --prompts) reuses summaries instead of
+    calling the model again.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.entries: Optional[Dict[str, str]] = None
+
+    @staticmethod
+    def key(summary: str, turns: List[List[dict]]) -> str:
+        payload = json.dumps({"summary": summary, "turns": turns}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def load(self) -> Dict[str, str]:
+        if self.entries is None:
+            try:
+                with open(self.file_path, "r") as f:
+                    self.entries = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.entries = {}
+        return self.entries
+
+    def get(self, key: str) -> Optional[str]:
+        return self.load().get(key)
+
+    def put(self, key: str, summary: str):
+        entries = self.load()
+        entries[key] = summary
+        while len(entries) > SUMMARY_CACHE_MAX_ENTRIES:
+            entries.pop(next(iter(entries)))
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(temp_path, self.file_path)
+
+
+class ConversationContext:
+    """
+    Chat history that keeps the request payload within a token budget.
+
+    Messages are grouped into turns: a user message and everything the assistant and its
+    tools added in reply. The newest `recent_turns` turns are always sent verbatim. Once
+    the history nears the budget, older turns are folded into a running summary by a
+    background task and sent as a single system message. Until that summary is ready,
+    the oldest turns are left out of requests so the payload stays bounded.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        token_budget: int = CONVERSATION_TOKEN_BUDGET,
+        recent_turns: int = CONVERSATION_RECENT_TURNS,
+        summarize: Callable[[str], Awaitable[str]] = summarize_with_llm,
+        summary_cache: Optional[SummaryCache] = None,
+    ):
+        self.model = model
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.summarize = summarize
+        self.summary_cache = summary_cache or SummaryCache(os.path.join(get_scratch_pad_dir(), SUMMARY_CACHE_FILE))
+        self.turns: List[List[dict]] = []
+        self.turn_tokens: List[int] = []
+        self.summary = ""
+        # Leading turns covered by the summary
+        self.summarized_turns = 0
+        self.compaction_task: Optional[asyncio.Task] = None
+
+    def add_user_message(self, content: str):
+        self.turns.append([])
+        self.turn_tokens.append(0)
+        self.add({"role": "user", "content": content})
+
+    def add(self, message: dict):
+        if not self.turns:
+            self.turns.append([])
+            self.turn_tokens.append(0)
+        self.turns[-1].append(message)
+        self.turn_tokens[-1] += count_message_tokens(message, self.model)
+
+    def summary_message(self) -> Optional[dict]:
+        if not self.summary:
+            return None
+        return {"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"}
+
+    def history_tokens(self) -> int:
+        summary_message = self.summary_message()
+        summary_tokens = count_message_tokens(summary_message, self.model) if summary_message else 0
+        return summary_tokens + sum(self.turn_tokens[self.summarized_turns:])
+
+    def request_messages(self) -> List[dict]:
+        """Returns the messages to send: the summary, then as many recent turns as fit the budget."""
+        summary_message = self.summary_message()
+        tokens = count_message_tokens(summary_message, self.model) if summary_message else 0
+        first_turn = len(self.turns)
+        # Always include the current turn, then add older ones while they fit
+        while first_turn > self.summarized_turns:
+            turn_tokens = self.turn_tokens[first_turn - 1]
+            if first_turn < len(self.turns) and tokens + turn_tokens > self.token_budget:
+                break
+            tokens += turn_tokens
+            first_turn -= 1
+        if first_turn > self.summarized_turns:
+            logging.info(f"Conversation over budget; {first_turn - self.summarized_turns} turn(s) left out until summarized")
+        messages = [summary_message] if summary_message else []
+        for turn in self.turns[first_turn:]:
+            messages.extend(turn)
+        return messages
+
+    def schedule_compaction(self):
+        """Starts summarizing older turns in the background if the history nears the budget."""
+        if self.compaction_task is not None and not self.compaction_task.done():
+            return
+        if self.history_tokens() < self.token_budget * COMPACTION_THRESHOLD:
+            return
+        fold_until = len(self.turns) - self.recent_turns
+        if fold_until <= self.summarized_turns:
+            return
+        self.compaction_task = asyncio.create_task(self.compact(fold_until))
+
+    async def compact(self, fold_until: int):
+        """Folds the turns before `fold_until` into the summary."""
+        turns = self.turns[self.summarized_turns:fold_until]
+        key = SummaryCache.key(self.summary, turns)
+        summary = self.summary_cache.get(key)
+        if summary is None:
+            prompt = f"""
+<purpose>
+    Summarize the earlier part of a conversation between a user and an AI assistant, so the assistant can continue it without the full transcript.
+</purpose>
+
+<instructions>
+    <instruction>Fold the existing summary and the new messages into one summary.</instruction>
+    <instruction>Keep facts, decisions, file names, user preferences, tool results that matter and open questions. Drop pleasantries.</instruction>
+    <instruction>Use at most {SUMMARY_MAX_WORDS} words.</instruction>
+    <instruction>Respond with the summary only.</instruction>
+</instructions>
+
+<existing-summary>
+{self.summary}
+</existing-summary>
+
+<new-messages>
+{render_transcript(turns)}
+</new-messages>
+"""
+            try:
+                summary = (await self.summarize(prompt)).strip()
+            except Exception as e:
+                logging.error(f"Failed to summarize the conversation: {e}")
+                return
+            try:
+                self.summary_cache.put(key, summary)
+            except OSError as e:
+                # The summary is still used; only replays will have to summarize again
+                logging.warning(f"Failed to cache the conversation summary: {e}")
+        self.summary = summary
+        self.summarized_turns = fold_until
+        logging.info(f"Summarized conversation up to turn {fold_until}; history is now {self.history_tokens()} tokens")
+
+    async def close(self):
+        """Cancels a running compaction and waits for it to finish."""
+        if self.compaction_task is not None and not self.compaction_task.done():
+            self.compaction_task.cancel()
+            try:
+                await self.compaction_task
+            except asyncio.CancelledError:
+                pass
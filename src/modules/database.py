@@ -1,7 +1,13 @@
-import psycopg2
-import pandas as pd
+from __future__ import annotations
+
 import sqlite3
-import duckdb
+
+from .lazy import lazy_import
+
+# Database drivers are imported when a database of that kind is first used
+psycopg2 = lazy_import("psycopg2")
+pd = lazy_import("pandas")
+duckdb = lazy_import("duckdb")
 
 class Database:
     def connect(self, url: str):
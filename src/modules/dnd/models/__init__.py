@@ -1,4 +1,3 @@
-from numpy import character
 from .campaign import Campaign, Act, Chapter, Area, Location
 from .npc import NPC
 from .player import Player
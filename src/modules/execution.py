@@ -0,0 +1,443 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import signal
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import psutil
+from pydantic import BaseModel
+
+# Seconds a script may run before it is killed
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("RUN_PYTHON_TIMEOUT_SECONDS", "120"))
+
+# Bytes of stdout and of stderr kept per run; the rest is counted and dropped
+DEFAULT_MAX_OUTPUT_BYTES = int(os.getenv("RUN_PYTHON_MAX_OUTPUT_BYTES", str(64 * 1024)))
+
+# Seconds allowed for creating and installing a pooled environment
+ENVIRONMENT_SETUP_TIMEOUT_SECONDS = 300
+
+# Number of pre-warmed environments kept on disk
+MAX_WARM_ENVIRONMENTS = int(os.getenv("UV_ENV_POOL_SIZE", "4"))
+
+UV_ENV_POOL_DIR = os.getenv(
+    "UV_ENV_POOL_DIR", os.path.join(tempfile.gettempdir(), "realtime-assistant-uv-envs")
+)
+
+# Written into an environment once its dependencies are installed; its mtime records the last use
+ENVIRONMENT_READY_MARKER = ".ready"
+
+READ_CHUNK_SIZE = 4096
+
+# Seconds between CPU and memory samples of a running script
+USAGE_SAMPLE_INTERVAL_SECONDS = 0.05
+
+# Characters of each stream included when a result is summarized for a prompt
+PROMPT_OUTPUT_CHARS = 2000
+
+# PEP 723 inline script metadata block, as understood by `uv run`
+script_metadata_regex = re.compile(
+    r"^# /// script\s*$\n(?P<content>(?:^#(?:| .*)$\n)+)^# ///\s*$", re.MULTILINE
+)
+dependencies_regex = re.compile(r"^dependencies\s*=\s*\[(?P<items>.*?)\]", re.MULTILINE | re.DOTALL)
+quoted_item_regex = re.compile(r"""["']([^"']+)["']""")
+
+OutputCallback = Callable[[str, bytes], Awaitable[None]]
+
+
+def parse_script_dependencies(python_code: str) -> Tuple[str, ...]:
+    """
+    Returns the dependencies declared in a script's inline metadata block.
+
+    Args:
+        python_code (str): The script source.
+
+    Returns:
+        Tuple[str, ...]: Sorted, de-duplicated dependency specifiers; empty if none are declared.
+    """
+    match = script_metadata_regex.search(python_code)
+    if not match:
+        return ()
+    content = "\n".join(line[2:] for line in match.group("content").splitlines())
+    dependencies = dependencies_regex.search(content)
+    if not dependencies:
+        return ()
+    return tuple(sorted(set(quoted_item_regex.findall(dependencies.group("items")))))
+
+
+class CappedOutput:
+    """Collects a stream's output up to a byte limit and counts what was dropped."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.chunks: List[bytes] = []
+        self.size = 0
+        self.dropped_bytes = 0
+
+    def append(self, chunk: bytes):
+        remaining = self.max_bytes - self.size
+        if remaining > 0:
+            kept = chunk[:remaining]
+            self.chunks.append(kept)
+            self.size += len(kept)
+        self.dropped_bytes += max(0, len(chunk) - max(remaining, 0))
+
+    def text(self) -> str:
+        text = b"".join(self.chunks).decode("utf-8", errors="replace")
+        if self.dropped_bytes:
+            text += f"\n[... truncated {self.dropped_bytes} bytes]"
+        return text
+
+
+class RunResult(BaseModel):
+    run_id: str
+    command: List[str]
+    exit_code: Optional[int]
+    timed_out: bool
+    wall_time: float
+    cpu_time: Optional[float] = None
+    peak_rss_bytes: Optional[int] = None
+    stdout: str
+    stderr: str
+    stdout_truncated_bytes: int = 0
+    stderr_truncated_bytes: int = 0
+
+    @property
+    def success(self) -> bool:
+        return self.exit_code == 0 and not self.timed_out
+
+    def excerpt(self, stream: str, max_chars: int = PROMPT_OUTPUT_CHARS) -> str:
+        """
+        Returns the head and tail of stdout or stderr, sized for a prompt.
+        """
+        text = getattr(self, stream)
+        if len(text) <= max_chars:
+            return text
+        half = max_chars // 2
+        return f"{text[:half]}\n[... {len(text) - 2 * half} characters omitted ...]\n{text[-half:]}"
+
+
+async def _sample_usage(pid: int, usage: dict):
+    """
+    Samples CPU time and resident memory of a process and its children until it exits.
+
+    Values are sampled, so very short-lived processes may report zero.
+    """
+    try:
+        process = psutil.Process(pid)
+    except psutil.NoSuchProcess:
+        return
+    while True:
+        try:
+            cpu_times = process.cpu_times()
+            cpu_time = cpu_times.user + cpu_times.system + cpu_times.children_user + cpu_times.children_system
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    child_times = child.cpu_times()
+                    cpu_time += child_times.user + child_times.system
+                    rss += child.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return
+        usage["cpu_time"] = max(usage["cpu_time"], cpu_time)
+        usage["peak_rss_bytes"] = max(usage["peak_rss_bytes"], rss)
+        await asyncio.sleep(USAGE_SAMPLE_INTERVAL_SECONDS)
+
+
+async def _pump_stream(stream, name: str, output: CappedOutput, on_output: Optional[OutputCallback]):
+    while True:
+        chunk = await stream.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        output.append(chunk)
+        if on_output:
+            await on_output(name, chunk)
+
+
+def _kill_process_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def run_command(
+    command: List[str],
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    on_output: Optional[OutputCallback] = None,
+    cwd: Optional[str] = None,
+) -> RunResult:
+    """
+    Runs a command without blocking the event loop, streaming its output into capped buffers.
+
+    Args:
+        command (List[str]): The command and its arguments.
+        timeout (float): Seconds before the command and its children are killed.
+        max_output_bytes (int): Bytes of stdout and of stderr to keep.
+        on_output (Callable): Optional coroutine called with ("stdout" | "stderr", chunk) as output arrives.
+        cwd (str): Optional working directory.
+
+    Returns:
+        RunResult: Exit code, timings, sampled resource usage and the captured output.
+    """
+    start_time = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        # Own process group so a timeout also kills anything the script spawned
+        start_new_session=True,
+    )
+    stdout = CappedOutput(max_output_bytes)
+    stderr = CappedOutput(max_output_bytes)
+    usage = {"cpu_time": 0.0, "peak_rss_bytes": 0}
+    sampler = asyncio.create_task(_sample_usage(process.pid, usage))
+    pumps = asyncio.gather(
+        _pump_stream(process.stdout, "stdout", stdout, on_output),
+        _pump_stream(process.stderr, "stderr", stderr, on_output),
+    )
+
+    async def wait_for_exit():
+        await asyncio.shield(pumps)
+        # A script can close its streams and keep running, so the exit is part of the timeout
+        await process.wait()
+
+    timed_out = False
+    try:
+        await asyncio.wait_for(wait_for_exit(), timeout=timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        _kill_process_group(process)
+        await process.wait()
+        await pumps
+    except asyncio.CancelledError:
+        _kill_process_group(process)
+        pumps.cancel()
+        # Reap the killed process so it does not linger as a zombie
+        await process.wait()
+        raise
+    finally:
+        sampler.cancel()
+
+    return RunResult(
+        run_id=uuid.uuid4().hex[:12],
+        command=list(command),
+        exit_code=process.returncode,
+        timed_out=timed_out,
+        wall_time=round(time.perf_counter() - start_time, 4),
+        cpu_time=round(usage["cpu_time"], 4),
+        peak_rss_bytes=usage["peak_rss_bytes"],
+        stdout=stdout.text(),
+        stderr=stderr.text(),
+        stdout_truncated_bytes=stdout.dropped_bytes,
+        stderr_truncated_bytes=stderr.dropped_bytes,
+    )
+
+
+class UvEnvironmentPool:
+    """
+    Keeps a small LRU pool of uv virtual environments keyed by dependency set.
+
+    A script whose inline metadata matches a warm environment runs directly with that
+    environment's interpreter, so repeat runs skip dependency resolution entirely.
+    Environments are only used once their install completed (see ENVIRONMENT_READY_MARKER),
+    and the pool is bounded on disk, including environments left by earlier processes.
+    """
+
+    def __init__(self, root_dir: str = UV_ENV_POOL_DIR, max_environments: int = MAX_WARM_ENVIRONMENTS):
+        self.root_dir = root_dir
+        self.max_environments = max_environments
+        self.environments: "OrderedDict[Tuple[str, ...], str]" = OrderedDict()
+        self.locks: Dict[Tuple[str, ...], asyncio.Lock] = {}
+
+    @staticmethod
+    def _environment_dir_name(dependencies: Tuple[str, ...]) -> str:
+        return hashlib.sha256("\n".join(dependencies).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _python_path(environment_dir: str) -> str:
+        if os.name == "nt":
+            return os.path.join(environment_dir, "Scripts", "python.exe")
+        return os.path.join(environment_dir, "bin", "python")
+
+    @staticmethod
+    def _marker_path(environment_dir: str) -> str:
+        return os.path.join(environment_dir, ENVIRONMENT_READY_MARKER)
+
+    def _is_ready(self, environment_dir: str) -> bool:
+        return os.path.exists(self._marker_path(environment_dir))
+
+    def _mark_used(self, environment_dir: str):
+        try:
+            os.utime(self._marker_path(environment_dir))
+        except OSError:
+            pass
+
+    def _last_used(self, environment_dir: str) -> float:
+        try:
+            return os.path.getmtime(self._marker_path(environment_dir))
+        except OSError:
+            # Unfinished environments are evicted first
+            return 0.0
+
+    async def get_python(self, dependencies: Tuple[str, ...]) -> Optional[str]:
+        """
+        Returns the interpreter of a warm environment for `dependencies`, creating it if needed.
+
+        Returns:
+            Optional[str]: The interpreter path, or None if the environment could not be created.
+        """
+        environment_dir = self.environments.get(dependencies)
+        if environment_dir is not None and self._is_ready(environment_dir):
+            self.environments.move_to_end(dependencies)
+            self._mark_used(environment_dir)
+            return self._python_path(environment_dir)
+        # Evicted by another process
+        self.environments.pop(dependencies, None)
+
+        lock = self.locks.setdefault(dependencies, asyncio.Lock())
+        async with lock:
+            if dependencies not in self.environments:
+                environment_dir = await self._create(dependencies)
+                if environment_dir is None:
+                    return None
+                self.environments[dependencies] = environment_dir
+                self._evict()
+        return self._python_path(self.environments[dependencies])
+
+    async def warm(self, dependencies: Tuple[str, ...]) -> bool:
+        """Creates the environment for `dependencies` ahead of the first run."""
+        return await self.get_python(dependencies) is not None
+
+    async def _create(self, dependencies: Tuple[str, ...]) -> Optional[str]:
+        environment_dir = os.path.join(self.root_dir, self._environment_dir_name(dependencies))
+        python_path = self._python_path(environment_dir)
+        if self._is_ready(environment_dir):
+            # Reuse an environment left by an earlier process
+            self._mark_used(environment_dir)
+            return environment_dir
+        # Without the marker the directory is left from an interrupted install
+        shutil.rmtree(environment_dir, ignore_errors=True)
+
+        logging.info(f"Creating uv environment for dependencies: {', '.join(dependencies)}")
+        os.makedirs(self.root_dir, exist_ok=True)
+        for command in (
+            ["uv", "venv", "--quiet", environment_dir],
+            ["uv", "pip", "install", "--quiet", "--python", python_path, *dependencies],
+        ):
+            try:
+                result = await run_command(command, timeout=ENVIRONMENT_SETUP_TIMEOUT_SECONDS)
+            except OSError as e:
+                logging.warning(f"Failed to run '{command[0]}': {str(e)}")
+                shutil.rmtree(environment_dir, ignore_errors=True)
+                return None
+            if not result.success:
+                logging.warning(f"Failed to create uv environment: {result.stderr}")
+                shutil.rmtree(environment_dir, ignore_errors=True)
+                return None
+        with open(self._marker_path(environment_dir), "w"):
+            pass
+        return environment_dir
+
+    def _evict(self):
+        """Removes the least recently used environment directories beyond `max_environments`."""
+        try:
+            with os.scandir(self.root_dir) as entries:
+                environment_dirs = [entry.path for entry in entries if entry.is_dir()]
+        except OSError:
+            return
+        environment_dirs.sort(key=self._last_used)
+        for environment_dir in environment_dirs[:max(0, len(environment_dirs) - self.max_environments)]:
+            logging.info(f"Evicting uv environment {environment_dir}")
+            shutil.rmtree(environment_dir, ignore_errors=True)
+        for dependencies, environment_dir in list(self.environments.items()):
+            if not os.path.isdir(environment_dir):
+                del self.environments[dependencies]
+
+
+uv_environment_pool = UvEnvironmentPool()
+
+# Background warm-ups started by `warm_script_environment`; referenced until they finish
+warming_tasks = set()
+
+
+def warm_script_environment(python_code: str) -> Optional[asyncio.Task]:
+    """
+    Starts creating the pooled environment for a script's inline dependencies in the
+    background, so the script's first run does not wait for dependency installation.
+
+    Returns:
+        Optional[asyncio.Task]: The warm-up task, or None if the script declares no dependencies.
+    """
+    dependencies = parse_script_dependencies(python_code)
+    if not dependencies:
+        return None
+    task = asyncio.create_task(uv_environment_pool.warm(dependencies))
+    warming_tasks.add(task)
+    task.add_done_callback(warming_tasks.discard)
+    return task
+
+
+async def run_python_code(
+    python_code: str,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    on_output: Optional[OutputCallback] = None,
+) -> RunResult:
+    """
+    Runs a Python snippet in a subprocess and returns its structured result.
+
+    Scripts that declare inline dependencies run in a pooled, pre-warmed environment.
+    Other scripts, or scripts whose environment cannot be created, run with `uv run`.
+    The temporary script file is always removed.
+
+    Args:
+        python_code (str): A Python code snippet as a string.
+        timeout (float): Seconds before the script is killed.
+        max_output_bytes (int): Bytes of stdout and of stderr to keep.
+        on_output (Callable): Optional coroutine receiving output chunks as they arrive.
+
+    Returns:
+        RunResult: The result of `run_command`.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".py", delete=False) as temp_file:
+        temp_file.write(python_code.encode("utf-8"))
+        temp_file_path = temp_file.name
+
+    try:
+        dependencies = parse_script_dependencies(python_code)
+        python_path = await uv_environment_pool.get_python(dependencies) if dependencies else None
+        command = [python_path, temp_file_path] if python_path else ["uv", "run", temp_file_path]
+        return await run_command(
+            command, timeout=timeout, max_output_bytes=max_output_bytes, on_output=on_output
+        )
+    finally:
+        try:
+            os.remove(temp_file_path)
+        except OSError:
+            pass
+
+
+async def run_uv_script_async(python_code: str, timeout: float = DEFAULT_TIMEOUT_SECONDS) -> str:
+    """
+    Async counterpart of `utils.run_uv_script`: runs the code and returns stdout followed by stderr.
+    """
+    try:
+        result = await run_python_code(python_code, timeout=timeout)
+    except OSError as e:
+        return str(e)
+    output = result.stdout + result.stderr
+    if result.timed_out:
+        output += f"\nError: script timed out after {timeout} seconds"
+    return output
@@ -0,0 +1,179 @@
+import functools
+import mmap
+import os
+from typing import List, Optional, Tuple
+
+# Files up to this size are passed whole; larger ones are previewed
+LARGE_FILE_BYTES = int(os.getenv("LARGE_FILE_BYTES", str(256 * 1024)))
+
+# Target size of a chunk; chunks end on a line break, so they can be larger, up to
+# CHUNK_MAX_FACTOR times this size (longer lines are cut)
+CHUNK_BYTES = int(os.getenv("FILE_CHUNK_BYTES", str(64 * 1024)))
+CHUNK_MAX_FACTOR = 2
+
+# Shape of the preview of a large file
+PREVIEW_HEAD_BYTES = 8 * 1024
+PREVIEW_TAIL_BYTES = 4 * 1024
+PREVIEW_SAMPLES = 4
+PREVIEW_SAMPLE_BYTES = 1024
+
+# Chunk index entries included in a preview's metadata; evenly spaced over the file
+MAX_INDEX_ENTRIES = 32
+
+
+@functools.lru_cache(maxsize=64)
+def build_chunk_index(path: str, size: int, mtime: float, chunk_bytes: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    Splits a file into (start, end) byte ranges of about `chunk_bytes` that end on line breaks.
+
+    A chunk whose line does not end within CHUNK_MAX_FACTOR * `chunk_bytes` is cut there
+    instead (before a UTF-8 continuation byte, so characters are not split), so files with
+    very long lines or no line breaks are still chunked.
+
+    Cached per file version: `size` and `mtime` are part of the key, so a modified file is
+    indexed again.
+    """
+    if size == 0:
+        return ()
+    chunks = []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        start = 0
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                limit = min(start + CHUNK_MAX_FACTOR * chunk_bytes, size)
+                line_end = mapped.find(b"\n", end - 1, limit)
+                if line_end != -1:
+                    end = line_end + 1
+                else:
+                    end = limit
+                    # Back off to a character boundary; at most 3 continuation bytes
+                    while end < size and end > max(start + 1, limit - 3) and mapped[end] & 0xC0 == 0x80:
+                        end -= 1
+            chunks.append((start, end))
+            start = end
+    return tuple(chunks)
+
+
+class ChunkedFile:
+    """
+    Reads a file through a memory map, so only the ranges that are used are loaded.
+
+    Small files are read whole. Large files are represented by a bounded preview (head,
+    evenly spaced samples and tail) and a chunk index with byte offsets; the rest stays
+    on disk and is read chunk by chunk on demand.
+
+    Args:
+        path (str): The file to read.
+        chunk_bytes (int): Target size of a chunk.
+    """
+
+    def __init__(self, path: str, chunk_bytes: int = CHUNK_BYTES):
+        self.path = path
+        self.chunk_bytes = chunk_bytes
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+
+    def chunks(self) -> Tuple[Tuple[int, int], ...]:
+        return build_chunk_index(self.path, self.size, self.mtime, self.chunk_bytes)
+
+    def read_range(self, start: int, end: int) -> str:
+        """Reads bytes [start, end) as text; invalid UTF-8 is replaced rather than raised."""
+        start = max(0, min(start, self.size))
+        end = max(start, min(end, self.size))
+        if start == end:
+            return ""
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[start:end].decode("utf-8", errors="replace")
+
+    def read_chunk(self, index: int) -> str:
+        """
+        Reads one chunk of the index.
+
+        Raises:
+            IndexError: If the file has no such chunk.
+        """
+        chunks = self.chunks()
+        if not 0 <= index < len(chunks):
+            raise IndexError(f"Chunk {index} out of range; the file has {len(chunks)} chunks.")
+        return self.read_range(*chunks[index])
+
+    def is_large(self, max_bytes: int = LARGE_FILE_BYTES) -> bool:
+        return self.size > max_bytes
+
+    def preview(self) -> str:
+        """
+        Returns the head, evenly spaced samples and the tail of the file, cut on line breaks.
+
+        Omitted ranges are marked with their byte offsets, so they can be read on demand.
+        """
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            ranges = [self.line_range(mapped, 0, PREVIEW_HEAD_BYTES)]
+            sample_span = max(0, self.size - PREVIEW_HEAD_BYTES - PREVIEW_TAIL_BYTES) // (PREVIEW_SAMPLES + 1)
+            for sample in range(1, PREVIEW_SAMPLES + 1):
+                ranges.append(self.line_range(mapped, PREVIEW_HEAD_BYTES + sample * sample_span, PREVIEW_SAMPLE_BYTES))
+            ranges.append(self.line_range(mapped, self.size - PREVIEW_TAIL_BYTES, PREVIEW_TAIL_BYTES))
+
+            parts = []
+            position = 0
+            for start, end in ranges:
+                if start < position:
+                    start = position
+                if start >= end:
+                    continue
+                if start > position:
+                    parts.append(f"\n[... bytes {position}-{start} omitted ...]\n")
+                parts.append(mapped[start:end].decode("utf-8", errors="replace"))
+                position = end
+            if position < self.size:
+                parts.append(f"\n[... bytes {position}-{self.size} omitted ...]\n")
+        return "".join(parts)
+
+    def line_range(self, mapped: mmap.mmap, start: int, length: int) -> Tuple[int, int]:
+        """Widens [start, start + length) to start after a line break and end on one, if there are any."""
+        start = max(0, start)
+        end = min(start + length, self.size)
+        if start > 0:
+            line_start = mapped.find(b"\n", start - 1, end)
+            if line_start != -1:
+                start = line_start + 1
+        if end < self.size:
+            line_end = mapped.rfind(b"\n", start, end)
+            if line_end != -1:
+                end = line_end + 1
+        return start, end
+
+    def index_summary(self) -> List[dict]:
+        """Up to MAX_INDEX_ENTRIES evenly spaced entries of the chunk index."""
+        chunks = self.chunks()
+        step = max(1, -(-len(chunks) // MAX_INDEX_ENTRIES))
+        return [{"chunk": index, "start": chunks[index][0], "end": chunks[index][1]} for index in range(0, len(chunks), step)]
+
+    def excerpt(self, max_bytes: int = LARGE_FILE_BYTES) -> str:
+        """The whole file if it is small, otherwise its preview."""
+        if not self.is_large(max_bytes):
+            return self.read_range(0, self.size)
+        return self.preview()
+
+    def metadata(self) -> dict:
+        """Size and chunk index of a previewed file, for tool results."""
+        return {
+            "file_size": self.size,
+            "chunk_count": len(self.chunks()),
+            "chunk_index": self.index_summary(),
+        }
+
+
+def read_excerpt(path: str, max_bytes: int = LARGE_FILE_BYTES) -> Tuple[str, Optional[dict]]:
+    """
+    Reads a file for a prompt or memory: whole if small, previewed if large.
+
+    Returns:
+        Tuple[str, Optional[dict]]: The text, and the file's size and chunk index if it was
+        previewed (None if it was read whole).
+    """
+    chunked_file = ChunkedFile(path)
+    if not chunked_file.is_large(max_bytes):
+        return chunked_file.read_range(0, chunked_file.size), None
+    return chunked_file.preview(), chunked_file.metadata()
@@ -0,0 +1,61 @@
+import importlib
+import importlib.util
+import sys
+import types
+
+
+class MissingModule(types.ModuleType):
+    """Placeholder for a lazily imported module that is not installed; fails on first use."""
+
+    def __getattr__(self, attribute):
+        raise ModuleNotFoundError(f"No module named '{self.__name__}'", name=self.__name__)
+
+
+def lazy_import(name: str):
+    """
+    Returns a module that is only executed on first attribute access.
+
+    Lets heavy optional dependencies keep their module-level alias (`pd = lazy_import("pandas")`)
+    while being imported the first time a tool actually uses them. Parent packages of a
+    dotted name are imported eagerly, as with a normal import. A module that is not
+    installed only raises ModuleNotFoundError when it is used.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return MissingModule(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class LazyTool:
+    """
+    Stands in for a tool function in a function map and imports its module on first call.
+
+    Args:
+        module_name (str): Absolute module path, e.g. "src.modules.tools.pulumi.refactor".
+        function_name (str): The async function to call in that module.
+    """
+
+    def __init__(self, module_name: str, function_name: str):
+        self.module_name = module_name
+        self.function_name = function_name
+        self.__name__ = function_name
+        self.function = None
+
+    def resolve(self):
+        if self.function is None:
+            module = importlib.import_module(self.module_name)
+            self.function = getattr(module, self.function_name)
+        return self.function
+
+    async def __call__(self, *args, **kwargs):
+        return await self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        return f"LazyTool({self.module_name}:{self.function_name})"
@@ -1,10 +1,21 @@
-import openai
 import os
+from typing import Optional
+
 from pydantic import BaseModel
 
+from .lazy import lazy_import
+from .llm_cache import llm_cache
+from .tokens import track_llm_call
+
+openai = lazy_import("openai")
+
 
 def structured_output_prompt(
-    prompt: str, response_format: BaseModel, llm_model: str = "gpt-4o-2024-08-06"
+    prompt: str,
+    response_format: BaseModel,
+    llm_model: str = "gpt-4o-2024-08-06",
+    cache: bool = False,
+    cache_ttl: Optional[float] = None,
 ) -> BaseModel:
     """
     Parse the response from the OpenAI API using structured output.
@@ -12,50 +23,76 @@ def structured_output_prompt(
     Args:
         prompt (str): The prompt to send to the OpenAI API.
         response_format (BaseModel): The Pydantic model representing the expected response format.
+        llm_model (str): The model ID to use for the API call.
+        cache (bool): Reuse the persisted response to an identical earlier request. Only for
+            prompts whose answer depends on nothing but the prompt.
+        cache_ttl (Optional[float]): Maximum age in seconds of a reused response.
 
     Returns:
         BaseModel: The parsed response from the OpenAI API.
     """
+    if cache:
+        key = llm_cache.key(llm_model, response_format, prompt)
+        cached = llm_cache.get(key, cache_ttl)
+        if cached is not None:
+            return response_format.model_validate_json(cached)
+
     client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    messages = [{"role": "user", "content": prompt}]
 
-    completion = client.beta.chat.completions.parse(
-        model=llm_model,
-        messages=[
-            {"role": "user", "content": prompt},
-        ],
-        response_format=response_format,
-    )
+    with track_llm_call(llm_model, messages) as call:
+        completion = client.beta.chat.completions.parse(
+            model=llm_model,
+            messages=messages,
+            response_format=response_format,
+        )
+        call.usage = completion.usage
 
     message = completion.choices[0].message
 
     if not message.parsed:
         raise ValueError(message.refusal)
 
+    if cache:
+        llm_cache.put(key, llm_model, message.parsed.model_dump_json())
+
     return message.parsed
 
 
-def chat_prompt(prompt: str, model: str) -> str:
+def chat_prompt(prompt: str, model: str, cache: bool = False, cache_ttl: Optional[float] = None) -> str:
     """
     Run a chat model based on the specified model name.
 
     Args:
         prompt (str): The prompt to send to the OpenAI API.
         model (str): The model ID to use for the API call.
+        cache (bool): Reuse the persisted response to an identical earlier request.
+        cache_ttl (Optional[float]): Maximum age in seconds of a reused response.
 
     Returns:
         str: The assistant's response.
     """
+    if cache:
+        key = llm_cache.key(model, None, prompt)
+        cached = llm_cache.get(key, cache_ttl)
+        if cached is not None:
+            return cached
+
     client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    messages = [{"role": "user", "content": prompt}]
 
-    completion = client.beta.chat.completions.parse(
-        model=model,
-        messages=[
-            {"role": "user", "content": prompt},
-        ],
-    )
+    with track_llm_call(model, messages) as call:
+        completion = client.beta.chat.completions.parse(
+            model=model,
+            messages=messages,
+        )
+        call.usage = completion.usage
 
     message = completion.choices[0].message
 
+    if cache and message.content is not None:
+        llm_cache.put(key, model, message.content)
+
     return message.content
 
 
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+LLM_CACHE_FILE = os.getenv("LLM_CACHE_FILE", "./llm_cache.sqlite")
+
+# Entries older than this are treated as misses and removed on the next eviction pass
+DEFAULT_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Total size of cached responses; the least recently used entries are evicted beyond it
+DEFAULT_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Trailing whitespace on lines and surrounding blank lines do not change a prompt's meaning.
+# Indentation and spacing inside lines do (e.g. in code sent for review), so they are kept.
+TRAILING_WHITESPACE_PATTERN = re.compile(r"[ \t]+$", re.M)
+
+
+def normalize_prompt(prompt: str) -> str:
+    prompt = prompt.replace("\r\n", "\n").replace("\r", "\n")
+    return TRAILING_WHITESPACE_PATTERN.sub("", prompt).strip("\n")
+
+
+def schema_hash(response_format: Optional[type]) -> str:
+    """Hashes a response format's JSON schema, so changing the model class invalidates its entries."""
+    if response_format is None:
+        return "text"
+    schema = json.dumps(response_format.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+
+
+class LLMResponseCache:
+    """
+    Persistent cache of LLM responses for prompts whose answer only depends on the prompt.
+
+    Entries are keyed by (model, response format schema hash, normalized prompt) and kept in
+    a SQLite file with their size and last access time. Reads past the TTL are misses, and
+    once the cached responses exceed `max_bytes` the least recently used ones are evicted.
+    Call sites opt in per call (see `structured_output_prompt(cache=True)`).
+    """
+
+    def __init__(self, file_path: str = LLM_CACHE_FILE, ttl: float = DEFAULT_TTL_SECONDS, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.file_path = file_path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.connection: Optional[sqlite3.Connection] = None
+        # Tool prompts run on the event loop and in worker threads
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+            self.connection = sqlite3.connect(self.file_path, check_same_thread=False, isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        return self.connection
+
+    @staticmethod
+    def key(model: str, response_format: Optional[type], prompt: str) -> str:
+        payload = "\0".join([model, schema_hash(response_format), normalize_prompt(prompt)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[str]:
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        try:
+            with self.lock:
+                connection = self.connect()
+                row = connection.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None or now - row[1] > ttl:
+                    self.misses += 1
+                    return None
+                connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            logging.warning(f"LLM cache read failed: {e}")
+            return None
+
+    def put(self, key: str, model: str, value: str):
+        now = time.time()
+        try:
+            with self.lock:
+                connection = self.connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, value, len(value.encode("utf-8")), now, now),
+                )
+                self.evict(connection, now)
+        except sqlite3.Error as e:
+            logging.warning(f"LLM cache write failed: {e}")
+
+    def evict(self, connection: sqlite3.Connection, now: float):
+        connection.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk from the least recently used entry until enough space is freed
+        excess = total - self.max_bytes
+        evicted = []
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if excess <= 0:
+                break
+            evicted.append((key,))
+            excess -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def stats(self) -> dict:
+        with self.lock:
+            connection = self.connect()
+            entries, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+# Shared cache; the database is opened on the first cached call
+llm_cache = LLMResponseCache()
@@ -1,36 +1,139 @@
+import atexit
 import logging
+import queue
 import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
 from rich.logging import RichHandler
 from rich.console import Console
 from rich.text import Text
 
 console = Console()
 
+EVENT_EMOJIS = {
+    "session.update": "🛠️",
+    "session.created": "🔌",
+    "session.updated": "🔄",
+    "input_audio_buffer.append": "🎤",
+    "input_audio_buffer.commit": "✅",
+    "input_audio_buffer.speech_started": "🗣️",
+    "input_audio_buffer.speech_stopped": "🤫",
+    "input_audio_buffer.cleared": "🧹",
+    "input_audio_buffer.committed": "📨",
+    "conversation.item.create": "📥",
+    "conversation.item.delete": "🗑️",
+    "conversation.item.truncate": "✂️",
+    "conversation.item.created": "📤",
+    "conversation.item.deleted": "🗑️",
+    "conversation.item.truncated": "✂️",
+    "response.create": "➡️",
+    "response.created": "📝",
+    "response.output_item.added": "➕",
+    "response.output_item.done": "✅",
+    "response.text.delta": "✍️",
+    "response.text.done": "📝",
+    "response.audio.delta": "🔊",
+    "response.audio.done": "🔇",
+    "response.done": "✔️",
+    "response.cancel": "⛔",
+    "response.function_call_arguments.delta": "📥",
+    "response.function_call_arguments.done": "📥",
+    "rate_limits.updated": "⏳",
+    "error": "❌",
+    "conversation.item.input_audio_transcription.completed": "📝",
+    "conversation.item.input_audio_transcription.failed": "⚠️",
+}
+
+# Event types sent or received many times per second; logged at most once per interval
+HIGH_FREQUENCY_EVENT_TYPES = {"input_audio_buffer.append", "response.audio.delta"}
+HIGH_FREQUENCY_LOG_INTERVAL_SECONDS = 1.0
+
+_listeners = {}
+
+
+class RichQueueHandler(QueueHandler):
+    """Queues records unformatted so the RichHandler on the listener thread still gets Rich `Text` messages."""
+
+    def prepare(self, record):
+        return record
+
+
+class EventSampler:
+    """Allows one log line per event type and interval, counting the events in between."""
+
+    def __init__(self, interval: float = HIGH_FREQUENCY_LOG_INTERVAL_SECONDS):
+        self.interval = interval
+        self.last_logged = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def sample(self, key) -> int:
+        """
+        Counts one event for `key`.
+
+        Returns:
+            int: The number of events covered by this log line, or 0 if it should be skipped.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+            if now - self.last_logged.get(key, float("-inf")) < self.interval:
+                return 0
+            self.last_logged[key] = now
+            return self.counts.pop(key)
+
+
+ws_event_sampler = EventSampler()
+
+
+def _stop_listeners():
+    for listener in _listeners.values():
+        listener.stop()
+    _listeners.clear()
+
+
 def setup_logging(logger_name="assistant", level=logging.INFO):
     """
     Set up logging with Rich for the given logger name and level.
-    
+
+    Records are handed to a queue and rendered by Rich on a listener thread, so logging
+    from the event loop does not block on console output. Calling this again for the same
+    logger only updates its level.
+
     Args:
         logger_name (str): The name of the logger.
         level (int): The logging level (e.g., logging.INFO, logging.DEBUG).
     """
     logger = logging.getLogger(logger_name)
     logger.setLevel(level)
-    
+    if logger_name in _listeners:
+        return logger
+
     # Set up RichHandler for pretty logging
     handler = RichHandler(rich_tracebacks=True, console=console)
     formatter = logging.Formatter("%(message)s", datefmt="[%X]")
     handler.setFormatter(formatter)
-    
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    if not _listeners:
+        atexit.register(_stop_listeners)
+    _listeners[logger_name] = listener
+    listener.start()
+
     # Add handler to the logger
-    logger.addHandler(handler)
+    logger.addHandler(RichQueueHandler(log_queue))
     logger.propagate = False
     return logger
 
 def log_ws_event(logger, direction, event):
     """
     Log WebSocket events with appropriate emojis and styles.
-    
+
+    High-frequency audio events are sampled: at most one line per type and direction
+    every HIGH_FREQUENCY_LOG_INTERVAL_SECONDS, with the number of events it stands for.
+
     Args:
         logger (logging.Logger): The logger instance.
         direction (str): "Incoming" or "Outgoing".
@@ -38,45 +141,18 @@ def log_ws_event(logger, direction, event):
     """
     if not logger.isEnabledFor(logging.DEBUG):
         return
-        
+
     event_type = event.get("type", "Unknown")
-    event_emojis = {
-        "session.update": "🛠️",
-        "session.created": "🔌",
-        "session.updated": "🔄",
-        "input_audio_buffer.append": "🎤",
-        "input_audio_buffer.commit": "✅",
-        "input_audio_buffer.speech_started": "🗣️",
-        "input_audio_buffer.speech_stopped": "🤫",
-        "input_audio_buffer.cleared": "🧹",
-        "input_audio_buffer.committed": "📨",
-        "conversation.item.create": "📥",
-        "conversation.item.delete": "🗑️",
-        "conversation.item.truncate": "✂️",
-        "conversation.item.created": "📤",
-        "conversation.item.deleted": "🗑️",
-        "conversation.item.truncated": "✂️",
-        "response.create": "➡️",
-        "response.created": "📝",
-        "response.output_item.added": "➕",
-        "response.output_item.done": "✅",
-        "response.text.delta": "✍️",
-        "response.text.done": "📝",
-        "response.audio.delta": "🔊",
-        "response.audio.done": "🔇",
-        "response.done": "✔️",
-        "response.cancel": "⛔",
-        "response.function_call_arguments.delta": "📥",
-        "response.function_call_arguments.done": "📥",
-        "rate_limits.updated": "⏳",
-        "error": "❌",
-        "conversation.item.input_audio_transcription.completed": "📝",
-        "conversation.item.input_audio_transcription.failed": "⚠️",
-    }
-    emoji = event_emojis.get(event_type, "❓")
+    suffix = ""
+    if event_type in HIGH_FREQUENCY_EVENT_TYPES:
+        count = ws_event_sampler.sample((direction, event_type))
+        if not count:
+            return
+        suffix = f" (x{count})" if count > 1 else ""
+    emoji = EVENT_EMOJIS.get(event_type, "❓")
     icon = "⬆️ - Out" if direction == "Outgoing" else "⬇️ - In"
     style = "bold cyan" if direction == "Outgoing" else "bold green"
-    logger.info(Text(f"{emoji} {icon} {event_type}", style=style))
+    logger.info(Text(f"{emoji} {icon} {event_type}{suffix}", style=style))
 
 def log_tool_call(logger, function_name, args, result):
     if logger.isEnabledFor(logging.DEBUG):
@@ -94,3 +170,7 @@ def log_info(logger, message, style="bold white"):
 def log_warning(logger, message):
     if logger.isEnabledFor(logging.WARNING):
         logger.warning(Text(message, style="bold yellow"))
+
+
+# Shared logger for the realtime API entry points
+logger = setup_logging("realtime_api")
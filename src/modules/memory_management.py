@@ -3,6 +3,7 @@ import os
 from typing import Any, Dict, Optional, List
 import xml.etree.ElementTree as ET
 from . import utils
+from .session_context import current_memory_manager
 
 
 class MemoryManager:
@@ -79,9 +80,22 @@ class MemoryManager:
 
 # create yaml, sqlite/duckdb memory managers
 
-# Initialize the MemoryManager
+# Initialize the MemoryManager; the file is created on the first write, not at import
 memory_file = os.getenv("ACTIVE_MEMORY_FILE", "./active_memory.json")
-if not os.path.exists(memory_file):
-    with open(memory_file, "w") as f:
-        json.dump({}, f)
-memory_manager = MemoryManager(memory_file)
+default_memory_manager = MemoryManager(memory_file)
+
+
+class SessionMemoryManager:
+    """
+    Forwards to the active session's MemoryManager, or the default one outside a session.
+
+    Lets tools keep using the module-level `memory_manager` while each realtime session
+    reads and writes its own memory namespace.
+    """
+
+    def __getattr__(self, name):
+        manager = current_memory_manager.get() or default_memory_manager
+        return getattr(manager, name)
+
+
+memory_manager = SessionMemoryManager()
@@ -1,22 +1,27 @@
 # mermaid.py
+from __future__ import annotations
 
 import os
 import base64
-import requests
-from PIL import Image, UnidentifiedImageError
 import io
 from typing import Optional, List
 from pydantic import BaseModel
 from dotenv import load_dotenv
-import openai
+
+from .lazy import lazy_import
 
 from .memory_management import memory_manager
+from .session_context import get_scratch_pad_dir
 
 from .llm import (
     parse_markdown_backticks,
     structured_output_prompt,
 )
 
+# Imported on the first diagram request
+requests = lazy_import("requests")
+Image = lazy_import("PIL.Image")
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -28,7 +33,7 @@ class MermaidResponse(BaseModel):
 
 # Helper functions
 def build_file_path(name: str):
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    scratch_pad_dir = get_scratch_pad_dir()
     os.makedirs(scratch_pad_dir, exist_ok=True)
     return os.path.join(scratch_pad_dir, name)
 
@@ -44,7 +49,7 @@ def build_image(graph: str, filename: str) -> Optional[Image.Image]:
     try:
         img = Image.open(io.BytesIO(response.content))
         return img
-    except UnidentifiedImageError:
+    except Image.UnidentifiedImageError:
         print(
             f"Error: Unable to generate image for '{filename}'. \nContent is {response.content}"
         )
@@ -64,11 +69,12 @@ def mm(graph: str, filename: str) -> Optional[Image.Image]:
 # Main function to generate diagrams
 async def generate_diagram(prompt: str, version_count: int = 1) -> dict:
     """
-    Generates diagrams based on the prompt, producing multiple versions.
+    Generates mermaid diagrams based on the user's prompt.
 
     Args:
-        prompt (str): The prompt describing the diagram to generate.
-        version_count (int): The number of versions to generate.
+        prompt (str): The user's prompt describing the diagram to generate.
+        version_count (int): The total number of diagram versions to generate. Defaults to 1
+            if not specified.
 
     Returns:
         dict: A dictionary containing information about the generated diagrams.
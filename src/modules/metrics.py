@@ -0,0 +1,156 @@
+import atexit
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Pending records kept in memory between flushes; the oldest are dropped when full
+RING_BUFFER_CAPACITY = 10000
+
+# Seconds between background flushes to the exporters
+FLUSH_INTERVAL_SECONDS = 2.0
+
+# Recent durations kept per name for percentile estimates
+HISTOGRAM_WINDOW = 2048
+
+logger = logging.getLogger("metrics")
+
+
+class JsonlExporter:
+    """Appends records to a JSON Lines file, one open/close per batch."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def export(self, records: List[dict]):
+        with open(self.file_path, "a") as file:
+            for record in records:
+                json.dump(record, file)
+                file.write("\n")
+
+
+class DurationStats:
+    def __init__(self, window: int = HISTOGRAM_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        self.recent.append(duration)
+
+    def percentile(self, percent: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 4) if self.count else 0.0,
+            "min": round(self.min, 4) if self.count else 0.0,
+            "max": round(self.max, 4),
+            "p50": round(self.percentile(50), 4),
+            "p95": round(self.percentile(95), 4),
+            "p99": round(self.percentile(99), 4),
+        }
+
+
+class MetricsRecorder:
+    """
+    Collects duration metrics without doing I/O on the caller's thread.
+
+    `record` only appends to an in-memory ring buffer and updates per-name counters and
+    histograms. A daemon thread periodically hands the buffered records to the exporters
+    in batches, and a final flush runs at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        exporters: Optional[list] = None,
+        capacity: int = RING_BUFFER_CAPACITY,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+    ):
+        self.exporters = exporters if exporters is not None else []
+        self.flush_interval = flush_interval
+        self.pending = deque(maxlen=capacity)
+        self.dropped_records = 0
+        self.stats: Dict[str, DurationStats] = {}
+        self.lock = threading.Lock()
+        # Serializes exports so the exit flush never interleaves with the background one
+        self.export_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.flusher: Optional[threading.Thread] = None
+
+    def record(self, name: str, duration: float):
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "function": name,
+            "duration": f"{duration:.4f}",
+        }
+        with self.lock:
+            self.stats.setdefault(name, DurationStats()).add(duration)
+        self.emit(record)
+        logger.debug(f"⏰ {name}() took {duration:.4f} seconds")
+
+    def emit(self, record: dict):
+        """Queues an arbitrary record for the exporters."""
+        with self.lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped_records += 1
+            self.pending.append(record)
+        self._ensure_flusher()
+
+    def summary(self, name: Optional[str] = None) -> dict:
+        """Returns count, mean, min, max and p50/p95/p99 per name, or for a single name."""
+        with self.lock:
+            if name is not None:
+                stats = self.stats.get(name)
+                return stats.summary() if stats else {}
+            return {key: stats.summary() for key, stats in self.stats.items()}
+
+    def flush(self):
+        with self.export_lock:
+            with self.lock:
+                batch = list(self.pending)
+                self.pending.clear()
+            if not batch:
+                return
+            for exporter in self.exporters:
+                try:
+                    exporter.export(batch)
+                except Exception as e:
+                    logger.warning(f"Metrics exporter {type(exporter).__name__} failed: {str(e)}")
+
+    def _ensure_flusher(self):
+        if self.flusher is not None:
+            return
+        with self.lock:
+            if self.flusher is not None:
+                return
+            self.flusher = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+            self.flusher.start()
+        atexit.register(self.close)
+
+    def _flush_loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self.stop_event.set()
+        self.flush()
+
+
+RUN_TIME_TABLE_LOG_JSON = "runtime_time_table.jsonl"
+
+# Shared recorder; the JSONL runtime table is its default exporter
+metrics = MetricsRecorder(exporters=[JsonlExporter(RUN_TIME_TABLE_LOG_JSON)])
@@ -0,0 +1,40 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class FileEdit(BaseModel):
+    search: str
+    replace: str
+
+
+class FilePatchResponse(BaseModel):
+    edits: List[FileEdit]
+
+
+class PatchError(ValueError):
+    """Raised when an edit cannot be applied unambiguously."""
+
+
+def apply_edits(content: str, edits: List[FileEdit]) -> str:
+    """
+    Applies search/replace edits to a file's content, in order.
+
+    Each edit's `search` text must occur exactly once in the content as left by the
+    previous edits, so an edit never lands somewhere the model did not intend.
+
+    Raises:
+        PatchError: If there are no edits, or a search text is empty, missing or ambiguous.
+    """
+    if not edits:
+        raise PatchError("The patch contains no edits.")
+    for index, edit in enumerate(edits):
+        if not edit.search:
+            raise PatchError(f"Edit {index} has an empty search text.")
+        occurrences = content.count(edit.search)
+        if occurrences == 0:
+            raise PatchError(f"Edit {index}: search text not found.")
+        if occurrences > 1:
+            raise PatchError(f"Edit {index}: search text occurs {occurrences} times.")
+        content = content.replace(edit.search, edit.replace, 1)
+    return content
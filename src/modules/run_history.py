@@ -0,0 +1,123 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import List, Optional
+
+from .execution import RunResult, PROMPT_OUTPUT_CHARS
+
+RUN_HISTORY_DIR_NAME = ".run_history"
+
+
+class RunHistory:
+    """
+    Stores script runs so earlier outputs can be looked up without re-running the script.
+
+    Each run's stdout and stderr are written to separate files under `root_dir/<run_id>/`,
+    and a SQLite index records the run metadata for lookup by run id or file name.
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self.index_path = os.path.join(root_dir, "index.db")
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(self.root_dir, exist_ok=True)
+        connection = sqlite3.connect(self.index_path)
+        connection.row_factory = sqlite3.Row
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                file_name TEXT,
+                started_at TEXT NOT NULL,
+                exit_code INTEGER,
+                timed_out INTEGER NOT NULL,
+                wall_time REAL NOT NULL,
+                cpu_time REAL,
+                peak_rss_bytes INTEGER,
+                stdout_path TEXT NOT NULL,
+                stderr_path TEXT NOT NULL
+            )
+            """
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS runs_by_file ON runs (file_name, started_at)")
+        return connection
+
+    def record(self, result: RunResult, file_name: Optional[str] = None) -> dict:
+        """
+        Saves a run's output files and indexes its metadata.
+
+        Returns:
+            dict: The indexed entry.
+        """
+        run_dir = os.path.join(self.root_dir, result.run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        stdout_path = os.path.join(run_dir, "stdout.txt")
+        stderr_path = os.path.join(run_dir, "stderr.txt")
+        with open(stdout_path, "w") as f:
+            f.write(result.stdout)
+        with open(stderr_path, "w") as f:
+            f.write(result.stderr)
+
+        entry = {
+            "run_id": result.run_id,
+            "file_name": file_name,
+            "started_at": datetime.now().isoformat(),
+            "exit_code": result.exit_code,
+            "timed_out": int(result.timed_out),
+            "wall_time": result.wall_time,
+            "cpu_time": result.cpu_time,
+            "peak_rss_bytes": result.peak_rss_bytes,
+            "stdout_path": stdout_path,
+            "stderr_path": stderr_path,
+        }
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    f"INSERT OR REPLACE INTO runs ({', '.join(entry)}) VALUES ({', '.join('?' for _ in entry)})",
+                    tuple(entry.values()),
+                )
+        finally:
+            connection.close()
+        return entry
+
+    def get(self, run_id: str) -> Optional[dict]:
+        connection = self._connect()
+        try:
+            row = connection.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        finally:
+            connection.close()
+        return dict(row) if row else None
+
+    def list_runs(self, file_name: Optional[str] = None, limit: int = 10) -> List[dict]:
+        """Returns the most recent runs, newest first, optionally for one file."""
+        connection = self._connect()
+        try:
+            if file_name:
+                rows = connection.execute(
+                    "SELECT * FROM runs WHERE file_name = ? ORDER BY started_at DESC LIMIT ?",
+                    (file_name, limit),
+                ).fetchall()
+            else:
+                rows = connection.execute(
+                    "SELECT * FROM runs ORDER BY started_at DESC LIMIT ?", (limit,)
+                ).fetchall()
+        finally:
+            connection.close()
+        return [dict(row) for row in rows]
+
+    def read_output(self, entry: dict, stream: str, max_chars: int = PROMPT_OUTPUT_CHARS) -> str:
+        """Reads a stored stream ("stdout" or "stderr") of a run, trimmed to its tail."""
+        path = entry[f"{stream}_path"]
+        if not os.path.exists(path):
+            return ""
+        with open(path, "r") as f:
+            text = f.read()
+        if len(text) > max_chars:
+            return f"[... {len(text) - max_chars} characters omitted ...]\n{text[-max_chars:]}"
+        return text
+
+
+def get_run_history(scratch_pad_dir: str) -> RunHistory:
+    return RunHistory(os.path.join(scratch_pad_dir, RUN_HISTORY_DIR_NAME))
@@ -0,0 +1,234 @@
+import asyncio
+import csv
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+SCRATCH_PAD_CATALOG_FILE = os.getenv("SCRATCH_PAD_CATALOG_FILE", "./scratch_pad_catalog.sqlite")
+
+# Bytes read from the start of a file for its first lines, CSV header and text/binary check
+HEAD_BYTES = 4096
+FIRST_LINES = 3
+# First lines are cut to this many characters in listings
+LISTING_LINE_CHARS = 80
+
+HASH_BLOCK_BYTES = 1024 * 1024
+
+# Larger files are hashed on first request (see ScratchPadCatalog.sha256) instead of when scanned
+HASH_MAX_BYTES = int(os.getenv("SCRATCH_PAD_CATALOG_HASH_MAX_BYTES", str(16 * 1024 * 1024)))
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def describe_file(path: str, size: int) -> dict:
+    """
+    Reads the metadata of one file: its kind, first lines, CSV columns and, unless it is
+    larger than HASH_MAX_BYTES, its hash.
+    """
+    with open(path, "rb") as f:
+        head = f.read(HEAD_BYTES)
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    is_binary = b"\0" in head
+    first_lines = ""
+    columns = None
+    if not is_binary:
+        text = head.decode("utf-8", errors="replace")
+        lines = text.splitlines()
+        # The last line may be cut off by HEAD_BYTES
+        if len(head) == HEAD_BYTES and len(lines) > 1:
+            lines = lines[:-1]
+        first_lines = "\n".join(lines[:FIRST_LINES])
+        if extension == "csv" and lines:
+            columns = ", ".join(next(csv.reader([lines[0]]), []))
+    return {
+        "kind": "binary" if is_binary else (extension or "text"),
+        "sha256": file_sha256(path) if size <= HASH_MAX_BYTES else None,
+        "first_lines": first_lines,
+        "csv_columns": columns,
+    }
+
+
+def format_listing(files: List[dict]) -> str:
+    """
+    A compact listing of catalog entries for prompts, one file per line, e.g.
+    `sales.csv (12.3 KB, modified 2024-10-02 14:05, columns: region, total)`.
+    """
+    lines = []
+    for file in files:
+        modified = datetime.fromtimestamp(file["mtime_ns"] / 1e9).strftime("%Y-%m-%d %H:%M")
+        details = [format_size(file["size"]), f"modified {modified}"]
+        if file["kind"] == "binary":
+            details.append("binary")
+        if file["csv_columns"]:
+            details.append(f"columns: {file['csv_columns']}")
+        elif file["first_lines"]:
+            first_line = file["first_lines"].split("\n", 1)[0].strip()[:LISTING_LINE_CHARS]
+            if first_line:
+                details.append(f"starts: {first_line}")
+        lines.append(f"{file['name']} ({', '.join(details)})")
+    return "\n".join(lines)
+
+
+class ScratchPadCatalog:
+    """
+    SQLite index of the files in scratch pad directories.
+
+    Each `refresh` is a stat scan: files whose size or mtime changed are described again
+    (kind, hash, first lines, CSV columns) and removed files are dropped, so unchanged
+    files are never read twice. Files larger than HASH_MAX_BYTES are hashed on request.
+    Tools list and filter files from the index with `scan`, e.g. to give file selection
+    prompts a compact listing (`format_listing`) with sizes, dates and columns.
+    """
+
+    def __init__(self, file_path: str = SCRATCH_PAD_CATALOG_FILE):
+        self.file_path = file_path
+        self.connection: Optional[sqlite3.Connection] = None
+        # Tools run on the event loop and in worker threads
+        self.lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+            self.connection = sqlite3.connect(self.file_path, check_same_thread=False, isolation_level=None)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    directory TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    sha256 TEXT,
+                    first_lines TEXT NOT NULL,
+                    csv_columns TEXT,
+                    PRIMARY KEY (directory, name)
+                )
+                """
+            )
+        return self.connection
+
+    def refresh(self, directory: str):
+        """
+        Brings the index of `directory` up to date with a stat scan.
+
+        Blocks while new or changed files are read; use `scan` from the event loop.
+        """
+        directory = os.path.abspath(directory)
+        os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            indexed = {
+                row["name"]: (row["size"], row["mtime_ns"])
+                for row in self.connect().execute("SELECT name, size, mtime_ns FROM files WHERE directory = ?", (directory,))
+            }
+        # Files are read without holding the lock, so other sessions' listings are not held up
+        seen = set()
+        changed = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                seen.add(entry.name)
+                stat = entry.stat()
+                if indexed.get(entry.name) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                try:
+                    metadata = describe_file(entry.path, stat.st_size)
+                except OSError as e:
+                    logging.warning(f"Could not index {entry.path}: {e}")
+                    continue
+                changed.append(
+                    (
+                        directory,
+                        entry.name,
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                        metadata["kind"],
+                        metadata["sha256"],
+                        metadata["first_lines"],
+                        metadata["csv_columns"],
+                    )
+                )
+        removed = [(directory, name) for name in indexed if name not in seen]
+        if not changed and not removed:
+            return
+        with self.lock:
+            connection = self.connect()
+            connection.executemany(
+                "INSERT OR REPLACE INTO files (directory, name, size, mtime_ns, kind, sha256, first_lines, csv_columns) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                changed,
+            )
+            connection.executemany("DELETE FROM files WHERE directory = ? AND name = ?", removed)
+
+    def files(self, directory: str, extensions: Optional[Iterable[str]] = None) -> List[dict]:
+        """
+        Returns the metadata of the files in `directory`, sorted by name.
+
+        Args:
+            directory (str): The scratch pad directory.
+            extensions (Optional[Iterable[str]]): Only files with these extensions, e.g. [".csv"].
+        """
+        self.refresh(directory)
+        extensions = tuple(extension.lower() for extension in extensions) if extensions else None
+        with self.lock:
+            rows = self.connect().execute(
+                "SELECT * FROM files WHERE directory = ? ORDER BY name", (os.path.abspath(directory),)
+            ).fetchall()
+        files = [dict(row) for row in rows]
+        if extensions:
+            files = [file for file in files if file["name"].lower().endswith(extensions)]
+        return files
+
+    async def scan(self, directory: str, extensions: Optional[Iterable[str]] = None) -> List[dict]:
+        """`files` in a worker thread, so reading new or changed files does not block the event loop."""
+        return await asyncio.to_thread(self.files, directory, extensions)
+
+    def sha256(self, directory: str, name: str) -> Optional[str]:
+        """Returns a file's hash, computing and storing it if the scan skipped it."""
+        directory = os.path.abspath(directory)
+        with self.lock:
+            row = self.connect().execute(
+                "SELECT size, mtime_ns, sha256 FROM files WHERE directory = ? AND name = ?", (directory, name)
+            ).fetchone()
+        if row is None:
+            return None
+        if row["sha256"] is not None:
+            return row["sha256"]
+        digest = file_sha256(os.path.join(directory, name))
+        with self.lock:
+            # Only if the file was not changed (and re-indexed) meanwhile
+            self.connect().execute(
+                "UPDATE files SET sha256 = ? WHERE directory = ? AND name = ? AND size = ? AND mtime_ns = ?",
+                (digest, directory, name, row["size"], row["mtime_ns"]),
+            )
+        return digest
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+# Shared catalog; the database is opened on the first listing
+scratch_pad_catalog = ScratchPadCatalog()
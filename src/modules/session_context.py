@@ -0,0 +1,29 @@
+import os
+from contextvars import ContextVar
+from typing import Any, Optional
+
+# Set per assistant session (e.g. one gRPC stream); asyncio tasks and to_thread calls inherit them
+current_session_id: ContextVar[Optional[str]] = ContextVar("current_session_id", default=None)
+current_scratch_pad_dir: ContextVar[Optional[str]] = ContextVar("current_scratch_pad_dir", default=None)
+current_memory_manager: ContextVar[Optional[Any]] = ContextVar("current_memory_manager", default=None)
+
+# Set while a tool runs, so work it triggers (e.g. LLM calls) can be attributed to it
+current_tool_name: ContextVar[Optional[str]] = ContextVar("current_tool_name", default=None)
+
+
+def get_scratch_pad_dir() -> str:
+    """Returns the active session's scratch pad, or SCRATCH_PAD_DIR outside a session."""
+    return current_scratch_pad_dir.get() or os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+
+
+def bind_session(session_id: str, scratch_pad_dir: str, memory_manager=None):
+    """
+    Binds session state to the current context.
+
+    Call inside the context the session's tasks are created from (e.g. via
+    `contextvars.copy_context().run`), so tools running for the session resolve its
+    scratch pad and memory instead of the process-wide ones.
+    """
+    current_session_id.set(session_id)
+    current_scratch_pad_dir.set(scratch_pad_dir)
+    current_memory_manager.set(memory_manager)
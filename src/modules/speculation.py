@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from .session_context import current_tool_name
+
+# String fields whose closing quote has arrived, e.g. `"prompt": "update the` does not match yet
+COMPLETE_STRING_FIELD_PATTERN = re.compile(r'"(\w+)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+# Speculative results kept at once; the oldest unclaimed ones are cancelled first
+SPECULATION_MAX_ENTRIES = 32
+
+
+def complete_string_fields(partial_arguments: str) -> Dict[str, str]:
+    """
+    Returns the string fields of a partially streamed JSON arguments object that are complete.
+
+    Tool arguments are flat objects, so fields are matched at the top level only.
+    """
+    fields = {}
+    for match in COMPLETE_STRING_FIELD_PATTERN.finditer(partial_arguments):
+        try:
+            fields[match.group(1)] = json.loads(f'"{match.group(2)}"')
+        except json.JSONDecodeError:
+            continue
+    return fields
+
+
+class SpeculationCache:
+    """
+    Work started before it is known to be needed, keyed by everything its result depends on.
+
+    `start` launches a task for a key; `result` claims it, awaiting the task if it is still
+    running, or runs the work itself when nothing was started (or the speculation failed).
+    Each result is claimed at most once, so a stale one is never reused for a later call.
+    """
+
+    def __init__(self, max_entries: int = SPECULATION_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.tasks: "OrderedDict[Hashable, asyncio.Task]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, key: Hashable, factory: Callable[[], Awaitable[Any]]):
+        if key in self.tasks:
+            return
+        self.tasks[key] = asyncio.ensure_future(factory())
+        while len(self.tasks) > self.max_entries:
+            _, task = self.tasks.popitem(last=False)
+            task.cancel()
+
+    async def result(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self.tasks.pop(key, None)
+        if task is not None and not task.cancelled():
+            try:
+                result = await task
+                self.hits += 1
+                return result
+            except Exception as e:
+                logging.warning(f"Speculative work failed ({e}); running it again.")
+        self.misses += 1
+        return await factory()
+
+    def discard(self, keys: List[Hashable]):
+        for key in keys:
+            task = self.tasks.pop(key, None)
+            if task is not None and not task.done():
+                task.cancel()
+
+
+class ArgumentSpeculator:
+    """
+    Starts a tool's speculative work while the model is still streaming the call's arguments.
+
+    Tools opt in with a `speculate` hook (see ToolRegistry.register). It is called with the
+    complete string fields streamed so far until it returns the keys of the work it started.
+    When the final arguments arrive, work started from fields that changed is cancelled.
+    """
+
+    def __init__(self, registry, cache: "SpeculationCache"):
+        self.registry = registry
+        self.cache = cache
+        self.calls: Dict[str, dict] = {}
+
+    def on_call_started(self, call_id: str, name: str):
+        spec = self.registry.get(name)
+        if spec is None or spec.speculate is None:
+            return
+        self.calls[call_id] = {"spec": spec, "arguments": "", "speculated": None, "keys": []}
+
+    def on_arguments_delta(self, call_id: str, delta: str) -> bool:
+        """Adds streamed arguments; returns True when speculative work was started."""
+        call = self.calls.get(call_id)
+        if call is None or call["speculated"] is not None:
+            return False
+        call["arguments"] += delta
+        arguments = complete_string_fields(call["arguments"])
+        if not arguments:
+            return False
+        spec = call["spec"]
+        # Attribute the speculative LLM calls to the tool that will use them
+        token = current_tool_name.set(spec.name)
+        try:
+            keys = spec.speculate(arguments)
+        except Exception as e:
+            logging.warning(f"Speculation for '{spec.name}' failed: {e}")
+            keys = []
+        finally:
+            current_tool_name.reset(token)
+        if keys is None:
+            return False
+        call["speculated"] = arguments
+        call["keys"] = keys
+        return bool(keys)
+
+    def on_arguments_done(self, call_id: str, arguments: dict) -> Optional[bool]:
+        """
+        Checks the speculation against the final arguments.
+
+        Returns:
+            Optional[bool]: Whether the speculative work still applies, or None if none was started.
+        """
+        call = self.calls.pop(call_id, None)
+        if call is None or not call["keys"]:
+            return None
+        if any(arguments.get(name) != value for name, value in call["speculated"].items()):
+            self.cache.discard(call["keys"])
+            logging.info(f"Discarded speculative work for '{call['spec'].name}': arguments changed")
+            return False
+        return True
+
+    def clear(self):
+        for call in self.calls.values():
+            self.cache.discard(call["keys"])
+        self.calls.clear()
+
+
+# Shared cache; keys include the session's scratch pad, so sessions never share results
+speculation_cache = SpeculationCache()
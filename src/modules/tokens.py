@@ -0,0 +1,235 @@
+import functools
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+from .lazy import lazy_import
+from .metrics import JsonlExporter, MetricsRecorder
+from .session_context import current_tool_name
+
+tiktoken = lazy_import("tiktoken")
+
+# Encoding of the gpt-4o family, used for models tiktoken does not know
+DEFAULT_ENCODING = "o200k_base"
+
+# Rough characters per token, used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# Tokens the chat format adds per message, and to prime the reply
+MESSAGE_OVERHEAD_TOKENS = 3
+REPLY_PRIMING_TOKENS = 3
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model: Optional[str] = None):
+    """
+    Returns the tiktoken encoding for a model, or None when no tokenizer is available.
+
+    tiktoken downloads its vocabularies on first use, so this also returns None offline.
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding(DEFAULT_ENCODING)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logging.warning(f"No tokenizer available ({e}); estimating tokens from characters.")
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """Counts the tokens of `text`, estimating from its length without a tokenizer."""
+    if not text:
+        return 0
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message: dict, model: Optional[str] = None) -> int:
+    """Counts the tokens a chat message adds to a request, including its tool calls."""
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content") or "", model)
+    for tool_call in message.get("tool_calls") or []:
+        tokens += count_tokens(json.dumps(tool_call["function"]), model)
+    return tokens
+
+
+def count_messages_tokens(messages: List[dict], model: Optional[str] = None) -> int:
+    """Counts the prompt tokens of a chat request's messages."""
+    return sum(count_message_tokens(message, model) for message in messages) + REPLY_PRIMING_TOKENS
+
+
+# Top-level XML-style sections of tool prompts, e.g. <file-content>...</file-content> or <memory>
+PROMPT_SECTION_PATTERN = re.compile(r"<([A-Za-z][\w-]*)>(.*?)</\1>", re.S)
+
+# Prompt tokens outside any section: instructions, separators and chat formatting
+OTHER_SECTION = "other"
+
+TOKEN_USAGE_LOG_JSON = "token_usage.jsonl"
+
+
+def count_prompt_sections(messages: List[dict], model: Optional[str] = None) -> Dict[str, int]:
+    """
+    Splits a request's prompt tokens by the top-level XML sections of its messages.
+
+    Tool prompts wrap their inputs in tags such as <memory>, <file-content> and
+    <table_definitions>, so this attributes tokens to memory, file content, table DDL etc.
+    without changing the prompts. Underscores in tag names are treated as dashes.
+    """
+    sections: Dict[str, int] = {}
+    total = count_messages_tokens(messages, model)
+    for message in messages:
+        for match in PROMPT_SECTION_PATTERN.finditer(message.get("content") or ""):
+            name = match.group(1).replace("_", "-")
+            sections[name] = sections.get(name, 0) + count_tokens(match.group(2), model)
+    sections[OTHER_SECTION] = max(total - sum(sections.values()), 0)
+    return sections
+
+
+class TokenStats:
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        # Output tokens avoided by cheaper request shapes, e.g. patches instead of whole files
+        self.saved_completion_tokens = 0
+        self.sections: Dict[str, int] = {}
+
+    def add(self, prompt_tokens: int, completion_tokens: int, sections: Dict[str, int]):
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        for name, tokens in sections.items():
+            self.sections[name] = self.sections.get(name, 0) + tokens
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "saved_completion_tokens": self.saved_completion_tokens,
+            "sections": dict(sorted(self.sections.items(), key=lambda item: -item[1])),
+        }
+
+
+class TokenUsageRecorder:
+    """
+    Records the token usage of LLM calls, attributed to the tool that made them.
+
+    Each call is counted locally, split by prompt section, and combined with the usage
+    the API reports. Records are exported through a MetricsRecorder, so writing them
+    never blocks the caller, and totals are kept per call site for `summary`.
+    """
+
+    def __init__(self, recorder: MetricsRecorder):
+        self.recorder = recorder
+        self.stats: Dict[str, TokenStats] = {}
+        self.lock = threading.Lock()
+
+    def record(
+        self,
+        model: str,
+        messages: List[dict],
+        usage=None,
+        duration: Optional[float] = None,
+        call_site: Optional[str] = None,
+    ) -> dict:
+        """
+        Records one LLM call.
+
+        Args:
+            model (str): The model the request was sent to.
+            messages (List[dict]): The request's chat messages.
+            usage: The response's `usage` object, if the API returned one.
+            duration (Optional[float]): Seconds the call took.
+            call_site (Optional[str]): Attribution; defaults to the running tool.
+
+        Returns:
+            dict: The exported record.
+        """
+        call_site = call_site or current_tool_name.get() or "unattributed"
+        sections = count_prompt_sections(messages, model)
+        estimated_prompt_tokens = sum(sections.values())
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "call_site": call_site,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "estimated_prompt_tokens": estimated_prompt_tokens,
+            "sections": sections,
+            "duration": round(duration, 4) if duration is not None else None,
+        }
+        with self.lock:
+            self.stats.setdefault(call_site, TokenStats()).add(
+                prompt_tokens if prompt_tokens is not None else estimated_prompt_tokens,
+                completion_tokens or 0,
+                sections,
+            )
+        self.recorder.emit(record)
+        return record
+
+    def record_savings(self, saved_completion_tokens: int, baseline_completion_tokens: int, call_site: Optional[str] = None) -> dict:
+        """
+        Records output tokens a call avoided compared to the request it replaced.
+
+        Args:
+            saved_completion_tokens (int): Baseline tokens minus the tokens actually generated;
+                negative when the cheaper request shape cost more.
+            baseline_completion_tokens (int): Estimated tokens of the replaced request's output.
+            call_site (Optional[str]): Attribution; defaults to the running tool.
+
+        Returns:
+            dict: The exported record.
+        """
+        call_site = call_site or current_tool_name.get() or "unattributed"
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "call_site": call_site,
+            "saved_completion_tokens": saved_completion_tokens,
+            "baseline_completion_tokens": baseline_completion_tokens,
+        }
+        with self.lock:
+            self.stats.setdefault(call_site, TokenStats()).saved_completion_tokens += saved_completion_tokens
+        self.recorder.emit(record)
+        return record
+
+    def summary(self) -> dict:
+        """Returns calls, prompt and completion tokens and section totals per call site, largest first."""
+        with self.lock:
+            ordered = sorted(self.stats.items(), key=lambda item: -item[1].prompt_tokens)
+            return {call_site: stats.summary() for call_site, stats in ordered}
+
+
+@contextmanager
+def track_llm_call(model: str, messages: List[dict], call_site: Optional[str] = None):
+    """
+    Times an LLM call and records its token usage on exit.
+
+    Usage:
+        with track_llm_call(model, messages) as call:
+            completion = client.chat.completions.create(model=model, messages=messages)
+            call.usage = completion.usage
+    """
+    call = SimpleNamespace(usage=None)
+    start_time = time.perf_counter()
+    try:
+        yield call
+    finally:
+        try:
+            token_usage.record(model, messages, call.usage, time.perf_counter() - start_time, call_site)
+        except Exception as e:
+            logging.warning(f"Failed to record token usage: {e}")
+
+
+# Shared recorder; records are appended to the token usage JSONL file
+token_usage = TokenUsageRecorder(MetricsRecorder(exporters=[JsonlExporter(TOKEN_USAGE_LOG_JSON)]))
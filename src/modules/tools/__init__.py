@@ -0,0 +1,12 @@
+from .registry import ToolConcurrency, ToolRegistry, ToolSpec, tool_registry
+
+
+def load_default_tools() -> ToolRegistry:
+    """Imports the built-in tool modules, which registers their tools, and returns the shared registry."""
+    from .base import tools  # noqa: F401
+    from .pulumi import pulumi  # noqa: F401
+
+    return tool_registry
+
+
+__all__ = ["ToolConcurrency", "ToolRegistry", "ToolSpec", "tool_registry", "load_default_tools"]
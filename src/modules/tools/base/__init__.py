@@ -1,4 +0,0 @@
-from .tools import function_map, tools
-
-# export the function_map and tools
-__all__ = ["self.function_map", "tools"]
\ No newline at end of file
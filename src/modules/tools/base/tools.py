@@ -5,34 +5,48 @@ import json
 import random
 import logging
 import subprocess
-import pyperclip
-import pandas as pd
 from pydantic import BaseModel
 from typing import Any, Dict, Tuple, List, Optional
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from ...lazy import lazy_import
 from ...llm import parse_markdown_backticks, structured_output_prompt, chat_prompt
 from ...memory_management import memory_manager
-from ...logging import log_info
+from ...session_context import get_scratch_pad_dir
+from ...logging import log_info, log_warning, logger
+from ... import utils
 from ...utils import (
     timeit_decorator,
     ModelName,
     model_name_to_id,
-    SESSION_INSTRUCTIONS,
-    personalization,
     scrap_url_clean,
-    run_uv_script,
 )
+from ...execution import run_python_code, run_uv_script_async, warm_script_environment
+from ...run_history import get_run_history
 from ...mermaid import generate_diagram
 from ...database import get_database_instance
+from ...file_reader import ChunkedFile, read_excerpt
+from ...patching import FilePatchResponse, apply_edits
+from ...scratch_pad_catalog import format_listing, scratch_pad_catalog
+from ...speculation import speculation_cache
+from ...tokens import count_tokens, token_usage
+from ..registry import ToolConcurrency, tool_registry
 import re
 
+# Heavy dependencies are imported on the first tool call that uses them
+pyperclip = lazy_import("pyperclip")
+pd = lazy_import("pandas")
 
+# Tools that wait on LLM calls are cancelled after this long
+LLM_TOOL_TIMEOUT_SECONDS = float(os.getenv("LLM_TOOL_TIMEOUT_SECONDS", "180"))
+
+
+@tool_registry.tool(concurrency=ToolConcurrency.shared)
 @timeit_decorator
 async def ingest_memory() -> dict:
     """
-    Returns the current memory content using memory_manager.
+    Returns the current content of the active memory.
     """
     memory_manager.load_memory()
     memory_content = memory_manager.get_xml_for_prompt(["*"])
@@ -43,14 +57,20 @@ async def ingest_memory() -> dict:
     }
 
 
+@tool_registry.tool(timeout=LLM_TOOL_TIMEOUT_SECONDS, concurrency=ToolConcurrency.shared)
 @timeit_decorator
 async def ingest_file(prompt: str) -> dict:
     """
     Selects a file based on the user's prompt, reads its content, and returns the file data.
+
+    Args:
+        prompt (str): The user's prompt describing which file to ingest.
     """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    scratch_pad_dir = get_scratch_pad_dir()
 
     # Step 1: Select the file based on the prompt
+    available_files = format_listing(await scratch_pad_catalog.scan(scratch_pad_dir))
+
     select_file_prompt = f"""
 <purpose>
     Select a file from the available files based on the user's prompt.
@@ -62,7 +82,7 @@ async def ingest_file(prompt: str) -> dict:
 </instructions>
 
 <available-files>
-    {", ".join(os.listdir(scratch_pad_dir))}
+{available_files}
 </available-files>
 
 <user-prompt>
@@ -92,10 +112,9 @@ async def ingest_file(prompt: str) -> dict:
             "success": False,
         }
 
-    # Read the file content
+    # Read the file content; large files are previewed and read further with read_file_chunk
     try:
-        with open(file_path, "r") as f:
-            file_content = f.read()
+        file_content, chunk_metadata = read_excerpt(file_path)
     except Exception as e:
         return {
             "ingested_content": None,
@@ -103,6 +122,14 @@ async def ingest_file(prompt: str) -> dict:
             "success": False,
         }
 
+    if chunk_metadata is not None:
+        return {
+            "ingested_content": file_content,
+            "message": "File is large; ingested a preview. Use read_file_chunk to read the omitted chunks.",
+            "success": True,
+            **chunk_metadata,
+        }
+
     return {
         "ingested_content": file_content,
         "message": "Successfully ingested content",
@@ -110,10 +137,15 @@ async def ingest_file(prompt: str) -> dict:
     }
 
 
+@tool_registry.tool()
 @timeit_decorator
 async def add_to_memory(key: str, value: Any) -> dict:
     """
-    Add a key-value pair to memory using the MemoryManager's upsert method.
+    Adds a key-value pair to memory.
+
+    Args:
+        key (str): The key to use for storing the value in memory.
+        value (Any): The value to store in memory.
     """
     success = memory_manager.upsert(key, value)
     if success:
@@ -128,11 +160,15 @@ async def add_to_memory(key: str, value: Any) -> dict:
         }
 
 
+@tool_registry.tool()
 @timeit_decorator
 async def reset_active_memory(force_delete: bool = False) -> dict:
     """
-    Reset the active memory to an empty dictionary.
-    If force_delete is False, ask for confirmation before resetting.
+    Resets the active memory to an empty dictionary.
+
+    Args:
+        force_delete (bool): Whether to force reset the memory without confirmation. Defaults to
+            false if not specified.
     """
     if not force_delete:
         return {
@@ -206,28 +242,113 @@ class PythonChartResponse(BaseModel):
     executable_python: str
 
 
+class FileSelectionRequest:
+    """
+    The fast-model call that picks the scratch pad file a prompt refers to.
+
+    The scratch pad is listed in a worker thread when the selection runs, so this can be
+    created on the event loop (e.g. by a speculate hook). A selection started speculatively
+    is reused for the same prompt only if the listing, with sizes and modification times,
+    has not changed since.
+    """
+
+    def __init__(self, prompt: str, action: str, response_format: type = FileSelectionResponse):
+        self.scratch_pad_dir = get_scratch_pad_dir()
+        self.user_prompt = prompt
+        self.action = action
+        self.response_format = response_format
+        self.key = ("select_file", self.scratch_pad_dir, action, response_format.__name__, prompt)
+
+    async def listing(self) -> str:
+        return format_listing(await scratch_pad_catalog.scan(self.scratch_pad_dir))
+
+    def build_prompt(self, available_files: str) -> str:
+        return f"""
+<purpose>
+    Select a file from the available files based on the user's prompt.
+</purpose>
+
+<instructions>
+    <instruction>Based on the user's prompt and the list of available files, infer which file the user wants to {self.action}.</instruction>
+    <instruction>If no file matches, return an empty string for 'file'.</instruction>
+</instructions>
+
+<available-files>
+{available_files}
+</available-files>
+
+<user-prompt>
+    {self.user_prompt}
+</user-prompt>
+"""
+
+    async def run(self) -> Tuple[str, BaseModel]:
+        """Selects the file; returns the listing it was selected from and the selection."""
+        available_files = await self.listing()
+        response = await asyncio.to_thread(
+            structured_output_prompt,
+            self.build_prompt(available_files),
+            self.response_format,
+            llm_model=model_name_to_id[ModelName.fast_model],
+        )
+        return available_files, response
+
+    async def result(self):
+        """The selection, reusing one started speculatively if the scratch pad is unchanged."""
+        speculated = self.key in speculation_cache.tasks
+        available_files, response = await speculation_cache.result(self.key, self.run)
+        # Files may have been added or changed while the arguments were still streaming
+        if speculated and available_files != await self.listing():
+            available_files, response = await self.run()
+        return response
+
+
+def speculate_file_selection(action: str, response_format: type = FileSelectionResponse):
+    """Returns a tool `speculate` hook that starts the file selection once the prompt has streamed."""
+
+    def speculate(arguments: Dict[str, str]) -> Optional[List[tuple]]:
+        if "prompt" not in arguments:
+            return None
+        if action == "discuss" and utils.personalization.get("focus_file"):
+            return []
+        request = FileSelectionRequest(arguments["prompt"], action, response_format)
+        speculation_cache.start(request.key, request.run)
+        return [request.key]
+
+    return speculate
+
+
+@tool_registry.tool(concurrency=ToolConcurrency.shared)
 @timeit_decorator
 async def get_current_time():
+    """
+    Returns the current time.
+    """
     return {"current_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 
 
+@tool_registry.tool(concurrency=ToolConcurrency.shared)
 @timeit_decorator
 async def get_random_number():
+    """
+    Returns a random number between 1 and 100.
+    """
     return {"random_number": random.randint(1, 100)}
 
 
+@tool_registry.tool(timeout=LLM_TOOL_TIMEOUT_SECONDS, concurrency=ToolConcurrency.shared)
 @timeit_decorator
 async def open_browser(prompt: str):
     """
-    Open a browser tab with the best-fitting URL based on the user's prompt.
+    Opens a browser tab with the best-fitting URL based on the user's prompt.
 
     Args:
         prompt (str): The user's prompt to determine which URL to open.
     """
-    # Use global 'personalization' variable
-    browser_urls = personalization.get("browser_urls", [])
+    # Personalization settings are read from the file on first use
+    browser_urls = utils.personalization.get("browser_urls", [])
     browser_urls_str = ", ".join(browser_urls)
-    browser_command = personalization.get("browser_command", "open -a 'Google Chrome'")
+    browser_command = utils.personalization.get("browser_command", "open -a 'Google Chrome'")
 
     # Build the structured prompt
     prompt_structure = f"""
@@ -249,12 +370,12 @@ async def open_browser(prompt: str):
 </user-prompt>
     """
 
-    log_info(f"📖 open_browser() Prompt: {prompt_structure}", style="bold magenta")
+    log_info(logger, f"📖 open_browser() Prompt: {prompt_structure}", style="bold magenta")
 
     # Call the LLM to select the best-fit URL
     response = structured_output_prompt(prompt_structure, WebUrl)
 
-    log_info(f"📖 open_browser() Response: {response}", style="bold cyan")
+    log_info(logger, f"📖 open_browser() Response: {response}", style="bold cyan")
 
     # Open the URL if it's not empty
     if response.url:
@@ -269,12 +390,17 @@ async def open_browser(prompt: str):
         return {"status": "No URL found"}
 
 
+@tool_registry.tool(timeout=LLM_TOOL_TIMEOUT_SECONDS)
 @timeit_decorator
 async def create_file(file_name: str, prompt: str) -> dict:
     """
-    Generate content for a new file based on the user's prompt and the file name.
+    Generates content for a new file based on the user's prompt and file name.
+
+    Args:
+        file_name (str): The name of the file to create.
+        prompt (str): The user's prompt to generate the file content.
     """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    scratch_pad_dir = get_scratch_pad_dir()
 
     # Ensure the scratch pad directory exists
     os.makedirs(scratch_pad_dir, exist_ok=True)
@@ -318,67 +444,75 @@ async def create_file(file_name: str, prompt: str) -> dict:
     response = structured_output_prompt(prompt_structure, CreateFileResponse)
 
     # Write the generated content to the file
+    file_content = parse_markdown_backticks(response.file_content)
     with open(file_path, "w") as f:
-        f.write(parse_markdown_backticks(response.file_content))
+        f.write(file_content)
+
+    # Scripts with inline dependencies get their environment prepared before they are run
+    if file_name.endswith(".py"):
+        warm_script_environment(file_content)
 
     return {"status": "file created", "file_name": response.file_name}
 
 
-@timeit_decorator
-async def update_file(prompt: str, model: ModelName = ModelName.base_model) -> dict:
+def patch_file(prompt: str, file_name: str, file_content: str, memory_content: str, model: ModelName) -> Optional[dict]:
     """
-    Update a file based on the user's prompt.
-    """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
-
-    # Ensure the scratch pad directory exists
-    os.makedirs(scratch_pad_dir, exist_ok=True)
+    Asks the model for search/replace edits to a file and applies them locally.
 
-    # List available files in SCRATCH_PAD_DIR
-    available_files = os.listdir(scratch_pad_dir)
-    available_files_str = ", ".join(available_files)
+    Output tokens scale with the size of the change instead of the size of the file. The
+    estimated tokens saved against regenerating the whole file are recorded per tool.
 
-    # Build the structured prompt to select the file
-    select_file_prompt = f"""
+    Returns:
+        Optional[dict]: The updated content and the update mode, or None if the model's
+        edits could not be obtained or applied, in which case the file should be regenerated.
+    """
+    patch_file_prompt = f"""
 <purpose>
-    Select a file from the available files based on the user's prompt.
+    Update the content of the file based on the user's prompt, the current file content, and the current memory content, as a list of search/replace edits.
 </purpose>
 
 <instructions>
-    <instruction>Based on the user's prompt and the list of available files, infer which file the user wants to update.</instruction>
-    <instruction>If no file matches, return an empty string for 'file'.</instruction>
+    <instruction>Based on the user's prompt, the current file content, and the current memory content, decide which parts of the file need to change.</instruction>
+    <instruction>The file-name is the name of the file to update.</instruction>
+    <instruction>Respond with a list of edits; each edit replaces its 'search' text with its 'replace' text.</instruction>
+    <instruction>Copy each 'search' text verbatim from the file content, including whitespace and indentation, with just enough surrounding lines that it occurs exactly once.</instruction>
+    <instruction>Edits are applied in order, each to the result of the previous ones, so they must not overlap.</instruction>
+    <instruction>To insert text, search for the neighbouring lines and repeat them in 'replace' together with the new text.</instruction>
+    <instruction>Consider the current memory content when generating the file updates, if relevant.</instruction>
+    <instruction>If code generation was requested, be sure the updated file is runnable code.</instruction>
 </instructions>
 
-<available-files>
-    {available_files_str}
-</available-files>
+<file-name>
+{file_name}
+</file-name>
+
+<file-content>
+{file_content}
+</file-content>
+
+{memory_content}
 
 <user-prompt>
     {prompt}
 </user-prompt>
 """
+    llm_model = model_name_to_id[model]
+    try:
+        patch = structured_output_prompt(patch_file_prompt, FilePatchResponse, llm_model=llm_model)
+        updated_content = apply_edits(file_content, patch.edits)
+    except Exception as e:
+        log_warning(logger, f"Could not patch {file_name} ({e}); regenerating the whole file.")
+        return None
 
-    # Call the LLM to select the file
-    file_selection_response = structured_output_prompt(
-        select_file_prompt,
-        FileSelectionResponse,
-        llm_model=model_name_to_id[ModelName.fast_model],
-    )
-
-    # Check if a file was selected
-    if not file_selection_response.file:
-        return {"status": "No matching file found"}
-
-    selected_file = file_selection_response.file
-    file_path = os.path.join(scratch_pad_dir, selected_file)
-
-    # Load the content of the selected file
-    with open(file_path, "r") as f:
-        file_content = f.read()
+    patch_tokens = count_tokens(patch.model_dump_json(), llm_model)
+    baseline_tokens = count_tokens(updated_content, llm_model)
+    token_usage.record_savings(baseline_tokens - patch_tokens, baseline_tokens)
+    log_info(logger, f"Patched {file_name} with {len(patch.edits)} edit(s), ~{baseline_tokens - patch_tokens} output tokens saved")
+    return {"content": updated_content, "mode": "patch"}
 
-    # Get all memory content
-    memory_content = memory_manager.get_xml_for_prompt(["*"])
 
+def regenerate_file(prompt: str, file_name: str, file_content: str, memory_content: str, model: ModelName) -> dict:
+    """Asks the model for the whole updated file."""
     # Build the structured prompt to generate the updates
     update_file_prompt = f"""
 <purpose>
@@ -397,7 +531,7 @@ async def update_file(prompt: str, model: ModelName = ModelName.base_model) -> d
 </instructions>
 
 <file-name>
-    {selected_file}
+    {file_name}
 </file-name>
 
 <file-content>
@@ -413,22 +547,68 @@ async def update_file(prompt: str, model: ModelName = ModelName.base_model) -> d
 
     # Call the LLM to generate the updates using the specified model
     file_update_response = chat_prompt(update_file_prompt, model_name_to_id[model])
+    return {"content": parse_markdown_backticks(file_update_response), "mode": "full"}
+
+
+@tool_registry.tool(timeout=LLM_TOOL_TIMEOUT_SECONDS, speculate=speculate_file_selection("update"))
+@timeit_decorator
+async def update_file(prompt: str, model: ModelName = ModelName.base_model) -> dict:
+    """
+    Updates a file based on the user's prompt.
+
+    Args:
+        prompt (str): The user's prompt describing the updates to the file.
+        model (ModelName): The model to use for updating the file content. Defaults to
+            'base_model' if not explicitly specified.
+    """
+    scratch_pad_dir = get_scratch_pad_dir()
+
+    # Select the file, reusing the selection started while the arguments streamed in
+    file_selection_response = await FileSelectionRequest(prompt, "update").result()
+
+    # Check if a file was selected
+    if not file_selection_response.file:
+        return {"status": "No matching file found"}
+
+    selected_file = file_selection_response.file
+    file_path = os.path.join(scratch_pad_dir, selected_file)
+
+    # Load the content of the selected file
+    with open(file_path, "r") as f:
+        file_content = f.read()
+
+    # Get all memory content
+    memory_content = memory_manager.get_xml_for_prompt(["*"])
+
+    # The LLM calls block, so they run in a worker thread
+    file_update = await asyncio.to_thread(patch_file, prompt, selected_file, file_content, memory_content, model)
+    if file_update is None:
+        file_update = await asyncio.to_thread(regenerate_file, prompt, selected_file, file_content, memory_content, model)
 
     # Apply the updates by writing the new content to the file
     with open(file_path, "w") as f:
-        f.write(parse_markdown_backticks(file_update_response))
+        f.write(file_update["content"])
+
+    # Scripts with inline dependencies get their environment prepared before they are run
+    if selected_file.endswith(".py"):
+        warm_script_environment(file_update["content"])
 
     return {
         "status": "File updated",
         "file_name": selected_file,
         "model_used": model,
+        "update_mode": file_update["mode"],
     }
 
 
+@tool_registry.tool()
 @timeit_decorator
 async def load_tables_into_memory() -> dict:
+    """
+    Loads table definitions from Database and saves them to active memory.
+    """
     # Step 1: Load sql_dialect from personalization.json
-    sql_dialect = personalization.get("sql_dialect")
+    sql_dialect = utils.personalization.get("sql_dialect")
     if not sql_dialect:
         return {"status": "error", "message": "No SQL dialect provided."}
 
@@ -469,10 +649,17 @@ async def load_tables_into_memory() -> dict:
     }
 
 
+@tool_registry.tool(timeout=LLM_TOOL_TIMEOUT_SECONDS)
 @timeit_decorator
 async def generate_sql_save_to_file(prompt: str) -> dict:
+    """
+    Generates an SQL query based on user's prompt and saves it to a file.
+
+    Args:
+        prompt (str): The user's prompt describing the SQL query to generate.
+    """
     # Step 1: Load sql_dialect from personalization.json
-    sql_dialect = personalization.get("sql_dialect")
+    sql_dialect = utils.personalization.get("sql_dialect")
     if not sql_dialect:
         return {"status": "error", "message": "No SQL dialect provided."}
 
@@ -550,7 +737,7 @@ async def generate_sql_save_to_file(prompt: str) -> dict:
     response = structured_output_prompt(prompt_structure, GenerateSQLResponse)
 
     # Step 7: Save the generated SQL to a file
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    scratch_pad_dir = get_scratch_pad_dir()
     os.makedirs(scratch_pad_dir, exist_ok=True)
     sql_file_path = os.path.join(scratch_pad_dir, response.file_name)
 
@@ -578,13 +765,18 @@ class GenerateSQLResponse(BaseModel):
     output_format: OutputFormat
 
 
+@tool_registry.tool()
 @timeit_decorator
 async def generate_sql_and_execute(prompt: str) -> dict:
     """
-    Generates an SQL query based on user's prompt, executes it, and saves the results to a file in the specified format.
+    Generates an SQL query based on the user's prompt, executes it, and saves the results to a
+    file in the specified format.
+
+    Args:
+        prompt (str): The user's prompt describing what SQL query to generate and execute.
     """
     # Step 1: Load sql_dialect from personalization.json
-    sql_dialect = personalization.get("sql_dialect")
+    sql_dialect = utils.personalization.get("sql_dialect")
     if not sql_dialect:
         return {"status": "error", "message": "No SQL dialect provided."}
 
@@ -657,7 +849,7 @@ async def generate_sql_and_execute(prompt: str) -> dict:
         return {"status": "error", "message": f"Failed to execute SQL query: {str(e)}"}
 
     # Step 8: Save the DataFrame to a file based on the output_format
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    scratch_pad_dir = get_scratch_pad_dir()
     os.makedirs(scratch_pad_dir, exist_ok=True)
     file_path = os.path.join(scratch_pad_dir, response.file_name)
 
@@ -682,13 +874,21 @@ async def generate_sql_and_execute(prompt: str) -> dict:
     }
 
 
+@tool_registry.tool()
 async def run_sql_file(prompt: str) -> dict:
     """
-    Executes an SQL file based on the user's prompt and saves the results to a file in the specified format.
+    Executes an SQL file based on the user's prompt and saves the results to a file in the
+    specified format (CSV, JSONL, or JSON array).
+
+    Args:
+        prompt (str): The user's prompt describing which SQL file to execute and optionally
+            specifying the output format.
     """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    scratch_pad_dir = get_scratch_pad_dir()
 
     # Step 1: Select the file based on the prompt
+    available_files = format_listing(await scratch_pad_catalog.scan(scratch_pad_dir, [".sql"]))
+
     select_file_prompt = f"""
 <purpose>
     Select an SQL file from the available files based on the user's prompt.
@@ -700,7 +900,7 @@ async def run_sql_file(prompt: str) -> dict:
 </instructions>
 
 <available-files>
-    {", ".join([f for f in os.listdir(scratch_pad_dir) if f.endswith('.sql')])}
+{available_files}
 </available-files>
 
 <user-prompt>
@@ -736,7 +936,7 @@ async def run_sql_file(prompt: str) -> dict:
         return {"status": "error", "message": f"Failed to read the file: {str(e)}"}
 
     # Step 3: Load sql_dialect from personalization.json
-    sql_dialect = personalization.get("sql_dialect")
+    sql_dialect = utils.personalization.get("sql_dialect")
     if not sql_dialect:
         return {"status": "error", "message": "No SQL dialect provided."}
 
@@ -792,6 +992,7 @@ async def run_sql_file(prompt: str) -> dict:
         output_format_prompt,
         OutputFormatResponse,
         llm_model=model_name_to_id[ModelName.fast_model],
+        cache=True,
     )
 
     # Step 9: Save the results to a file based on the output_format
@@ -821,19 +1022,21 @@ async def run_sql_file(prompt: str) -> dict:
     }
 
 
+@tool_registry.tool(timeout=LLM_TOOL_TIMEOUT_SECONDS)
 @timeit_decorator
 async def delete_file(prompt: str, force_delete: bool = False) -> dict:
     """
-    Delete a file based on the user's prompt.
-    """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    Deletes a file based on the user's prompt.
 
-    # Ensure the scratch pad directory exists
-    os.makedirs(scratch_pad_dir, exist_ok=True)
+    Args:
+        prompt (str): The user's prompt describing the file to delete.
+        force_delete (bool): Whether to force delete the file without confirmation. Default to
+            'false' if not specified.
+    """
+    scratch_pad_dir = get_scratch_pad_dir()
 
-    # List available files in SCRATCH_PAD_DIR
-    available_files = os.listdir(scratch_pad_dir)
-    available_files_str = ", ".join(available_files)
+    # List available files in SCRATCH_PAD_DIR, with their size, date and first line
+    available_files_str = format_listing(await scratch_pad_catalog.scan(scratch_pad_dir))
 
     # Build the structured prompt to select the file and determine 'force_delete' status
     select_file_prompt = f"""
@@ -885,58 +1088,41 @@ async def delete_file(prompt: str, force_delete: bool = False) -> dict:
     return result
 
 
+@tool_registry.tool(
+    timeout=LLM_TOOL_TIMEOUT_SECONDS,
+    concurrency=ToolConcurrency.shared,
+    speculate=speculate_file_selection("discuss", FileReadResponse),
+)
 @timeit_decorator
 async def discuss_file(prompt: str, model: ModelName = ModelName.base_model) -> dict:
     """
-    Discuss a file's content based on the user's prompt, considering the current memory content.
+    Discusses a file's content based on the user's prompt, considering the current memory
+    content.
+
+    Args:
+        prompt (str): The user's prompt, question, or statement describing what to discuss about
+            the file content.
+        model (ModelName): The model to use for discussing the file content. Defaults to
+            'base_model' if not explicitly specified.
     """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
-    focus_file = personalization.get("focus_file")
+    scratch_pad_dir = get_scratch_pad_dir()
+    focus_file = utils.personalization.get("focus_file")
 
     if focus_file:
         file_path = os.path.join(scratch_pad_dir, focus_file)
         if not os.path.exists(file_path):
             return {"status": "Focus file not found", "file_name": focus_file}
     else:
-        # List available files in SCRATCH_PAD_DIR
-        available_files = os.listdir(scratch_pad_dir)
-        available_files_str = ", ".join(available_files)
-
-        # Build the structured prompt to select the file
-        select_file_prompt = f"""
-<purpose>
-    Select a file from the available files based on the user's prompt.
-</purpose>
-
-<instructions>
-    <instruction>Based on the user's prompt and the list of available files, infer which file the user wants to discuss.</instruction>
-    <instruction>If no file matches, return an empty string for 'file'.</instruction>
-</instructions>
-
-<available-files>
-    {available_files_str}
-</available-files>
-
-<user-prompt>
-    {prompt}
-</user-prompt>
-        """
-
-        # Call the LLM to select the file
-        file_selection_response = structured_output_prompt(
-            select_file_prompt,
-            FileReadResponse,
-            llm_model=model_name_to_id[ModelName.fast_model],
-        )
+        # Select the file, reusing the selection started while the arguments streamed in
+        file_selection_response = await FileSelectionRequest(prompt, "discuss", FileReadResponse).result()
 
         if not file_selection_response.file:
             return {"status": "No matching file found"}
 
         file_path = os.path.join(scratch_pad_dir, file_selection_response.file)
 
-    # Read the content of the file
-    with open(file_path, "r") as f:
-        file_content = f.read()
+    # Read the content of the file; large files are discussed from a preview
+    file_content, chunk_metadata = read_excerpt(file_path)
 
     # Get all memory content
     memory_content = memory_manager.get_xml_for_prompt(["*"])
@@ -968,6 +1154,15 @@ async def discuss_file(prompt: str, model: ModelName = ModelName.base_model) ->
     # Call the LLM to discuss the file content
     discussion = chat_prompt(discuss_file_prompt, model_name_to_id[model])
 
+    if chunk_metadata is not None:
+        return {
+            "status": "File discussed",
+            "file_name": os.path.basename(file_path),
+            "discussion": discussion,
+            "message": "File is large; discussed a preview. Use read_file_chunk to read the omitted chunks.",
+            **chunk_metadata,
+        }
+
     return {
         "status": "File discussed",
         "file_name": os.path.basename(file_path),
@@ -975,12 +1170,15 @@ async def discuss_file(prompt: str, model: ModelName = ModelName.base_model) ->
     }
 
 
+@tool_registry.tool()
 @timeit_decorator
 async def clipboard_to_memory(key: Optional[str] = None) -> dict:
     """
-    Copy the content from the clipboard to memory.
-    If a key is provided, it will be used to store the content in memory.
-    If no key is provided, a default key 'clipboard_content' will be used.
+    Copies the content from the clipboard to memory.
+
+    Args:
+        key (Optional[str]): The key to use for storing the clipboard content in memory. If not
+            provided, a default key 'clipboard_content' will be used.
     """
     try:
         clipboard_content = pyperclip.paste()
@@ -998,10 +1196,14 @@ async def clipboard_to_memory(key: Optional[str] = None) -> dict:
         }
 
 
+@tool_registry.tool(timeout=LLM_TOOL_TIMEOUT_SECONDS)
 @timeit_decorator
 async def remove_variable_from_memory(prompt: str) -> dict:
     """
-    Remove a key from memory if it exists, based on the user's prompt.
+    Remove/drop/delete a variable from memory based on the user's prompt.
+
+    Args:
+        prompt (str): The user's prompt describing what variable to remove from memory.
     """
     available_keys = memory_manager.list_keys()
     available_keys_str = ", ".join(available_keys)
@@ -1046,14 +1248,18 @@ async def remove_variable_from_memory(prompt: str) -> dict:
         }
 
 
+@tool_registry.tool(timeout=LLM_TOOL_TIMEOUT_SECONDS)
 @timeit_decorator
 async def read_file_into_memory(prompt: str) -> dict:
     """
-    Read a file from the scratch_pad_dir and save its content into memory based on the user's prompt.
+    Reads a file from the scratch_pad_dir and saves its content into memory based on the user's
+    prompt.
+
+    Args:
+        prompt (str): The user's prompt describing the file to read into memory.
     """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
-    available_files = os.listdir(scratch_pad_dir)
-    available_files_str = ", ".join(available_files)
+    scratch_pad_dir = get_scratch_pad_dir()
+    available_files_str = format_listing(await scratch_pad_catalog.scan(scratch_pad_dir))
 
     # Build the structured prompt to select the file
     select_file_prompt = f"""
@@ -1067,7 +1273,7 @@ async def read_file_into_memory(prompt: str) -> dict:
 </instructions>
 
 <available-files>
-    {available_files_str}
+{available_files_str}
 </available-files>
 
 <user-prompt>
@@ -1094,10 +1300,16 @@ async def read_file_into_memory(prompt: str) -> dict:
         }
 
     try:
-        with open(file_path, "r") as file:
-            content = file.read()
+        # Large files are saved as a preview, so memory (and every prompt it is added to) stays bounded
+        content, chunk_metadata = read_excerpt(file_path)
 
         memory_manager.upsert(file_selection_response.file, content)
+        if chunk_metadata is not None:
+            return {
+                "status": "success",
+                "message": f"File '{file_selection_response.file}' is large; a preview was saved to memory",
+                **chunk_metadata,
+            }
         return {
             "status": "success",
             "message": f"File '{file_selection_response.file}' content saved to memory",
@@ -1109,26 +1321,31 @@ async def read_file_into_memory(prompt: str) -> dict:
         }
 
 
+@tool_registry.tool()
 async def read_dir_into_memory() -> dict:
     """
-    Read all files from the scratch_pad_dir and save their content into memory.
+    Reads all files from the scratch_pad_dir and saves their content into memory.
     """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    scratch_pad_dir = get_scratch_pad_dir()
 
     try:
-        files = os.listdir(scratch_pad_dir)
+        files = [file["name"] for file in await scratch_pad_catalog.scan(scratch_pad_dir)]
+        previewed_files = []
         for file_name in files:
             file_path = os.path.join(scratch_pad_dir, file_name)
-            if os.path.isfile(file_path):
-                with open(file_path, "r") as file:
-                    content = file.read()
-                memory_manager.upsert(file_name, content)
+            content, chunk_metadata = read_excerpt(file_path)
+            memory_manager.upsert(file_name, content)
+            if chunk_metadata is not None:
+                previewed_files.append(file_name)
 
-        return {
+        result = {
             "status": "success",
             "message": f"All files from '{scratch_pad_dir}' have been read into memory",
             "files_read": len(files),
         }
+        if previewed_files:
+            result["previewed_files"] = previewed_files
+        return result
     except Exception as e:
         return {
             "status": "error",
@@ -1136,13 +1353,49 @@ async def read_dir_into_memory() -> dict:
         }
 
 
+@tool_registry.tool(concurrency=ToolConcurrency.shared)
+@timeit_decorator
+async def read_file_chunk(file_name: str, chunk: int) -> dict:
+    """
+    Reads one chunk of a large scratch pad file whose preview was ingested, discussed or
+    saved to memory.
+
+    Args:
+        file_name (str): The name of the file in the scratch pad.
+        chunk (int): The chunk number, from the chunk index returned with the preview.
+    """
+    scratch_pad_dir = get_scratch_pad_dir()
+    # Only files directly in the scratch pad can be read
+    file_path = os.path.join(scratch_pad_dir, os.path.basename(file_name))
+    if not os.path.isfile(file_path):
+        return {"status": "error", "message": f"File '{file_name}' not found in scratch_pad_dir"}
+
+    chunked_file = ChunkedFile(file_path)
+    try:
+        content = chunked_file.read_chunk(chunk)
+    except IndexError as e:
+        return {"status": "error", "message": str(e)}
+
+    start, end = chunked_file.chunks()[chunk]
+    return {
+        "status": "success",
+        "file_name": os.path.basename(file_name),
+        "chunk": chunk,
+        "chunk_count": len(chunked_file.chunks()),
+        "start": start,
+        "end": end,
+        "content": content,
+    }
+
+
+@tool_registry.tool(timeout=LLM_TOOL_TIMEOUT_SECONDS)
 @timeit_decorator
 async def scrap_to_file_from_clipboard() -> dict:
     """
-    Get content from clipboard, validate it's a URL, generate a file name,
-    scrape the URL, and save the content to a file in the scratch_pad_dir.
+    Gets a URL from the clipboard, scrapes its content, and saves it to a file in the
+    scratch_pad_dir.
     """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    scratch_pad_dir = get_scratch_pad_dir()
 
     try:
         # Get content from clipboard
@@ -1171,8 +1424,9 @@ async def scrap_to_file_from_clipboard() -> dict:
         class FileNameResponse(BaseModel):
             file_name: str
 
+        # The name only depends on the clipboard content, so repeated copies reuse it
         file_name_response = structured_output_prompt(
-            file_name_prompt, FileNameResponse
+            file_name_prompt, FileNameResponse, cache=True
         )
         file_name = file_name_response.file_name
 
@@ -1196,13 +1450,14 @@ async def scrap_to_file_from_clipboard() -> dict:
         }
 
 
+@tool_registry.tool(timeout=LLM_TOOL_TIMEOUT_SECONDS)
 @timeit_decorator
 async def clipboard_to_file() -> dict:
     """
-    Get content from clipboard, generate a file name based on the content,
-    and save the content (trimmed to 1000 chars max) to a file in the scratch_pad_dir.
+    Gets content from clipboard, generates a file name based on the content, and saves the
+    content (trimmed to 1000 chars max) to a file in the scratch_pad_dir.
     """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    scratch_pad_dir = get_scratch_pad_dir()
 
     try:
         # Get content from clipboard
@@ -1255,15 +1510,21 @@ async def clipboard_to_file() -> dict:
         }
 
 
+@tool_registry.tool(timeout=LLM_TOOL_TIMEOUT_SECONDS)
 @timeit_decorator
 async def runnable_code_check(prompt: str) -> dict:
     """
-    Checks if the code in the specified file is runnable. If not, provides the necessary changes to make it runnable.
+    Checks if the code in the specified file is runnable and provides necessary changes if not.
+
+    Args:
+        prompt (str): The user's prompt describing which file to check for runnable code.
     """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    scratch_pad_dir = get_scratch_pad_dir()
     memory_content = memory_manager.get_xml_for_prompt(["*"])
 
     # Step 1: Select the file based on the prompt
+    available_files = format_listing(await scratch_pad_catalog.scan(scratch_pad_dir))
+
     select_file_prompt = f"""
 <purpose>
     Select a file from the available files based on the user's prompt.
@@ -1275,7 +1536,7 @@ async def runnable_code_check(prompt: str) -> dict:
 </instructions>
 
 <available-files>
-    {", ".join(os.listdir(scratch_pad_dir))}
+{available_files}
 </available-files>
 
 <user-prompt>
@@ -1325,7 +1586,8 @@ async def runnable_code_check(prompt: str) -> dict:
 {memory_content}
 """
 
-    is_runnable_response = structured_output_prompt(check_runnable_prompt, IsRunnable)
+    # The verdict is reused while the code and memory are unchanged
+    is_runnable_response = structured_output_prompt(check_runnable_prompt, IsRunnable, cache=True)
 
     if is_runnable_response.code_is_runnable:
         return {"status": "success", "message": "The code is runnable."}
@@ -1369,16 +1631,22 @@ async def runnable_code_check(prompt: str) -> dict:
     }
 
 
+@tool_registry.tool()
 @timeit_decorator
 async def run_python(prompt: str) -> dict:
     """
-    Executes a Python script from the scratch_pad_dir based on the user's prompt.
-    Returns the output and a success or failure status.
+    Executes a Python script from the scratch_pad_dir based on the user's prompt and returns the
+    output.
+
+    Args:
+        prompt (str): The user's prompt describing which Python file to execute.
     """
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+    scratch_pad_dir = get_scratch_pad_dir()
     memory_content = memory_manager.get_xml_for_prompt(["*"])
 
     # Step 1: Select the file based on the prompt
+    available_files = format_listing(await scratch_pad_catalog.scan(scratch_pad_dir, [".py"]))
+
     select_file_prompt = f"""
 <purpose>
     Select a Python file to execute based on the user's prompt.
@@ -1390,7 +1658,7 @@ async def run_python(prompt: str) -> dict:
 </instructions>
 
 <available-files>
-    {", ".join([f for f in os.listdir(scratch_pad_dir) if f.endswith('.py')])}
+{available_files}
 </available-files>
 
 <memory-content>
@@ -1429,38 +1697,83 @@ async def run_python(prompt: str) -> dict:
     except Exception as e:
         return {"status": "error", "message": f"Failed to read the file: {str(e)}"}
 
-    # Execute the Python code using run_uv_script
-    output = run_uv_script(python_code)
+    # Execute the Python code without blocking the event loop
+    try:
+        result = await run_python_code(python_code)
+    except OSError as e:
+        return {"status": "error", "message": f"Failed to start the script: {str(e)}"}
+
+    # Record the run so its output can be looked up later without re-running
+    run_history = get_run_history(scratch_pad_dir)
+    run_history.record(result, file_selection_response.file)
+
+    return {
+        "status": "success" if result.success else "failure",
+        "exit_code": result.exit_code,
+        "timed_out": result.timed_out,
+        "wall_time": result.wall_time,
+        "cpu_time": result.cpu_time,
+        "peak_rss_bytes": result.peak_rss_bytes,
+        "stdout": result.excerpt("stdout"),
+        "stderr": result.excerpt("stderr"),
+        "error": None if result.success else result.excerpt("stderr"),
+        "file_name": file_selection_response.file,
+        "run_id": result.run_id,
+    }
+
 
-    # Save the output to a file with '_output' suffix
-    output_file_name = os.path.splitext(file_selection_response.file)[0] + "_output.txt"
-    output_file_path = os.path.join(scratch_pad_dir, output_file_name)
-    with open(output_file_path, "w") as f:
-        f.write(output)
+@tool_registry.tool(concurrency=ToolConcurrency.shared)
+@timeit_decorator
+async def get_run_output(run_id: Optional[str] = None, file_name: Optional[str] = None) -> dict:
+    """
+    Returns the recorded output and exit status of an earlier Python script run without re-
+    running it.
 
-    # Determine success based on presence of errors
-    if "Traceback" in output or "Error" in output:
-        success = False
-        error_message = output
+    Args:
+        run_id (Optional[str]): The run id returned by run_python. If not provided, the latest
+            run is used.
+        file_name (Optional[str]): The Python file whose latest run to return, when no run id is
+            given.
+    """
+    scratch_pad_dir = get_scratch_pad_dir()
+    run_history = get_run_history(scratch_pad_dir)
+
+    if run_id:
+        entry = run_history.get(run_id)
     else:
-        success = True
-        error_message = None
+        runs = run_history.list_runs(file_name=file_name, limit=1)
+        entry = runs[0] if runs else None
+
+    if not entry:
+        return {"status": "error", "message": "No matching run found."}
 
     return {
-        "status": "success" if success else "failure",
-        "error": error_message,
-        "file_name": file_selection_response.file,
-        "output_file": output_file_name,
+        "status": "success",
+        "run": {key: value for key, value in entry.items() if not key.endswith("_path")},
+        "stdout": run_history.read_output(entry, "stdout"),
+        "stderr": run_history.read_output(entry, "stderr"),
+        "recent_runs": [
+            {"run_id": run["run_id"], "file_name": run["file_name"], "started_at": run["started_at"], "exit_code": run["exit_code"]}
+            for run in run_history.list_runs(file_name=file_name, limit=5)
+        ],
     }
 
 
+@tool_registry.tool()
 @timeit_decorator
-async def create_python_chart(prompt: str, chart_type: str) -> dict:
-    scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+async def create_python_chart(prompt: str, chart_type: ChartType) -> dict:
+    """
+    Generates Python code to create a matplotlib chart based on the user's prompt and selected
+    CSV file.
+
+    Args:
+        prompt (str): The user's prompt describing the chart to create.
+        chart_type (ChartType): The type of chart to create.
+    """
+    scratch_pad_dir = get_scratch_pad_dir()
 
     # List available CSV files
-    available_files = os.listdir(scratch_pad_dir)
-    csv_files = [f for f in available_files if f.endswith(".csv")]
+    csv_files = await scratch_pad_catalog.scan(scratch_pad_dir, [".csv"])
     if not csv_files:
         return {
             "status": "error",
@@ -1479,7 +1792,7 @@ async def create_python_chart(prompt: str, chart_type: str) -> dict:
 </instructions>
 
 <available-csv-files>
-    {', '.join(csv_files)}
+{format_listing(csv_files)}
 </available-csv-files>
 
 <user-prompt>
@@ -1572,7 +1885,7 @@ async def create_python_chart(prompt: str, chart_type: str) -> dict:
         f.write(response)
 
     # now execute the code
-    output = run_uv_script(response)
+    output = await run_uv_script_async(response)
 
     return {
         "status": "success",
@@ -1582,416 +1895,5 @@ async def create_python_chart(prompt: str, chart_type: str) -> dict:
     }
 
 
-# Map function names to their corresponding functions
-function_map = {
-    "get_current_time": get_current_time,
-    "get_random_number": get_random_number,
-    "open_browser": open_browser,
-    "create_file": create_file,
-    "update_file": update_file,
-    "delete_file": delete_file,
-    "discuss_file": discuss_file,
-    "clipboard_to_memory": clipboard_to_memory,
-    "remove_variable_from_memory": remove_variable_from_memory,
-    "read_file_into_memory": read_file_into_memory,
-    "read_dir_into_memory": read_dir_into_memory,
-    "reset_active_memory": reset_active_memory,
-    "add_to_memory": add_to_memory,
-    "scrap_to_file_from_clipboard": scrap_to_file_from_clipboard,
-    "generate_diagram": generate_diagram,
-    "runnable_code_check": runnable_code_check,
-    "run_python": run_python,
-    "ingest_file": ingest_file,
-    "ingest_memory": ingest_memory,
-    "clipboard_to_file": clipboard_to_file,
-    "load_tables_into_memory": load_tables_into_memory,
-    "generate_sql_save_to_file": generate_sql_save_to_file,
-    "generate_sql_and_execute": generate_sql_and_execute,
-    "run_sql_file": run_sql_file,
-    "create_python_chart": create_python_chart,
-}
-
-# Tools array for session initialization
-tools = [
-    {
-        "type": "function",
-        "name": "load_tables_into_memory",
-        "description": "Loads table definitions from Database and saves them to active memory.",
-        "parameters": {
-            "type": "object",
-            "properties": {},
-            "required": [],
-        },
-    },
-    {
-        "type": "function",
-        "name": "create_python_chart",
-        "description": "Generates Python code to create a matplotlib chart based on the user's prompt and selected CSV file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing the chart to create.",
-                },
-                "chart_type": {
-                    "type": "string",
-                    "enum": ["histogram", "pie", "scatter", "bar", "line"],
-                    "description": "The type of chart to create.",
-                },
-            },
-            "required": ["prompt", "chart_type"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "generate_sql_save_to_file",
-        "description": "Generates an SQL query based on user's prompt and saves it to a file.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing the SQL query to generate.",
-                },
-            },
-            "required": ["prompt"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "get_current_time",
-        "description": "Returns the current time.",
-        "parameters": {
-            "type": "object",
-            "properties": {},
-            "required": [],
-        },
-    },
-    {
-        "type": "function",
-        "name": "reset_active_memory",
-        "description": "Resets the active memory to an empty dictionary.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "force_delete": {
-                    "type": "boolean",
-                    "description": "Whether to force reset the memory without confirmation. Defaults to false if not specified.",
-                },
-            },
-            "required": [],
-        },
-    },
-    {
-        "type": "function",
-        "name": "get_random_number",
-        "description": "Returns a random number between 1 and 100.",
-        "parameters": {
-            "type": "object",
-            "properties": {},
-            "required": [],
-        },
-    },
-    {
-        "type": "function",
-        "name": "open_browser",
-        "description": "Opens a browser tab with the best-fitting URL based on the user's prompt.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt to determine which URL to open.",
-                },
-            },
-            "required": ["prompt"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "create_file",
-        "description": "Generates content for a new file based on the user's prompt and file name.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "file_name": {
-                    "type": "string",
-                    "description": "The name of the file to create.",
-                },
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt to generate the file content.",
-                },
-            },
-            "required": ["file_name", "prompt"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "update_file",
-        "description": "Updates a file based on the user's prompt.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing the updates to the file.",
-                },
-                "model": {
-                    "type": "string",
-                    "enum": [
-                        "state_of_the_art_model",
-                        "reasoning_model",
-                        "base_model",
-                        "fast_model",
-                    ],
-                    "description": "The model to use for updating the file content. Defaults to 'base_model' if not explicitly specified.",
-                },
-            },
-            "required": ["prompt"],  # 'model' is optional
-        },
-    },
-    {
-        "type": "function",
-        "name": "delete_file",
-        "description": "Deletes a file based on the user's prompt.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing the file to delete.",
-                },
-                "force_delete": {
-                    "type": "boolean",
-                    "description": "Whether to force delete the file without confirmation. Default to 'false' if not specified.",
-                },
-            },
-            "required": ["prompt"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "discuss_file",
-        "description": "Discusses a file's content based on the user's prompt, considering the current memory content.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt, question, or statement describing what to discuss about the file content.",
-                },
-                "model": {
-                    "type": "string",
-                    "enum": [
-                        "state_of_the_art_model",
-                        "reasoning_model",
-                        "base_model",
-                        "fast_model",
-                    ],
-                    "description": "The model to use for discussing the file content. Defaults to 'base_model' if not explicitlyspecified.",
-                },
-            },
-            "required": ["prompt"],  # 'model' is optional
-        },
-    },
-    {
-        "type": "function",
-        "name": "clipboard_to_memory",
-        "description": "Copies the content from the clipboard to memory.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "key": {
-                    "type": "string",
-                    "description": "The key to use for storing the clipboard content in memory. If not provided, a default key 'clipboard_content' will be used.",
-                },
-            },
-            "required": [],  # 'key' is optional
-        },
-    },
-    {
-        "type": "function",
-        "name": "remove_variable_from_memory",
-        "description": "Remove/drop/delete a variable from memory based on the user's prompt.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing what variable to remove from memory.",
-                },
-            },
-            "required": ["prompt"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "read_file_into_memory",
-        "description": "Reads a file from the scratch_pad_dir and saves its content into memory based on the user's prompt.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing the file to read into memory.",
-                },
-            },
-            "required": ["prompt"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "add_to_memory",
-        "description": "Adds a key-value pair to memory.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "key": {
-                    "type": "string",
-                    "description": "The key to use for storing the value in memory.",
-                },
-                "value": {
-                    "type": "string",
-                    "description": "The value to store in memory.",
-                },
-            },
-            "required": ["key", "value"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "read_dir_into_memory",
-        "description": "Reads all files from the scratch_pad_dir and saves their content into memory.",
-        "parameters": {
-            "type": "object",
-            "properties": {},
-            "required": [],
-        },
-    },
-    {
-        "type": "function",
-        "name": "scrap_to_file_from_clipboard",
-        "description": "Gets a URL from the clipboard, scrapes its content, and saves it to a file in the scratch_pad_dir.",
-        "parameters": {
-            "type": "object",
-            "properties": {},
-            "required": [],
-        },
-    },
-    {
-        "type": "function",
-        "name": "generate_diagram",
-        "description": "Generates mermaid diagrams based on the user's prompt.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing the diagram to generate.",
-                },
-                "version_count": {
-                    "type": "integer",
-                    "description": "The total number of diagram versions to generate. Defaults to 1 if not specified.",
-                },
-            },
-            "required": ["prompt"],  # 'version_count' is optional
-        },
-    },
-    {
-        "type": "function",
-        "name": "runnable_code_check",
-        "description": "Checks if the code in the specified file is runnable and provides necessary changes if not.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing which file to check for runnable code.",
-                },
-            },
-            "required": ["prompt"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "run_python",
-        "description": "Executes a Python script from the scratch_pad_dir based on the user's prompt and returns the output.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing which Python file to execute.",
-                },
-            },
-            "required": ["prompt"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "ingest_file",
-        "description": "Selects a file based on the user's prompt, reads its content, and returns the file data.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing which file to ingest.",
-                },
-            },
-            "required": ["prompt"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "ingest_memory",
-        "description": "Returns the ACTIVE_MEMORY .env var json content.",
-        "parameters": {
-            "type": "object",
-            "properties": {},
-            "required": [],
-        },
-    },
-    {
-        "type": "function",
-        "name": "clipboard_to_file",
-        "description": "Gets content from clipboard, generates a file name based on the content, and saves the content (trimmed to 1000 chars max) to a file in the scratch_pad_dir.",
-        "parameters": {
-            "type": "object",
-            "properties": {},
-            "required": [],
-        },
-    },
-    {
-        "type": "function",
-        "name": "generate_sql_and_execute",
-        "description": "Generates an SQL query based on the user's prompt, executes it, and saves the results to a file in the specified format.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing what SQL query to generate and execute.",
-                },
-            },
-            "required": ["prompt"],
-        },
-    },
-    {
-        "type": "function",
-        "name": "run_sql_file",
-        "description": "Executes an SQL file based on the user's prompt and saves the results to a file in the specified format (CSV, JSONL, or JSON array).",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "prompt": {
-                    "type": "string",
-                    "description": "The user's prompt describing which SQL file to execute and optionally specifying the output format.",
-                },
-            },
-            "required": ["prompt"],
-        },
-    },
-]
+# The mermaid module is registered here so it does not depend on the tool registry
+tool_registry.register(generate_diagram, timeout=LLM_TOOL_TIMEOUT_SECONDS)
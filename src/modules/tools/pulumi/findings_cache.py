@@ -0,0 +1,94 @@
+import ast
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Oldest entries are evicted once the cache grows past this many keys
+MAX_CACHE_ENTRIES = 5000
+
+
+class CodeBlock(NamedTuple):
+    """A top-level statement of a module, including its decorators."""
+    start_line: int
+    end_line: int
+    text: str
+    digest: str
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_top_level_blocks(source_code: str) -> List[CodeBlock]:
+    """
+    Splits source code into its top-level statements.
+
+    Args:
+        source_code (str): The Python source code to split.
+
+    Returns:
+        List[CodeBlock]: One block per top-level statement, in source order.
+
+    Raises:
+        SyntaxError: If the source code cannot be parsed.
+    """
+    tree = ast.parse(source_code)
+    lines = source_code.splitlines(keepends=True)
+    blocks = []
+    for node in tree.body:
+        decorators = getattr(node, "decorator_list", [])
+        start_line = min([node.lineno] + [decorator.lineno for decorator in decorators])
+        end_line = node.end_lineno
+        text = "".join(lines[start_line - 1:end_line])
+        if not text.endswith("\n"):
+            text += "\n"
+        blocks.append(CodeBlock(start_line, end_line, text, content_hash(text)))
+    return blocks
+
+
+class NamingFindingsCache:
+    """
+    Persists naming findings keyed by (kind, content hash, prompt version, model).
+
+    Entries hold lists of finding dicts. Whole-file entries use absolute line numbers,
+    block entries use line numbers relative to the start of the block.
+    """
+
+    def __init__(self, file_path: str, max_entries: int = MAX_CACHE_ENTRIES):
+        self.file_path = file_path
+        self.max_entries = max_entries
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        self.load()
+
+    @staticmethod
+    def key(kind: str, digest: str, prompt_version: int, model: str) -> str:
+        return f"{kind}:{prompt_version}:{model}:{digest}"
+
+    def load(self):
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, "r") as file:
+                    self.entries = json.load(file)
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning(f"Ignoring unreadable findings cache '{self.file_path}': {str(e)}")
+                self.entries = {}
+        else:
+            self.entries = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        with open(self.file_path, "w") as file:
+            json.dump(self.entries, file)
+
+    def get(self, kind: str, digest: str, prompt_version: int, model: str) -> Optional[List[Dict[str, Any]]]:
+        return self.entries.get(self.key(kind, digest, prompt_version, model))
+
+    def put(self, kind: str, digest: str, prompt_version: int, model: str, findings: List[Dict[str, Any]]):
+        key = self.key(kind, digest, prompt_version, model)
+        # Re-insert so the entry moves to the end of the eviction order
+        self.entries.pop(key, None)
+        self.entries[key] = findings
+        while len(self.entries) > self.max_entries:
+            self.entries.pop(next(iter(self.entries)))
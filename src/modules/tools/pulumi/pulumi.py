@@ -1,12 +1,7 @@
-from .refactor import (
-    refactor,
-)
-function_map = {
-    # Existing functions...
-    "refactor": refactor,
-}
-tools = [
-    # Existing tools...
+from ...lazy import LazyTool
+from ..registry import tool_registry
+
+schemas = [
     {
         "type": "function",
         "name": "refactor",
@@ -25,4 +20,35 @@ tools = [
             "required": ["file_path"],
         },
     },
+    {
+        "type": "function",
+        "name": "refactor_stack",
+        "description": (
+            "Analyzes every Python Pulumi program in a stack directory in parallel, renames poorly "
+            "named variables across all files, and writes consolidated results to a file."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "directory": {
+                    "type": "string",
+                    "description": "The path to the Pulumi stack directory to analyze and refactor.",
+                },
+                "max_concurrency": {
+                    "type": "integer",
+                    "description": "The maximum number of files to analyze at the same time. Defaults to 4 if not specified.",
+                },
+            },
+            "required": ["directory"],
+        },
+    },
 ]
+
+# The refactor module loads rope and an OpenAI client, so it is imported on first use. Its
+# signatures cannot be inspected without importing it, so the schemas above are explicit.
+for schema in schemas:
+    tool_registry.register(
+        LazyTool(f"{__package__}.refactor", schema["name"]),
+        description=schema["description"],
+        parameters=schema["parameters"],
+    )
@@ -1,11 +1,11 @@
 import os
-import ast
 import json
 import time
 import logging
 import asyncio
 import re
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Dict, List, Optional
 from rope.base.exceptions import BadIdentifierError
 
 # Define a stricter identifier regex
@@ -14,6 +14,11 @@ identifier_regex = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*\Z')
 from pydantic import BaseModel, Field
 from openai import OpenAI
 
+from ...session_context import get_scratch_pad_dir
+from ...tokens import track_llm_call
+from .findings_cache import NamingFindingsCache, content_hash, split_top_level_blocks
+from .source_index import SourceIndex
+
 # Initialize the OpenAI client
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 if not client.api_key:
@@ -54,6 +59,18 @@ class RefactoringFindings(BaseModel):
     variable_findings: VariableNamingFindingList = Field(..., description="Variable naming findings")
     resource_findings: ResourceNamingFindingList = Field(..., description="Resource naming findings")
 
+class FileRefactoringTiming(BaseModel):
+    file: str = Field(..., description="File name")
+    analysis_seconds: float = Field(..., description="Wall time spent in the LLM analyses")
+    rename_seconds: float = Field(0.0, description="Wall time spent applying renames with Rope")
+    variables_renamed: int = Field(0, description="Number of variables renamed")
+
+class StackRefactoringFindings(BaseModel):
+    directory: str = Field(..., description="Root directory of the Pulumi stack")
+    files: List[RefactoringFindings] = Field(..., description="Findings for each analyzed file")
+    timings: List[FileRefactoringTiming] = Field(..., description="Per-file timing")
+    failed_files: Dict[str, str] = Field(default_factory=dict, description="Files that could not be analyzed, with the reason")
+
 
 # Centralized severity threshold
 SEVERITY_THRESHOLD = 2  # Include findings with severity level 2 (Minor) and above
@@ -100,8 +117,135 @@ POSSIBLE_REASONS = """
 </possible_reasons>
 """
 
-# Define the scratch pad directory
-scratch_pad_dir = os.getenv("SCRATCH_PAD_DIR", "./scratchpad")
+# Model used for the naming analyses
+NAMING_MODEL = "gpt-4o-2024-08-06"
+
+# Bump whenever the naming prompts change so cached findings are not reused
+NAMING_PROMPT_VERSION = 1
+
+# Findings are cached by content hash so unchanged files and blocks are not re-sent; one cache per scratch pad
+findings_caches: Dict[str, NamingFindingsCache] = {}
+
+# Maximum number of files analyzed at once in stack mode (each file issues two LLM calls)
+DEFAULT_MAX_CONCURRENT_FILES = 4
+
+# Directories never searched for Pulumi programs
+EXCLUDED_DIRECTORIES = {".git", ".venv", "venv", "__pycache__", "node_modules", ".ropeproject", ".pulumi"}
+
+# Matches `import pulumi`, `import pulumi_aws`, `from pulumi import ...`, etc.
+pulumi_import_regex = re.compile(r'^\s*(?:import|from)\s+pulumi(?:_\w+)?\b', re.MULTILINE)
+
+
+def get_findings_cache() -> NamingFindingsCache:
+    """Returns the naming findings cache of the active session's scratch pad."""
+    cache_path = os.path.join(get_scratch_pad_dir(), "naming_findings_cache.json")
+    if cache_path not in findings_caches:
+        findings_caches[cache_path] = NamingFindingsCache(cache_path)
+    return findings_caches[cache_path]
+
+
+def _locate_name_line(block, original_name):
+    index = block.text.find(original_name)
+    return block.text.count("\n", 0, index) + 1 if index >= 0 else None
+
+
+def _assign_findings_to_blocks(findings, placed_blocks):
+    """
+    Attributes findings from an analyzed source to the blocks it was built from.
+
+    Args:
+        findings (List[NamingFinding]): Findings with line numbers in the analyzed source.
+        placed_blocks (List[tuple]): (CodeBlock, start line in the analyzed source) pairs.
+
+    Returns:
+        List[List[dict]]: Per-block finding dicts with block-relative line numbers.
+    """
+    assigned = [[] for _ in placed_blocks]
+    for finding in findings:
+        relative_line = None
+        for index, (block, start_line) in enumerate(placed_blocks):
+            block_length = block.end_line - block.start_line + 1
+            if start_line <= finding.line_number < start_line + block_length and finding.original_name in block.text:
+                relative_line = finding.line_number - start_line + 1
+                break
+        else:
+            # The reported line is off; fall back to the first block that mentions the name
+            for index, (block, _) in enumerate(placed_blocks):
+                relative_line = _locate_name_line(block, finding.original_name)
+                if relative_line is not None:
+                    break
+
+        if relative_line is None:
+            logging.debug(f"Dropping finding for '{finding.original_name}'; name not found in source.")
+            continue
+
+        relative_finding = finding.model_dump()
+        relative_finding["line_number"] = relative_line
+        assigned[index].append(relative_finding)
+    return assigned
+
+
+async def _analyze_naming_with_cache(kind, code_content, request_findings, list_model):
+    """
+    Returns naming findings for `code_content`, reusing cached results where possible.
+
+    An unchanged file is served from the whole-file entry. Otherwise only the top-level
+    blocks without a cached entry are sent to the model, and the results are merged
+    with the cached findings of the unchanged blocks.
+    """
+    findings_cache = get_findings_cache()
+    cache_args = (NAMING_PROMPT_VERSION, NAMING_MODEL)
+    file_digest = content_hash(code_content)
+
+    cached_findings = findings_cache.get(kind, file_digest, *cache_args)
+    if cached_findings is not None:
+        logging.info(f"Reusing cached {kind} findings for unchanged file.")
+        return list_model(findings=cached_findings)
+
+    try:
+        blocks = split_top_level_blocks(code_content)
+    except SyntaxError:
+        blocks = []
+
+    block_findings = {block.digest: findings_cache.get(kind, block.digest, *cache_args) for block in blocks}
+    changed_blocks = [block for block in blocks if block_findings[block.digest] is None]
+
+    if blocks and len(changed_blocks) < len(blocks):
+        logging.info(f"Re-analyzing {len(changed_blocks)} of {len(blocks)} top-level blocks for {kind}.")
+        placed_blocks = []
+        next_line = 1
+        for block in changed_blocks:
+            placed_blocks.append((block, next_line))
+            next_line += block.text.count("\n")
+        analyzed_source = "".join(block.text for block in changed_blocks)
+    else:
+        placed_blocks = [(block, block.start_line) for block in blocks]
+        analyzed_source = code_content
+
+    if placed_blocks or not blocks:
+        result = await request_findings(analyzed_source)
+        if result is None:
+            return None
+        assigned = _assign_findings_to_blocks(result.findings, placed_blocks)
+        for (block, _), relative_findings in zip(placed_blocks, assigned):
+            block_findings[block.digest] = relative_findings
+            findings_cache.put(kind, block.digest, *cache_args, relative_findings)
+
+    if blocks:
+        findings = []
+        for block in blocks:
+            for relative_finding in block_findings[block.digest]:
+                finding = dict(relative_finding)
+                finding["line_number"] = block.start_line + relative_finding["line_number"] - 1
+                findings.append(finding)
+    else:
+        findings = [finding.model_dump() for finding in result.findings]
+
+    findings_cache.put(kind, file_digest, *cache_args, findings)
+    findings_cache.save()
+
+    return list_model(findings=findings)
+
 
 async def refactor_poorly_named_variables(file_path: str) -> Optional[VariableNamingFindingList]:
     """
@@ -126,6 +270,13 @@ async def refactor_poorly_named_variables(file_path: str) -> Optional[VariableNa
         logging.error(f"Failed to read the file: {str(e)}")
         return None
 
+    return await _analyze_naming_with_cache("variables", code_content, _request_variable_findings, VariableNamingFindingList)
+
+
+async def _request_variable_findings(code_content: str) -> Optional[VariableNamingFindingList]:
+    """
+    Sends code to the model and returns its variable naming findings, or None if an error occurs.
+    """
     # Construct the system and user messages
     system_message = f"""
 You are analyzing Python code to identify variables that are not clearly or well named. For each poorly named variable you find, assign a severity level based on specific criteria, provide a reason for suggesting a replacement, and suggest a replacement name.
@@ -192,14 +343,19 @@ Do not report variables that are well-named and do not require any changes. Incl
 
     # Use the OpenAI API to get the findings
     try:
-        completion = client.beta.chat.completions.parse(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            response_format=VariableNamingFindingList,
-        )
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
+        # Run the blocking client call in a worker thread so analyses can overlap
+        with track_llm_call(NAMING_MODEL, messages) as call:
+            completion = await asyncio.to_thread(
+                client.beta.chat.completions.parse,
+                model=NAMING_MODEL,
+                messages=messages,
+                response_format=VariableNamingFindingList,
+            )
+            call.usage = completion.usage
 
         # Add debug logging
         logging.debug(f"LLM response: {completion}")
@@ -249,6 +405,13 @@ async def refactor_poorly_named_resources(file_path: str) -> Optional[ResourceNa
         logging.error(f"Failed to read the file: {str(e)}")
         return None
 
+    return await _analyze_naming_with_cache("resources", code_content, _request_resource_findings, ResourceNamingFindingList)
+
+
+async def _request_resource_findings(code_content: str) -> Optional[ResourceNamingFindingList]:
+    """
+    Sends code to the model and returns its resource naming findings, or None if an error occurs.
+    """
     # Construct the system and user messages
     system_message = f"""
 You are analyzing code that includes Pulumi resource definitions to identify resources with names that are not clearly or well named. For each poorly named resource:
@@ -321,14 +484,19 @@ Do not report resources that are well-named and do not require any changes.
 
     # Use the OpenAI API to get the findings
     try:
-        completion = client.beta.chat.completions.parse(
-            model="gpt-4o-2024-08-06",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            response_format=ResourceNamingFindingList,
-        )
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
+        # Run the blocking client call in a worker thread so analyses can overlap
+        with track_llm_call(NAMING_MODEL, messages) as call:
+            completion = await asyncio.to_thread(
+                client.beta.chat.completions.parse,
+                model=NAMING_MODEL,
+                messages=messages,
+                response_format=ResourceNamingFindingList,
+            )
+            call.usage = completion.usage
 
         # Add debug logging
         logging.debug(f"LLM response: {completion}")
@@ -355,8 +523,12 @@ Do not report resources that are well-named and do not require any changes.
     return ResourceNamingFindingList(findings=findings.findings)
 
 
-def perform_variable_refactoring(findings, file_path, persistent_file_path):
-    logging.info(f"Starting variable refactoring for file: {file_path}")
+@contextmanager
+def refactor_lock():
+    """
+    Serializes refactoring runs through a lock file in the scratchpad directory.
+    """
+    scratch_pad_dir = get_scratch_pad_dir()
     lock_file_path = os.path.join(scratch_pad_dir, "refactor.lock")
 
     # Wait until the lock file is deleted
@@ -366,177 +538,193 @@ def perform_variable_refactoring(findings, file_path, persistent_file_path):
 
     # Create the lock file
     logging.debug(f"Creating lock file at {lock_file_path}")
+    os.makedirs(scratch_pad_dir, exist_ok=True)
     with open(lock_file_path, "w") as file:
         file.write("")
 
     try:
-        # Load the list of already refactored variables
-        logging.debug(f"Loading refactored variables from {persistent_file_path}")
-        if os.path.exists(persistent_file_path):
-            with open(persistent_file_path, 'r') as f:
-                refactored_variables = json.load(f)
-        else:
-            refactored_variables = {}
-
-        # Read the source code
-        with open(file_path, 'r') as file:
-            source_code = file.read()
-
-        # Initialize the Rope project
-        project = Project(os.path.dirname(file_path))
-        resource = libutils.path_to_resource(project, file_path)
+        yield
+    finally:
+        # Delete the lock file
+        logging.debug(f"Deleting lock file at {lock_file_path}")
+        os.remove(lock_file_path)
 
-        # Create a mapping from variable names to findings
-        finding_dict = {finding.original_name: finding for finding in findings}
 
-        # Get the list of target variable names
-        target_variable_names = finding_dict.keys()
+def _load_refactored_names(persistent_file_path):
+    logging.debug(f"Loading refactored names from {persistent_file_path}")
+    if os.path.exists(persistent_file_path):
+        with open(persistent_file_path, 'r') as f:
+            return json.load(f)
+    return {}
 
-        # Parse the source code with ast
-        parsed_ast = ast.parse(source_code)
 
-        # Create and run the visitor
-        visitor = VariableDefVisitor(target_variable_names)
-        visitor.visit(parsed_ast)
+def _save_refactored_names(refactored_names, persistent_file_path):
+    logging.debug(f"Saving refactored names to {persistent_file_path}")
+    with open(persistent_file_path, 'w') as f:
+        json.dump(refactored_names, f, indent=4)
 
-        if not visitor.found_variables:
-            logging.error("No variables found in the source code for refactoring.")
-            return
 
-        for variable_info in visitor.found_variables:
-            variable_name = variable_info['name']
-            node = variable_info['node']
-            lineno = variable_info['lineno']
-            col_offset = variable_info['col_offset']
-            finding = finding_dict[variable_name]
-            old_name = finding.original_name
-            new_name = finding.replacement_name
-            logging.info(f"Processing variable '{old_name}' at line {lineno}, column {col_offset}")
+def refactored_variable_key(file_path, name):
+    """Stack renames are recorded per file, so same-named variables in other files are still renamed."""
+    return f"{os.path.abspath(file_path)}:{name}"
 
-            # Check if already refactored
-            if old_name in refactored_variables:
-                logging.info(f"Variable '{old_name}' has already been refactored; skipping.")
-                continue
 
-            # Skip if the old variable name is not a valid identifier
-            if not identifier_regex.match(old_name):
-                logging.warning(f"Variable name '{old_name}' is not a valid Python identifier; skipping.")
-                continue
+def rename_variables_in_project(project, findings, file_path, refactored_variables, key_by_file=False):
+    """
+    Applies the variable findings for one file using an already open Rope project.
 
-            # Skip if the new variable name is not a valid identifier
-            if not identifier_regex.match(new_name):
-                logging.warning(f"Replacement name '{new_name}' is not a valid Python identifier; skipping.")
-                continue
+    Rope renames every reference it can resolve inside the project, so when the project
+    is rooted at a stack directory the renames propagate across modules.
 
-            try:
-                # Calculate the offset
-                offset = _get_offset_from_lineno_col(source_code, lineno, col_offset, variable_name)
-                # Initialize the Rename refactoring
-                rename = Rename(project, resource, offset)
-                changes = rename.get_changes(new_name)
-                project.do(changes)
-                project.sync()
-                logging.info(f"Successfully refactored variable '{old_name}' to '{new_name}' at line {lineno} and column {col_offset} using Rope.")
-
-                # Update refactored variables list
-                refactored_variables[old_name] = new_name
-
-            except (BadIdentifierError, SyntaxError) as e:
-                logging.warning(f"Skipping variable '{old_name}' due to an error: {str(e)}")
-                continue
-            except Exception as e:
-                logging.error(f"Error refactoring variable '{old_name}' to '{new_name}' at line {lineno} and column {col_offset}: {str(e)}", exc_info=True)
-                continue
+    Args:
+        project (Project): The open Rope project containing `file_path`.
+        findings (List[VariableNamingFinding]): The findings to apply.
+        file_path (str): The path to the file that defines the variables.
+        refactored_variables (dict): Already applied renames; updated in place.
+        key_by_file (bool): Key `refactored_variables` by `refactored_variable_key` instead of
+            the bare variable name, as stack refactoring does.
 
-        # Save the updated refactored variables
-        logging.debug(f"Saving refactored variables to {persistent_file_path}")
-        with open(persistent_file_path, 'w') as f:
-            json.dump(refactored_variables, f, indent=4)
+    Returns:
+        int: The number of variables renamed.
+    """
+    resource = libutils.path_to_resource(project, file_path)
+
+    # Index the source once; offsets for every target are resolved from it
+    source_code = resource.read()
+    source_index = SourceIndex(source_code)
+    applied_renames = []
+
+    # Only findings for names that are really assigned in the file reach Rope
+    valid_findings = source_index.validate_findings(findings)
+
+    if not valid_findings:
+        logging.error(f"No variables found in '{file_path}' for refactoring.")
+        return 0
+
+    renamed_count = 0
+    for finding in valid_findings:
+        old_name = finding.original_name
+        new_name = finding.replacement_name
+        logging.info(f"Processing variable '{old_name}' reported at line {finding.line_number}")
+
+        # Check if already refactored
+        variable_key = refactored_variable_key(file_path, old_name) if key_by_file else old_name
+        if variable_key in refactored_variables:
+            logging.info(f"Variable '{old_name}' has already been refactored; skipping.")
+            continue
+
+        # Skip if the old variable name is not a valid identifier
+        if not identifier_regex.match(old_name):
+            logging.warning(f"Variable name '{old_name}' is not a valid Python identifier; skipping.")
+            continue
+
+        # Skip if the new variable name is not a valid identifier
+        if not identifier_regex.match(new_name):
+            logging.warning(f"Replacement name '{new_name}' is not a valid Python identifier; skipping.")
+            continue
+
+        try:
+            offset = source_index.shifted_offset(source_index.definition_offset(old_name), applied_renames)
+
+            if applied_renames:
+                current_source = resource.read()
+                if current_source[offset:offset + len(old_name)] != old_name:
+                    # A same-named identifier in another scope kept its name; re-index
+                    logging.debug(f"Re-indexing '{file_path}' to locate '{old_name}'")
+                    source_index = SourceIndex(current_source)
+                    applied_renames = []
+                    offset = source_index.definition_offset(old_name)
+                    if offset is None:
+                        logging.warning(f"Variable '{old_name}' is no longer assigned in the source code; skipping.")
+                        continue
+
+            lineno = source_index.lineno(offset)
+            # Initialize the Rename refactoring
+            rename = Rename(project, resource, offset)
+            changes = rename.get_changes(new_name)
+            project.do(changes)
+            project.sync()
+            logging.info(f"Successfully refactored variable '{old_name}' to '{new_name}' at line {lineno} using Rope.")
+
+            # Update refactored variables list
+            refactored_variables[variable_key] = new_name
+            applied_renames.append((old_name, new_name))
+            renamed_count += 1
+
+        except (BadIdentifierError, SyntaxError) as e:
+            logging.warning(f"Skipping variable '{old_name}' due to an error: {str(e)}")
+            continue
+        except Exception as e:
+            logging.error(f"Error refactoring variable '{old_name}' to '{new_name}': {str(e)}", exc_info=True)
+            continue
+
+    return renamed_count
 
-    finally:
-        # Close the project
-        project.close()
-        # Delete the lock file
-        logging.debug(f"Deleting lock file at {lock_file_path}")
-        os.remove(lock_file_path)
 
+def perform_variable_refactoring(findings, file_path, persistent_file_path):
+    logging.info(f"Starting variable refactoring for file: {file_path}")
 
-def _get_offset_from_lineno_col(source_code, lineno, col_offset, variable_name):
-    lines = source_code.splitlines(keepends=True)
-    if lineno - 1 >= len(lines):
-        raise ValueError(f"Line number {lineno} is out of range.")
-    line = lines[lineno - 1]
+    with refactor_lock():
+        # Load the list of already refactored variables
+        refactored_variables = _load_refactored_names(persistent_file_path)
 
-    # Use regex to find the exact position of the variable name in the line
-    pattern = r'\b' + re.escape(variable_name) + r'\b'
-    matches = list(re.finditer(pattern, line))
+        # Initialize the Rope project
+        project = Project(os.path.dirname(file_path))
+        try:
+            renamed_count = rename_variables_in_project(project, findings, file_path, refactored_variables)
+        finally:
+            # Close the project
+            project.close()
 
-    if not matches:
-        logging.warning(f"Variable name '{variable_name}' not found on line {lineno}.")
-        raise ValueError(f"Variable name '{variable_name}' not found on line {lineno}.")
-    
-    # Assume the first match is the variable definition
-    idx = matches[0].start()
+        if renamed_count:
+            # Save the updated refactored variables
+            _save_refactored_names(refactored_variables, persistent_file_path)
 
-    offset = sum(len(lines[i]) for i in range(lineno - 1)) + idx
-    return offset
 
+def replace_quoted_strings(source_code, replacements):
+    """
+    Replaces every single- or double-quoted occurrence of the keys of `replacements`
+    with the corresponding value in a single scan of the source code.
 
-class VariableDefVisitor(ast.NodeVisitor):
-    def __init__(self, target_variables):
-        self.target_variables = set(target_variables)
-        self.found_variables = []  # List of dicts with 'name', 'node', 'lineno', 'col_offset'
+    Args:
+        source_code (str): The source code to rewrite.
+        replacements (dict): Mapping of original string to replacement string.
 
-    def visit_Assign(self, node):
-        for target in node.targets:
-            self.process_target(target)
-        self.generic_visit(node)
+    Returns:
+        tuple: The rewritten source code and a dict of per-name replacement counts.
+    """
+    counts = {old_string: 0 for old_string in replacements}
+    if not replacements:
+        return source_code, counts
+
+    # Longest names first so that a name is never shadowed by one of its prefixes
+    alternation = "|".join(
+        re.escape(old_string)
+        for old_string in sorted(replacements, key=len, reverse=True)
+    )
+    pattern = re.compile(f"([\"'])({alternation})\\1")
 
-    def visit_AnnAssign(self, node):
-        self.process_target(node.target)
-        self.generic_visit(node)
+    def substitute(match):
+        quote, old_string = match.group(1), match.group(2)
+        counts[old_string] += 1
+        return f"{quote}{replacements[old_string]}{quote}"
 
-    def process_target(self, target):
-        if isinstance(target, ast.Name) and target.id in self.target_variables:
-            self.found_variables.append({
-                'name': target.id,
-                'node': target,
-                'lineno': target.lineno,
-                'col_offset': target.col_offset
-            })
-        elif isinstance(target, (ast.Tuple, ast.List)):
-            for elt in target.elts:
-                self.process_target(elt)
+    return pattern.sub(substitute, source_code), counts
 
 
 def perform_resource_refactoring(findings, file_path, persistent_file_path):
     logging.info(f"Starting resource refactoring for file: {file_path}")
-    lock_file_path = os.path.join(scratch_pad_dir, "refactor.lock")
-
-    # Wait until the lock file is deleted
-    while os.path.exists(lock_file_path):
-        logging.debug(f"Waiting for lock file {lock_file_path} to be deleted...")
-        time.sleep(1)
-
-    # Create the lock file
-    logging.debug(f"Creating lock file at {lock_file_path}")
-    with open(lock_file_path, "w") as file:
-        file.write("")
 
-    try:
+    with refactor_lock():
         # Load the list of already refactored strings
-        logging.debug(f"Loading refactored strings from {persistent_file_path}")
-        if os.path.exists(persistent_file_path):
-            with open(persistent_file_path, 'r') as f:
-                refactored_strings = json.load(f)
-        else:
-            refactored_strings = {}
+        refactored_strings = _load_refactored_names(persistent_file_path)
 
         # Read the source code
         with open(file_path, 'r') as file:
             source_code = file.read()
 
-        # Iterate over resource findings
+        # Collect the pending renames so the whole file can be rewritten in one scan
+        replacements = {}
         for finding in findings:
             old_string = finding.original_name
             new_string = finding.replacement_name
@@ -547,36 +735,12 @@ def perform_resource_refactoring(findings, file_path, persistent_file_path):
                 logging.info(f"String '{old_string}' has already been refactored; skipping.")
                 continue
 
-            # Escape special regex characters in old_string
-            escaped_old_string = re.escape(old_string)
-
-            # Replace the old string with the new one using regex to match exact words
-            
-            def create_double_quoted_pattern(escaped_string):
-                return f'"{escaped_string}"'
-            
-            def create_single_quoted_pattern(escaped_string):
-                return f"'{escaped_string}'"
-
-            old_pattern__double_quoted = create_double_quoted_pattern(escaped_old_string)
-            new_pattern__double_quoted = create_double_quoted_pattern(new_string)
-            old_pattern__single_quoted = create_single_quoted_pattern(escaped_old_string)
-            new_pattern__single_quoted = create_single_quoted_pattern(new_string)
-
-            num_replacements = 0
-            source_code, num_replacements_result1 = re.subn(
-                old_pattern__double_quoted,
-                new_pattern__double_quoted,
-                source_code,
-            )
-            source_code, num_replacements_result2 = re.subn(
-                old_pattern__single_quoted,
-                new_pattern__single_quoted,
-                source_code,
-            )
+            replacements[old_string] = new_string
 
-            num_replacements += num_replacements_result1 + num_replacements_result2
+        source_code, replacement_counts = replace_quoted_strings(source_code, replacements)
 
+        for old_string, new_string in replacements.items():
+            num_replacements = replacement_counts.get(old_string, 0)
             if num_replacements > 0:
                 logging.info(f"Refactored '{old_string}' to '{new_string}' in {num_replacements} places.")
                 refactored_strings[old_string] = new_string
@@ -584,18 +748,12 @@ def perform_resource_refactoring(findings, file_path, persistent_file_path):
                 logging.warning(f"No occurrences of '{old_string}' found.")
 
         # Write the modified source code back to the file
-        with open(file_path, 'w') as file:
-            file.write(source_code)
+        if any(replacement_counts.values()):
+            with open(file_path, 'w') as file:
+                file.write(source_code)
 
         # Save the updated refactored strings
-        logging.debug(f"Saving refactored strings to {persistent_file_path}")
-        with open(persistent_file_path, 'w') as f:
-            json.dump(refactored_strings, f, indent=4)
-
-    finally:
-        # Delete the lock file
-        logging.debug(f"Deleting lock file at {lock_file_path}")
-        os.remove(lock_file_path)
+        _save_refactored_names(refactored_strings, persistent_file_path)
 
 
 async def refactor(file_path: str) -> dict:
@@ -640,6 +798,7 @@ async def refactor(file_path: str) -> dict:
     logging.debug(f"Refactoring findings: {findings}")
 
     # Write the findings to a results file
+    scratch_pad_dir = get_scratch_pad_dir()
     os.makedirs(scratch_pad_dir, exist_ok=True)
     results_file_path = os.path.join(scratch_pad_dir, "refactoring_findings.json")
 
@@ -669,8 +828,8 @@ async def refactor(file_path: str) -> dict:
     logging.debug(f"Variable persistent file: {variable_persistent_file}")
     logging.debug(f"Resource persistent file: {resource_persistent_file}")
 
-    # Perform refactoring
-    perform_variable_refactoring(variable_findings, file_path, variable_persistent_file)
+    # Perform refactoring; the lock wait and Rope renames block, so they run in a worker thread
+    await asyncio.to_thread(perform_variable_refactoring, variable_findings, file_path, variable_persistent_file)
     # perform_resource_refactoring(resource_findings, file_path, resource_persistent_file)
 
     logging.info(f"Refactoring completed for file: {file_path}")
@@ -680,3 +839,144 @@ async def refactor(file_path: str) -> dict:
         "message": "Refactoring completed and findings written to scratchpad.",
         "results_file": results_file_path,
     }
+
+
+def discover_pulumi_programs(directory: str) -> List[str]:
+    """
+    Finds the Python files under `directory` that import a Pulumi package.
+
+    Args:
+        directory (str): The stack directory to search.
+
+    Returns:
+        List[str]: Sorted paths of the Pulumi program files.
+    """
+    program_paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRECTORIES]
+        for file_name in files:
+            if not file_name.endswith(".py"):
+                continue
+            path = os.path.join(root, file_name)
+            try:
+                with open(path, 'r') as file:
+                    content = file.read()
+            except (OSError, UnicodeDecodeError) as e:
+                logging.warning(f"Skipping unreadable file '{path}': {str(e)}")
+                continue
+            if pulumi_import_regex.search(content):
+                program_paths.append(path)
+    return sorted(program_paths)
+
+
+async def _analyze_file(file_path: str, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        start_time = time.perf_counter()
+        variable_findings, resource_findings = await asyncio.gather(
+            refactor_poorly_named_variables(file_path),
+            refactor_poorly_named_resources(file_path),
+        )
+        duration = time.perf_counter() - start_time
+    logging.info(f"Analyzed '{file_path}' in {duration:.4f} seconds")
+    return variable_findings, resource_findings, duration
+
+
+def _rename_stack_variables(directory, files_findings, timings_by_file, persistent_file_path):
+    with refactor_lock():
+        refactored_variables = _load_refactored_names(persistent_file_path)
+        project = Project(directory)
+        try:
+            for file_findings in files_findings:
+                start_time = time.perf_counter()
+                timing = timings_by_file[file_findings.file]
+                timing.variables_renamed = rename_variables_in_project(
+                    project,
+                    file_findings.variable_findings.findings,
+                    file_findings.file,
+                    refactored_variables,
+                    key_by_file=True,
+                )
+                timing.rename_seconds = round(time.perf_counter() - start_time, 4)
+        finally:
+            project.close()
+        _save_refactored_names(refactored_variables, persistent_file_path)
+
+
+async def refactor_stack(directory: str, max_concurrency: int = DEFAULT_MAX_CONCURRENT_FILES) -> dict:
+    """
+    Analyzes every Python Pulumi program in a stack directory concurrently, applies the
+    variable renames in a single Rope project so references across modules are updated,
+    and writes one consolidated findings file to the scratchpad directory.
+
+    Args:
+        directory (str): The path to the Pulumi stack directory.
+        max_concurrency (int): The maximum number of files analyzed at the same time.
+
+    Returns:
+        dict: A dictionary indicating success or failure.
+    """
+    logging.debug(f"Starting stack refactoring for directory: {directory}")
+
+    if not os.path.isdir(directory):
+        return {"status": "error", "message": f"Directory '{directory}' does not exist."}
+
+    file_paths = discover_pulumi_programs(directory)
+    if not file_paths:
+        return {"status": "error", "message": f"No Pulumi programs found in '{directory}'."}
+
+    logging.info(f"Found {len(file_paths)} Pulumi programs in '{directory}'")
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    analyses = await asyncio.gather(*(_analyze_file(path, semaphore) for path in file_paths))
+
+    stack_findings = StackRefactoringFindings(directory=directory, files=[], timings=[])
+    timings_by_file = {}
+    for file_path, (variable_findings, resource_findings, duration) in zip(file_paths, analyses):
+        timing = FileRefactoringTiming(file=file_path, analysis_seconds=round(duration, 4))
+        stack_findings.timings.append(timing)
+        timings_by_file[file_path] = timing
+
+        if variable_findings is None:
+            stack_findings.failed_files[file_path] = "Failed to analyze variables."
+            continue
+        if resource_findings is None:
+            stack_findings.failed_files[file_path] = "Failed to analyze resources."
+            continue
+
+        stack_findings.files.append(RefactoringFindings(
+            file=file_path,
+            language="python",
+            variable_findings=variable_findings,
+            resource_findings=resource_findings,
+        ))
+
+    # Apply all variable renames in one Rope project rooted at the stack directory; the lock
+    # wait and Rope renames block, so they run in a worker thread. Stack renames are keyed by
+    # file, so they are kept apart from the single-file tool's refactored_variables.json
+    scratch_pad_dir = get_scratch_pad_dir()
+    variable_persistent_file = os.path.join(scratch_pad_dir, "refactored_stack_variables.json")
+    await asyncio.to_thread(
+        _rename_stack_variables, directory, stack_findings.files, timings_by_file, variable_persistent_file
+    )
+
+    # Write the consolidated findings to a results file
+    os.makedirs(scratch_pad_dir, exist_ok=True)
+    results_file_path = os.path.join(scratch_pad_dir, "refactoring_findings.json")
+
+    logging.debug(f"Writing results to file: {results_file_path}")
+
+    try:
+        with open(results_file_path, 'w') as f:
+            f.write(stack_findings.model_dump_json(indent=4))
+    except Exception as e:
+        logging.error(f"Failed to write results file: {str(e)}")
+        return {"status": "error", "message": f"Failed to write results file: {str(e)}"}
+
+    logging.info(f"Stack refactoring completed for directory: {directory}")
+
+    return {
+        "status": "success" if not stack_findings.failed_files else "partial",
+        "message": f"Analyzed {len(stack_findings.files)} of {len(file_paths)} files and wrote findings to scratchpad.",
+        "results_file": results_file_path,
+        "failed_files": stack_findings.failed_files,
+    }
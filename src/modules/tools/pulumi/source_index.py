@@ -0,0 +1,153 @@
+import ast
+import io
+import logging
+import tokenize
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+
+class VariableDefVisitor(ast.NodeVisitor):
+    def __init__(self, target_variables=None):
+        # None collects every assigned name
+        self.target_variables = set(target_variables) if target_variables is not None else None
+        self.found_variables = []  # List of dicts with 'name', 'node', 'lineno', 'col_offset'
+
+    def visit_Assign(self, node):
+        for target in node.targets:
+            self.process_target(target)
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        self.process_target(node.target)
+        self.generic_visit(node)
+
+    def process_target(self, target):
+        if isinstance(target, ast.Name) and (self.target_variables is None or target.id in self.target_variables):
+            self.found_variables.append({
+                'name': target.id,
+                'node': target,
+                'lineno': target.lineno,
+                'col_offset': target.col_offset
+            })
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            for elt in target.elts:
+                self.process_target(elt)
+
+
+class SourceIndex:
+    """
+    Index of a Python source file built once and reused for every rename target.
+
+    Holds the character offset of each line start, the offsets of every identifier
+    token (from a single tokenize pass) and the assignment sites of every variable
+    (from a single AST walk). All offsets are character offsets, as used by Rope.
+    """
+
+    def __init__(self, source_code: str):
+        self.source_code = source_code
+        self.line_starts = self._build_line_starts(source_code)
+        self.occurrences = self._build_occurrences(source_code)
+        self.definitions = self._build_definitions(source_code)
+
+    @staticmethod
+    def _build_line_starts(source_code: str) -> List[int]:
+        line_starts = [0]
+        for line in source_code.splitlines(keepends=True):
+            line_starts.append(line_starts[-1] + len(line))
+        return line_starts
+
+    def _build_occurrences(self, source_code: str) -> Dict[str, List[int]]:
+        occurrences: Dict[str, List[int]] = {}
+        tokens = tokenize.generate_tokens(io.StringIO(source_code).readline)
+        for token in tokens:
+            if token.type == tokenize.NAME:
+                lineno, col = token.start
+                occurrences.setdefault(token.string, []).append(self.offset(lineno, col))
+        return occurrences
+
+    def _build_definitions(self, source_code: str) -> Dict[str, List[int]]:
+        visitor = VariableDefVisitor()
+        visitor.visit(ast.parse(source_code))
+
+        definitions: Dict[str, List[int]] = {}
+        for variable_info in visitor.found_variables:
+            offset = self.offset(variable_info['lineno'], self._char_col(variable_info['lineno'], variable_info['col_offset']))
+            definitions.setdefault(variable_info['name'], []).append(offset)
+        return definitions
+
+    def _char_col(self, lineno: int, byte_col: int) -> int:
+        # ast reports UTF-8 byte columns; Rope and tokenize work in characters
+        line = self.line(lineno)
+        if line.isascii():
+            return byte_col
+        return len(line.encode("utf-8")[:byte_col].decode("utf-8", errors="ignore"))
+
+    def line(self, lineno: int) -> str:
+        if not 1 <= lineno < len(self.line_starts):
+            raise ValueError(f"Line number {lineno} is out of range.")
+        return self.source_code[self.line_starts[lineno - 1]:self.line_starts[lineno]]
+
+    def offset(self, lineno: int, col: int) -> int:
+        """Returns the character offset of (lineno, col) in constant time."""
+        if not 1 <= lineno < len(self.line_starts):
+            raise ValueError(f"Line number {lineno} is out of range.")
+        return self.line_starts[lineno - 1] + col
+
+    def lineno(self, offset: int) -> int:
+        return bisect_left(self.line_starts, offset + 1)
+
+    def definition_offset(self, name: str) -> Optional[int]:
+        """Returns the offset of the first assignment to `name`, or None if it is never assigned."""
+        sites = self.definitions.get(name)
+        return sites[0] if sites else None
+
+    def is_valid_target(self, name: str) -> bool:
+        """True if `name` is assigned in the file and occurs as an identifier token."""
+        return name in self.definitions and name in self.occurrences
+
+    def validate_findings(self, findings) -> list:
+        """
+        Drops findings whose original name is not a real, assigned identifier in the file.
+
+        Args:
+            findings (List[NamingFinding]): The findings to validate.
+
+        Returns:
+            list: The findings that can be passed to Rope, at most one per name.
+        """
+        valid_findings = []
+        seen_names = set()
+        for finding in findings:
+            if finding.original_name in seen_names:
+                continue
+            if not self.is_valid_target(finding.original_name):
+                logging.warning(
+                    f"Variable '{finding.original_name}' is not assigned in the source code; skipping."
+                )
+                continue
+            seen_names.add(finding.original_name)
+            valid_findings.append(finding)
+        # Process in source order, like the AST walk
+        valid_findings.sort(key=lambda finding: self.definition_offset(finding.original_name))
+        return valid_findings
+
+    def shifted_offset(self, offset: int, applied_renames) -> int:
+        """
+        Maps an offset in the indexed source to its position after `applied_renames`.
+
+        Every occurrence of a renamed identifier before `offset` moves it by the length
+        difference. Callers must check the result against the current source, since Rope
+        only renames occurrences bound to the same variable.
+
+        Args:
+            offset (int): An offset in the indexed (original) source.
+            applied_renames (List[tuple]): (old_name, new_name) pairs applied since indexing.
+
+        Returns:
+            int: The estimated offset in the current source.
+        """
+        shifted = offset
+        for old_name, new_name in applied_renames:
+            renamed_before = bisect_left(self.occurrences.get(old_name, []), offset)
+            shifted += (len(new_name) - len(old_name)) * renamed_before
+        return shifted
@@ -0,0 +1,283 @@
+import asyncio
+import inspect
+import re
+import typing
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from ..session_context import current_tool_name
+
+# JSON schema types for plain parameter annotations
+JSON_SCHEMA_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    dict: "object",
+    list: "array",
+}
+
+# Google-style docstring headers that end the description or the Args section
+DOCSTRING_SECTIONS = ("Args:", "Returns:", "Raises:", "Yields:", "Examples:", "Note:")
+
+DOCSTRING_ARG_PATTERN = re.compile(r"^(\w+)\s*(?:\([^)]*\))?\s*:\s*(.*)$")
+
+
+class ToolConcurrency(str, Enum):
+    """Whether a tool call may overlap with other tool calls."""
+
+    # Reads state or only acts outside the scratch pad and memory
+    shared = "shared"
+    # Writes the scratch pad or memory, so it runs on its own
+    exclusive = "exclusive"
+
+
+class ToolSpec:
+    """
+    A registered tool: the function to call, its JSON schema and its execution metadata.
+
+    Args:
+        name (str): The name the model calls the tool by.
+        function (Callable): The async function that implements the tool.
+        description (str): The description sent to the model.
+        parameters (dict): JSON schema of the tool's keyword arguments.
+        timeout (Optional[float]): Seconds before a call is cancelled; None waits indefinitely.
+        concurrency (ToolConcurrency): Whether calls may run alongside other tool calls.
+        cacheable (bool): Whether a result can be reused for identical arguments.
+        speculate (Optional[Callable]): Hook starting work while the arguments stream in; it
+            receives the complete string arguments so far and returns the keys of the work
+            it started in the speculation cache, or None to be called again later.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        function: Callable,
+        description: str,
+        parameters: dict,
+        timeout: Optional[float] = None,
+        concurrency: ToolConcurrency = ToolConcurrency.exclusive,
+        cacheable: bool = False,
+        speculate: Optional[Callable[[Dict[str, str]], Optional[List[Hashable]]]] = None,
+    ):
+        self.name = name
+        self.function = function
+        self.description = description
+        self.parameters = parameters
+        self.timeout = timeout
+        self.concurrency = ToolConcurrency(concurrency)
+        self.cacheable = cacheable
+        self.speculate = speculate
+
+    async def call(self, arguments: dict) -> Any:
+        """
+        Calls the tool with its timeout.
+
+        Work done during the call, such as LLM requests, is attributed to the tool.
+
+        Raises:
+            asyncio.TimeoutError: If the call takes longer than the tool's timeout.
+        """
+        token = current_tool_name.set(self.name)
+        try:
+            result = self.function(**arguments)
+            # Coroutine functions and callables returning awaitables, such as a LazyTool
+            if inspect.isawaitable(result):
+                result = await asyncio.wait_for(result, self.timeout)
+            return result
+        finally:
+            current_tool_name.reset(token)
+
+    def realtime_schema(self) -> dict:
+        """The entry for the realtime API's session `tools`."""
+        return {
+            "type": "function",
+            "name": self.name,
+            "description": self.description,
+            "parameters": self.parameters,
+        }
+
+    def chat_schema(self) -> dict:
+        """The entry for the chat completions API's `tools`."""
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters,
+            },
+        }
+
+    def __repr__(self):
+        return f"ToolSpec({self.name}, timeout={self.timeout}, concurrency={self.concurrency.value})"
+
+
+def parse_docstring(function: Callable) -> Tuple[str, Dict[str, str]]:
+    """
+    Splits a Google-style docstring into its description and its Args descriptions.
+
+    Returns:
+        Tuple[str, Dict[str, str]]: The text before the first section, joined into one
+        line, and a map from argument name to its (joined) description.
+    """
+    lines = (inspect.getdoc(function) or "").splitlines()
+    description_lines = []
+    arguments: Dict[str, List[str]] = {}
+    section = None
+    current_argument = None
+    for line in lines:
+        stripped = line.strip()
+        if stripped in DOCSTRING_SECTIONS:
+            section = stripped
+            current_argument = None
+            continue
+        if section is None:
+            description_lines.append(stripped)
+        elif section == "Args:" and stripped:
+            match = DOCSTRING_ARG_PATTERN.match(stripped)
+            # Argument lines are indented once; deeper lines continue the previous argument
+            if match and (current_argument is None or len(line) - len(line.lstrip()) <= 4):
+                current_argument = match.group(1)
+                arguments[current_argument] = [match.group(2)]
+            elif current_argument is not None:
+                arguments[current_argument].append(stripped)
+    description = " ".join(line for line in description_lines if line)
+    return description, {name: " ".join(parts) for name, parts in arguments.items()}
+
+
+def annotation_schema(annotation: Any) -> dict:
+    """Returns the JSON schema for a parameter annotation."""
+    origin = typing.get_origin(annotation)
+    arguments = typing.get_args(annotation)
+    if origin is typing.Union:
+        # Optional[X] is just X: optional parameters are left out of `required` instead
+        options = [option for option in arguments if option is not type(None)]
+        if len(options) == 1:
+            return annotation_schema(options[0])
+        return {"anyOf": [annotation_schema(option) for option in options]}
+    if origin is typing.Literal:
+        return {"type": JSON_SCHEMA_TYPES.get(type(arguments[0]), "string"), "enum": list(arguments)}
+    if origin in (list, List):
+        return {"type": "array", "items": annotation_schema(arguments[0])} if arguments else {"type": "array"}
+    if origin in (dict, Dict):
+        return {"type": "object"}
+    if inspect.isclass(annotation) and issubclass(annotation, Enum):
+        return {"type": "string", "enum": [member.value for member in annotation]}
+    if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+        return annotation.model_json_schema()
+    # Any and unannotated parameters are passed as text
+    return {"type": JSON_SCHEMA_TYPES.get(annotation, "string")}
+
+
+def signature_schema(function: Callable, descriptions: Optional[Dict[str, str]] = None) -> dict:
+    """
+    Derives a tool's parameters schema from its signature and type hints.
+
+    Parameters without a default are required. Descriptions are taken from `descriptions`,
+    usually the Args section of the function's docstring.
+    """
+    function = inspect.unwrap(function)
+    descriptions = descriptions or {}
+    hints = typing.get_type_hints(function)
+    properties = {}
+    required = []
+    for name, parameter in inspect.signature(function).parameters.items():
+        if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+            continue
+        schema = annotation_schema(hints.get(name, Any))
+        if name in descriptions:
+            schema["description"] = descriptions[name]
+        properties[name] = schema
+        if parameter.default is inspect.Parameter.empty:
+            required.append(name)
+    return {"type": "object", "properties": properties, "required": required}
+
+
+class ToolRegistry:
+    """
+    Registry of the tools exposed to the model.
+
+    Tools register with the `tool` decorator (or `register`), which derives their schema
+    from the function's signature and docstring once. The payloads sent to the APIs are
+    built and serialized on first use and cached until another tool is registered.
+    """
+
+    def __init__(self):
+        self.specs: Dict[str, ToolSpec] = {}
+        self.cache: Dict[str, Any] = {}
+
+    def register(
+        self,
+        function: Callable,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        parameters: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        concurrency: ToolConcurrency = ToolConcurrency.exclusive,
+        cacheable: bool = False,
+        speculate: Optional[Callable[[Dict[str, str]], Optional[List[Hashable]]]] = None,
+    ) -> ToolSpec:
+        """
+        Registers a tool.
+
+        `description` and `parameters` default to the function's docstring and signature;
+        pass them explicitly for functions that cannot be inspected without importing
+        them, such as a LazyTool.
+
+        Raises:
+            ValueError: If a tool with the same name is already registered.
+        """
+        name = name or function.__name__
+        if name in self.specs:
+            raise ValueError(f"Tool '{name}' is already registered.")
+        docstring_description, argument_descriptions = parse_docstring(function)
+        spec = ToolSpec(
+            name=name,
+            function=function,
+            description=description if description is not None else docstring_description,
+            parameters=parameters if parameters is not None else signature_schema(function, argument_descriptions),
+            timeout=timeout,
+            concurrency=concurrency,
+            cacheable=cacheable,
+            speculate=speculate,
+        )
+        self.specs[name] = spec
+        self.cache.clear()
+        return spec
+
+    def tool(self, **options) -> Callable:
+        """Decorator form of `register`; returns the function unchanged."""
+
+        def decorator(function: Callable) -> Callable:
+            self.register(function, **options)
+            return function
+
+        return decorator
+
+    def get(self, name: str) -> Optional[ToolSpec]:
+        return self.specs.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.specs
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def cached(self, key: str, build: Callable[[], Any]) -> Any:
+        if key not in self.cache:
+            self.cache[key] = build()
+        return self.cache[key]
+
+    def realtime_tools(self) -> List[dict]:
+        """The realtime session `tools` list. Shared between callers, so do not modify it."""
+        return self.cached("realtime_tools", lambda: [spec.realtime_schema() for spec in self.specs.values()])
+
+    def chat_tools(self) -> List[dict]:
+        """The chat completions `tools` list. Shared between callers, so do not modify it."""
+        return self.cached("chat_tools", lambda: [spec.chat_schema() for spec in self.specs.values()])
+
+
+# Tools register here when their module is imported; see src.modules.tools.load_default_tools
+tool_registry = ToolRegistry()
@@ -0,0 +1,210 @@
+import json
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from .metrics import MetricsRecorder, metrics
+
+REALTIME_TRACE_JSONL = "realtime_turn_traces.jsonl"
+REALTIME_TRACE_CHROME = "realtime_turn_traces.trace.json"
+
+
+def now_us() -> float:
+    return time.perf_counter() * 1_000_000
+
+
+class SpanJsonlExporter:
+    """Appends one JSON line per span or mark, with times relative to the turn start."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def export(self, turns: List["Turn"]):
+        with open(self.file_path, "a") as file:
+            for turn in turns:
+                self._write_turn(file, turn)
+
+    def _write_turn(self, file, turn: "Turn"):
+        for event in turn.events:
+            record = {
+                "turn_id": turn.turn_id,
+                "response_id": event["args"].get("response_id"),
+                "name": event["name"],
+                "start_ms": round((event["ts"] - turn.start_us) / 1000, 3),
+                "duration_ms": round(event.get("dur", 0) / 1000, 3),
+                "args": event["args"],
+            }
+            json.dump(record, file)
+            file.write("\n")
+
+
+class ChromeTraceExporter:
+    """
+    Appends events in the Chrome trace JSON array format (chrome://tracing, Perfetto).
+
+    The format allows the closing bracket to be omitted, so the file is opened with `[`
+    once and every turn just appends its events.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def export(self, turns: List["Turn"]):
+        is_new = not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0
+        with open(self.file_path, "a") as file:
+            if is_new:
+                file.write("[\n")
+            for turn in turns:
+                self._write_turn(file, turn)
+
+    def _write_turn(self, file, turn: "Turn"):
+        for event in turn.events:
+            chrome_event = {
+                "name": event["name"],
+                "cat": "realtime",
+                "ph": event["ph"],
+                "ts": round(event["ts"], 1),
+                "pid": os.getpid(),
+                "tid": turn.turn_id,
+                "args": event["args"],
+            }
+            if event["ph"] == "X":
+                chrome_event["dur"] = round(event["dur"], 1)
+            else:
+                chrome_event["s"] = "t"
+            file.write(json.dumps(chrome_event) + ",\n")
+
+
+class Turn:
+    """Spans and marks of one voice turn, from end of user speech to end of playback."""
+
+    def __init__(self, turn_id: str):
+        self.turn_id = turn_id
+        self.start_us = now_us()
+        self.response_ids: List[str] = []
+        self.events: List[dict] = []
+        self.open_spans: Dict[str, dict] = {}
+        self.seen_marks = set()
+
+    @property
+    def response_id(self) -> Optional[str]:
+        return self.response_ids[-1] if self.response_ids else None
+
+    def first_mark_us(self, name: str) -> Optional[float]:
+        for event in self.events:
+            if event["name"] == name:
+                return event["ts"]
+        return None
+
+
+class TurnTracer:
+    """
+    Records a latency breakdown of each realtime voice turn.
+
+    A turn starts at `speech_stopped` and ends when playback of its final response
+    finishes. A turn can span several responses (a function call response followed by
+    the answer), so each event carries the response id it belongs to. Finished turns are
+    handed to the exporters in batches by a background flusher, so `end_turn` does no file
+    I/O on the event loop, and the main latencies are also recorded in the shared metrics
+    recorder.
+    """
+
+    def __init__(self, exporters: Optional[list] = None):
+        self.exporters = exporters if exporters is not None else []
+        # Exporters receive lists of finished turns from the recorder's flusher thread
+        self.recorder = MetricsRecorder(exporters=self.exporters)
+        self.turn: Optional[Turn] = None
+
+    def start_turn(self) -> Turn:
+        if self.turn is not None:
+            self.end_turn(reason="superseded")
+        self.turn = Turn(uuid.uuid4().hex[:12])
+        self.mark("speech_stopped")
+        return self.turn
+
+    def bind_response(self, response_id: Optional[str]):
+        """Associates subsequent events with `response_id` (on response.created)."""
+        if self.turn is None:
+            # A response without preceding speech, e.g. from initial text prompts
+            self.start_turn()
+        if response_id and response_id not in self.turn.response_ids:
+            self.turn.response_ids.append(response_id)
+        self.mark("response.created")
+        self.start_span("response")
+
+    def mark(self, name: str, once_per_response: bool = False, **args):
+        """Records an instant event. With `once_per_response`, only the first one per response is kept."""
+        turn = self.turn
+        if turn is None:
+            return
+        if once_per_response:
+            key = (name, turn.response_id)
+            if key in turn.seen_marks:
+                return
+            turn.seen_marks.add(key)
+        turn.events.append({"name": name, "ph": "i", "ts": now_us(), "args": self._args(args)})
+
+    def start_span(self, name: str, **args):
+        turn = self.turn
+        if turn is None:
+            return
+        turn.open_spans[name] = {"name": name, "ph": "X", "ts": now_us(), "args": self._args(args)}
+
+    def end_span(self, name: str, **args):
+        turn = self.turn
+        if turn is None:
+            return
+        span = turn.open_spans.pop(name, None)
+        if span is None:
+            return
+        span["dur"] = now_us() - span["ts"]
+        span["args"].update(args)
+        turn.events.append(span)
+
+    def end_turn(self, reason: str = "playback_finished"):
+        turn = self.turn
+        if turn is None:
+            return
+        self.turn = None
+        end_us = now_us()
+        # Close spans left open by an interrupted turn
+        for span in turn.open_spans.values():
+            span["dur"] = end_us - span["ts"]
+            span["args"]["unfinished"] = True
+            turn.events.append(span)
+        turn.open_spans.clear()
+        turn.events.append({
+            "name": "turn",
+            "ph": "X",
+            "ts": turn.start_us,
+            "dur": end_us - turn.start_us,
+            "args": {"turn_id": turn.turn_id, "response_ids": turn.response_ids, "end_reason": reason},
+        })
+        turn.events.sort(key=lambda event: event["ts"])
+
+        self._record_metrics(turn, end_us)
+        if self.exporters:
+            self.recorder.emit(turn)
+
+    def flush(self):
+        """Writes finished turns to the exporters now, instead of on the next background flush."""
+        self.recorder.flush()
+
+    def _args(self, args: dict) -> dict:
+        return {"turn_id": self.turn.turn_id, "response_id": self.turn.response_id, **args}
+
+    def _record_metrics(self, turn: Turn, end_us: float):
+        metrics.record("realtime_turn", (end_us - turn.start_us) / 1_000_000)
+        for mark_name, metric_name in [
+            ("response.created", "realtime_time_to_response_created"),
+            ("first_text_delta", "realtime_time_to_first_text"),
+            ("first_audio_delta", "realtime_time_to_first_audio"),
+        ]:
+            mark_us = turn.first_mark_us(mark_name)
+            if mark_us is not None:
+                metrics.record(metric_name, (mark_us - turn.start_us) / 1_000_000)
+
+
+def default_turn_tracer() -> TurnTracer:
+    return TurnTracer(exporters=[SpanJsonlExporter(REALTIME_TRACE_JSONL), ChromeTraceExporter(REALTIME_TRACE_CHROME)])
@@ -4,18 +4,16 @@ import json
 import os
 import logging
 import asyncio
-from datetime import datetime
 from enum import Enum
-import pyaudio
-from firecrawl import FirecrawlApp
 import tempfile
 import subprocess
+from .lazy import lazy_import
+from .metrics import metrics, RUN_TIME_TABLE_LOG_JSON
 
-RUN_TIME_TABLE_LOG_JSON = "runtime_time_table.jsonl"
+firecrawl = lazy_import("firecrawl")
 
-# Audio recording parameters
+# Audio recording parameters (FORMAT is resolved on first access, see __getattr__)
 CHUNK = 1024
-FORMAT = pyaudio.paInt16
 CHANNELS = 1
 RATE = 24000
 
@@ -42,66 +40,55 @@ def timeit_decorator(func):
     @functools.wraps(func)
     async def async_wrapper(*args, **kwargs):
         start_time = time.perf_counter()
-        result = await func(*args, **kwargs)
-        end_time = time.perf_counter()
-        duration = round(end_time - start_time, 4)
-        print(f"⏰ {func.__name__}() took {duration:.4f} seconds")
-
-        jsonl_file = RUN_TIME_TABLE_LOG_JSON
-
-        # Create new time record
-        time_record = {
-            "timestamp": datetime.now().isoformat(),
-            "function": func.__name__,
-            "duration": f"{duration:.4f}",
-        }
-
-        # Append the new record to the JSONL file
-        with open(jsonl_file, "a") as file:
-            json.dump(time_record, file)
-            file.write("\n")
-
-        return result
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            metrics.record(func.__name__, time.perf_counter() - start_time)
 
     @functools.wraps(func)
     def sync_wrapper(*args, **kwargs):
         start_time = time.perf_counter()
-        result = func(*args, **kwargs)
-        end_time = time.perf_counter()
-        duration = round(end_time - start_time, 4)
-        print(f"⏰ {func.__name__}() took {duration:.4f} seconds")
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.record(func.__name__, time.perf_counter() - start_time)
 
-        jsonl_file = RUN_TIME_TABLE_LOG_JSON
+    return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
 
-        # Create new time record
-        time_record = {
-            "timestamp": datetime.now().isoformat(),
-            "function": func.__name__,
-            "duration": f"{duration:.4f}",
-        }
 
-        # Append the new record to the JSONL file
-        with open(jsonl_file, "a") as file:
-            json.dump(time_record, file)
-            file.write("\n")
+def load_personalization_settings() -> dict:
+    """Reads the personalization file and derives the settings that depend on it."""
+    personalization_file = os.getenv("PERSONALIZATION_FILE", "./personalization.json")
+    with open(personalization_file, "r") as f:
+        personalization = json.load(f)
 
-        return result
+    ai_assistant_name = os.getenv("AI_ASSISTANT_NAME", personalization.get("ai_assistant_name", "Assistant"))
+    human_name = os.getenv("AI_ASSISTANT_HUMAN_NAME", personalization.get("human_name", "User"))
+    return {
+        "personalization": personalization,
+        "ai_assistant_name": ai_assistant_name,
+        "human_name": human_name,
+        "SESSION_INSTRUCTIONS": (
+            f"You are {ai_assistant_name}, a helpful assistant. Respond to {human_name}. "
+            f"{personalization.get('system_message_suffix', '')}"
+        ),
+    }
 
-    return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
 
+def __getattr__(name):
+    # Deferred so importing utils needs neither PyAudio nor the personalization file
+    if name == "FORMAT":
+        import pyaudio
 
-# Load personalization settings
-personalization_file = os.getenv("PERSONALIZATION_FILE", "./personalization.json")
-with open(personalization_file, "r") as f:
-    personalization = json.load(f)
+        globals()["FORMAT"] = pyaudio.paInt16
+        return pyaudio.paInt16
+    if name in ("personalization", "ai_assistant_name", "human_name", "SESSION_INSTRUCTIONS"):
+        settings = load_personalization_settings()
+        globals().update(settings)
+        return settings[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-ai_assistant_name = os.getenv("AI_ASSISTANT_NAME", personalization.get("ai_assistant_name", "Assistant"))
-human_name = os.getenv("AI_ASSISTANT_HUMAN_NAME", personalization.get("human_name", "User"))
 
-SESSION_INSTRUCTIONS = (
-    f"You are {ai_assistant_name}, a helpful assistant. Respond to {human_name}. "
-    f"{personalization.get('system_message_suffix', '')}"
-)
 PREFIX_PADDING_MS = 300
 SILENCE_THRESHOLD = 0.5
 SILENCE_DURATION_MS = 700
@@ -134,7 +121,7 @@ def scrap_url(url: str, formats: list = ["markdown", "html"]) -> dict:
     api_key = os.getenv("FIRECRAWL_API_KEY")
     if not api_key:
         raise ValueError("FIRECRAWL_API_KEY environment variable not set")
-    app = FirecrawlApp(api_key=api_key)
+    app = firecrawl.FirecrawlApp(api_key=api_key)
     scrape_status = app.scrape_url(url, params={"formats": formats})
     return scrape_status
 
@@ -154,12 +141,15 @@ def scrap_url_clean(url: str) -> str:
     return scrape_result["markdown"]
 
 
-def run_uv_script(python_code: str) -> str:
+def run_uv_script(python_code: str, timeout: float = 120) -> str:
     """
     Create a temporary Python script with the given code and run it using Astral UV.
     Returns the response from running the script.
 
+    Blocks the calling thread; async callers should use `execution.run_uv_script_async`.
+
     :param python_code: A Python code snippet as a string.
+    :param timeout: Seconds before the script is killed.
     :return: The response from running the script.
     """
     # Create a temporary file to hold the Python script
@@ -173,12 +163,14 @@ def run_uv_script(python_code: str) -> str:
 
     try:
         # Run the uv command and capture the output
-        result = subprocess.run(uv_command, capture_output=True, text=True)
+        result = subprocess.run(uv_command, capture_output=True, text=True, timeout=timeout)
 
         # Return the stdout and stderr from the uv execution
         return result.stdout + result.stderr
+    except subprocess.TimeoutExpired:
+        return f"Error: script timed out after {timeout} seconds"
     except Exception as e:
         return str(e)
     finally:
         # Cleanup: remove the temporary file after execution
-        temp_file.close()
+        os.remove(temp_file_path)
@@ -0,0 +1,103 @@
+from collections import deque
+
+import numpy as np
+
+LOCAL_VAD_FRAME_MS = 20
+
+# RMS of 16-bit samples below which a frame is never treated as speech
+LOCAL_VAD_MIN_RMS = 300.0
+
+# A frame is speech when its RMS exceeds the tracked noise floor by this factor
+LOCAL_VAD_NOISE_RATIO = 3.0
+
+# Consecutive speech frames needed to open a segment, to ignore clicks
+LOCAL_VAD_START_FRAMES = 3
+
+# Silence kept after speech on top of the server's silence duration, so server VAD still ends the turn
+LOCAL_VAD_TRAILING_MARGIN_MS = 200
+
+
+class EnergyVAD:
+    """
+    Energy-based voice activity gate for PCM16 mono audio.
+
+    Audio is split into fixed frames and compared against an adaptive noise floor.
+    Silence is dropped, except for `prefix_padding_ms` of audio before speech starts and
+    `silence_duration_ms` (plus a margin) after it stops, which is the silence the server's
+    VAD needs to detect the end of the turn.
+    """
+
+    def __init__(
+        self,
+        rate: int,
+        prefix_padding_ms: int,
+        silence_duration_ms: int,
+        frame_ms: int = LOCAL_VAD_FRAME_MS,
+        min_rms: float = LOCAL_VAD_MIN_RMS,
+        noise_ratio: float = LOCAL_VAD_NOISE_RATIO,
+        start_frames: int = LOCAL_VAD_START_FRAMES,
+    ):
+        self.frame_bytes = int(rate * frame_ms / 1000) * 2
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.start_frames = start_frames
+        self.trailing_frames = (silence_duration_ms + LOCAL_VAD_TRAILING_MARGIN_MS) // frame_ms
+        # Padding before the first speech frame, plus the frames that confirm speech
+        self.prefix = deque(maxlen=prefix_padding_ms // frame_ms + start_frames)
+        self.noise_floor = min_rms / noise_ratio
+        self.remainder = b""
+        self.in_speech = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def is_speech(self, frame: bytes) -> bool:
+        samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        speech = rms > max(self.min_rms, self.noise_floor * self.noise_ratio)
+        if not speech:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return speech
+
+    def process(self, audio_data: bytes) -> bytes:
+        """
+        Gates a chunk of captured audio.
+
+        Args:
+            audio_data (bytes): PCM16 mono audio of any length.
+
+        Returns:
+            bytes: The audio to send, possibly empty.
+        """
+        self.bytes_in += len(audio_data)
+        data = self.remainder + audio_data
+        usable = len(data) - len(data) % self.frame_bytes
+        self.remainder = data[usable:]
+
+        output = []
+        for start in range(0, usable, self.frame_bytes):
+            frame = data[start:start + self.frame_bytes]
+            speech = self.is_speech(frame)
+            if self.in_speech:
+                output.append(frame)
+                self.silence_run = 0 if speech else self.silence_run + 1
+                if self.silence_run >= self.trailing_frames:
+                    self.in_speech = False
+                    self.speech_run = 0
+            else:
+                self.prefix.append(frame)
+                self.speech_run = self.speech_run + 1 if speech else 0
+                if self.speech_run >= self.start_frames:
+                    output.extend(self.prefix)
+                    self.prefix.clear()
+                    self.in_speech = True
+                    self.silence_run = 0
+
+        sent = b"".join(output)
+        self.bytes_out += len(sent)
+        return sent
+
+    def savings(self) -> float:
+        """Fraction of captured bytes that were not sent."""
+        return 1 - self.bytes_out / self.bytes_in if self.bytes_in else 0.0
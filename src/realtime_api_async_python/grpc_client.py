@@ -14,15 +14,21 @@ async def run_text_prompt(prompt: str):
             response_iterator = stub.SendTextPrompt(
                 realtime_api_pb2.TextRequest(prompt=prompt)
             )
+            print("Assistant: ", end="", flush=True)
+            audio_bytes = 0
             async for response in response_iterator:
+                # Text arrives as deltas while the response is generated
                 if response.HasField('text'):
-                    print("Assistant:", response.text.text)
+                    print(response.text.text, end="", flush=True)
                 elif response.HasField('audio'):
-                    print("Received audio response")
+                    audio_bytes += len(response.audio.audio_data)
                 elif response.HasField('function_call'):
                     print("Function call:", response.function_call.function_name)
                 elif response.HasField('error'):
                     print("Error:", response.error.error_message)
+            print()
+            if audio_bytes:
+                print(f"Received {audio_bytes} bytes of audio")
         except Exception as e:
             logger.error(f"Error during gRPC call: {str(e)}")
 
@@ -41,12 +47,10 @@ def main():
     )
     args = parser.parse_args()
 
-    use_realtime_api = args.use_realtime_api or os.getenv("USE_REALTIME_API", "false").lower() == "true"
-
     if args.server:
         from .grpc_server import serve
         try:
-            asyncio.run(serve(use_realtime_api=use_realtime_api))
+            asyncio.run(serve())
         except KeyboardInterrupt:
             logger.info("gRPC server terminated by user")
         except Exception as e:
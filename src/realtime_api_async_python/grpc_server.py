@@ -1,61 +1,184 @@
 import asyncio
+import base64
 import grpc.aio
 from . import realtime_api_pb2, realtime_api_pb2_grpc
 from .main import RealtimeAPI
+from .session_manager import SessionManager, SessionLimitExceeded
+from src.modules.audio_io import NullAudioSink
 from src.modules.logging import logger
 
+# Server events carrying text of the current response
+TEXT_DELTA_EVENTS = ("response.text.delta", "response.audio_transcript.delta")
+
+# Responses buffered per stream before the upstream websocket reader is paused
+OUTBOUND_QUEUE_SIZE = 64
+
+# After the client stops sending audio, how long to wait for the remaining responses
+STREAM_DRAIN_TIMEOUT_SECONDS = 30.0
+
+TURN_DONE = object()
+
+# Queued once the session has closed or its assistant task has ended; nothing follows it
+SESSION_CLOSED = object()
+
+
+def create_session_assistant(mic, prompts=None):
+    # Audio goes back to the client, never to the server's speaker
+    return RealtimeAPI(prompts=prompts, mic=mic, speaker=NullAudioSink())
+
+
+def event_to_response(event, assistant):
+    """Maps an upstream server event to an APIResponse, or returns None for events the client does not need."""
+    event_type = event.get("type")
+    response = realtime_api_pb2.APIResponse()
+    if event_type in TEXT_DELTA_EVENTS:
+        response.text.text = event.get("delta", "")
+    elif event_type == "response.audio.delta":
+        response.audio.audio_data = base64.b64decode(event.get("delta", ""))
+    elif event_type == "response.function_call_arguments.done":
+        # The name arrives with response.output_item.added, which the assistant keeps
+        function_call = assistant.function_call or {}
+        response.function_call.function_name = event.get("name") or function_call.get("name", "")
+        response.function_call.arguments = event.get("arguments", "")
+        response.function_call.call_id = event.get("call_id", "")
+    elif event_type == "error":
+        response.error.error_message = event.get("error", {}).get("message", "")
+    else:
+        return None
+    return response
+
+
+class SessionEventStream:
+    """
+    Bounded bridge from a session's upstream events to one gRPC response stream.
+
+    The listener awaits space in the queue, so when the client reads slowly (gRPC flow
+    control holds back the response stream) the session's websocket reader pauses too,
+    instead of buffering without limit.
+    """
+
+    def __init__(self, session, maxsize: int = OUTBOUND_QUEUE_SIZE):
+        self.session = session
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        session.assistant.event_listeners.append(self.on_event)
+        session.close_listeners.append(self.on_session_closed)
+
+    def on_session_closed(self):
+        try:
+            self.queue.put_nowait(SESSION_CLOSED)
+        except asyncio.QueueFull:
+            # Delivered after the responses already queued
+            asyncio.ensure_future(self.queue.put(SESSION_CLOSED))
+
+    async def on_event(self, event):
+        if event.get("type") == "response.done":
+            output = event.get("response", {}).get("output", [])
+            # Tool-only responses are followed by the actual answer in the same turn
+            if not any(item.get("type") == "function_call" for item in output):
+                await self.queue.put(TURN_DONE)
+            return
+        response = event_to_response(event, self.session.assistant)
+        if response is not None:
+            await self.queue.put(response)
+
+    async def get(self, timeout=None):
+        if timeout is None:
+            return await self.queue.get()
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
 class RealtimeAPIServicer(realtime_api_pb2_grpc.RealtimeAPIServicer):
-    def __init__(self, use_realtime_api=True):
-        self.realtime_api = RealtimeAPI(prompts=None, use_realtime_api=use_realtime_api)
+    def __init__(self, session_manager=None):
+        # Every stream gets its own isolated session; see session_manager.RealtimeSession
+        self.session_manager = session_manager or SessionManager(create_session_assistant)
 
-    async def StreamAudio(self, request_iterator, context):
+    async def open_session(self, context, prompts=None):
+        try:
+            return await self.session_manager.create_session(prompts)
+        except SessionLimitExceeded as e:
+            logger.warning(f"Rejected session: {str(e)}")
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+
+    def end_with_session_closed(self, session, context):
+        message = f"Session {session.session_id} ended before the response was complete."
+        logger.warning(message)
+        context.set_code(grpc.StatusCode.UNAVAILABLE)
+        context.set_details(message)
+
+    async def consume_audio(self, session, request_iterator, inbound_done):
         try:
             async for audio_request in request_iterator:
-                audio_data = audio_request.audio_data
-                # Process audio data using realtime_api
-                self.realtime_api.mic.queue.put(audio_data)
-                
-                # Create response
-                response = realtime_api_pb2.APIResponse()
-                if hasattr(self.realtime_api, 'assistant_reply') and self.realtime_api.assistant_reply:
-                    response.text.text = self.realtime_api.assistant_reply
-                yield response
+                if session.closed:
+                    break
+                session.push_audio(audio_request.audio_data)
+        finally:
+            inbound_done.set()
+
+    async def StreamAudio(self, request_iterator, context):
+        session = await self.open_session(context)
+        events = SessionEventStream(session)
+        inbound_done = asyncio.Event()
+        # Inbound audio is read independently of the responses streamed back
+        reader = asyncio.create_task(self.consume_audio(session, request_iterator, inbound_done))
+        try:
+            while True:
+                try:
+                    item = await events.get(STREAM_DRAIN_TIMEOUT_SECONDS if inbound_done.is_set() else None)
+                except asyncio.TimeoutError:
+                    break
+                if item is SESSION_CLOSED:
+                    self.end_with_session_closed(session, context)
+                    return
+                if item is TURN_DONE:
+                    if inbound_done.is_set() and events.queue.empty():
+                        break
+                    continue
+                session.touch()
+                yield item
         except Exception as e:
             logger.error(f"Error in StreamAudio: {str(e)}")
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
             return
+        finally:
+            reader.cancel()
+            await self.session_manager.close_session(session.session_id)
 
     async def SendTextPrompt(self, request, context):
+        prompt = request.prompt
+        logger.info(f"Received text prompt: {prompt}")
+        session = await self.open_session(context, prompts=[prompt])
+        events = SessionEventStream(session)
         try:
-            prompt = request.prompt
-            logger.info(f"Received text prompt: {prompt}")
-            
-            # Initialize websocket connection if needed
-            if not hasattr(self.realtime_api, 'websocket'):
-                await self.realtime_api.run()
-            
-            # Send prompt to assistant
-            await self.realtime_api.send_initial_prompts([prompt])
-            
-            # Create and yield response
-            response = realtime_api_pb2.APIResponse()
-            response.text.text = self.realtime_api.assistant_reply
-            yield response
-            
+            while True:
+                item = await events.get()
+                if item is SESSION_CLOSED:
+                    self.end_with_session_closed(session, context)
+                    return
+                if item is TURN_DONE:
+                    return
+                session.touch()
+                yield item
         except Exception as e:
             logger.error(f"Error in SendTextPrompt: {str(e)}")
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
             return
+        finally:
+            await self.session_manager.close_session(session.session_id)
 
-async def serve(use_realtime_api=True):
+
+async def serve():
     server = grpc.aio.server()
-    realtime_api_pb2_grpc.add_RealtimeAPIServicer_to_server(
-        RealtimeAPIServicer(use_realtime_api=use_realtime_api),
-        server
-    )
+    servicer = RealtimeAPIServicer()
+    realtime_api_pb2_grpc.add_RealtimeAPIServicer_to_server(servicer, server)
     server.add_insecure_port('[::]:50051')
-    logger.info("Starting gRPC server on [::]:50051")
+    logger.info(
+        f"Starting gRPC server on [::]:50051 (max {servicer.session_manager.max_sessions} sessions)"
+    )
     await server.start()
-    await server.wait_for_termination()
+    servicer.session_manager.start()
+    try:
+        await server.wait_for_termination()
+    finally:
+        await servicer.session_manager.shutdown()
@@ -1,4 +1,5 @@
 import asyncio
+import inspect
 import os
 import json
 import websockets
@@ -12,17 +13,19 @@ from websockets.exceptions import ConnectionClosedError
 from src.modules.assistant import AssistantAPI
 from src.modules.logging import log_tool_call, log_error, log_info, log_warning, logger, log_ws_event
 from src.modules.async_microphone import AsyncMicrophone
-from src.modules.audio import play_audio
-from modules.tools.base.tools import (
-    self.function_map,
-    tools,
-)
+from src.modules.audio import AudioPlayer, PyAudioSink
+from src.modules.audio_io import WavFileSink, WavFileSource
+from src.modules.speculation import ArgumentSpeculator, speculation_cache
+from src.modules.tokens import token_usage
+from src.modules.tracing import default_turn_tracer
+from src.modules.vad import EnergyVAD
+from src.modules.tools import load_default_tools
 from src.modules.utils import (
-    RUN_TIME_TABLE_LOG_JSON,
     SESSION_INSTRUCTIONS,
     PREFIX_PADDING_MS,
     SILENCE_THRESHOLD,
     SILENCE_DURATION_MS,
+    RATE,
 )
 import sys
 
@@ -51,23 +54,29 @@ def base64_encode_audio(audio_bytes):
     return base64.b64encode(audio_bytes).decode("utf-8")
 
 
-def log_runtime(function_or_name: str, duration: float):
-    jsonl_file = RUN_TIME_TABLE_LOG_JSON
-    time_record = {
-        "timestamp": datetime.now().isoformat(),
-        "function": function_or_name,
-        "duration": f"{duration:.4f}",
-    }
-    with open(jsonl_file, "a") as file:
-        json.dump(time_record, file)
-        file.write("\n")
-
-    logger.info(f"⏰ {function_or_name}() took {duration:.4f} seconds")
-
-
 class RealtimeAPI(AssistantAPI):
-    def __init__(self, prompts=None):
-        super().__init__(prompts)
+    def __init__(self, prompts=None, debug=False, barge_in=False, local_vad=False, mic=None, speaker=None):
+        super().__init__(prompts, debug=debug, mic=mic)
+        self.tool_registry = load_default_tools()
+        self.tracer = default_turn_tracer()
+        # Starts tools' slow preparation (e.g. file selection) while their arguments stream in
+        self.speculator = ArgumentSpeculator(self.tool_registry, speculation_cache)
+
+        # AudioSink for finished responses; remote sessions pass a NullAudioSink and stream audio as events
+        self.speaker = speaker if speaker is not None else PyAudioSink()
+        # Callbacks (sync or async) receiving every server event, e.g. to forward it to a remote client
+        self.event_listeners = []
+
+        # Barge-in keeps the mic open during responses and streams playback so it can be interrupted
+        self.barge_in = barge_in
+        self.player = AudioPlayer() if barge_in else None
+        self.playback_task = None
+        # The response being generated, set on response.created; the one barge-in cancels
+        self.response_id = None
+        self.cancelled_response_ids = set()
+
+        # Optional local gate that drops silence before it is sent to the server
+        self.vad = EnergyVAD(RATE, PREFIX_PADDING_MS, SILENCE_DURATION_MS) if local_vad else None
 
     async def run(self):
         while True:
@@ -85,7 +94,7 @@ class RealtimeAPI(AssistantAPI):
                     ping_interval=30,
                     ping_timeout=10,
                 ) as websocket:
-                    log_info("✅ Connected to the server.", style="bold green")
+                    log_info(self.logger, "✅ Connected to the server.", style="bold green")
 
                     await self.initialize_session(websocket)
                     ws_task = asyncio.create_task(self.process_ws_messages(websocket))
@@ -127,35 +136,51 @@ class RealtimeAPI(AssistantAPI):
             finally:
                 self.mic.stop_recording()
                 self.mic.close()
+                self.speaker.close()
+                if self.player:
+                    self.player.close()
 
     async def handle_event(self, event, websocket):
         event_type = event.get("type")
         if event_type == "response.created":
-            self.mic.start_receiving()
+            self.response_id = event.get("response", {}).get("id")
+            self.tracer.bind_response(self.response_id)
+            if not self.barge_in:
+                self.mic.start_receiving()
             self.response_in_progress = True
         elif event_type == "response.output_item.added":
             await self.handle_output_item_added(event)
         elif event_type == "response.function_call_arguments.delta":
             self.function_call_args += event.get("delta", "")
+            if self.speculator.on_arguments_delta(event.get("call_id"), event.get("delta", "")):
+                self.tracer.mark("speculation_started", call_id=event.get("call_id"))
         elif event_type == "response.function_call_arguments.done":
+            self.tracer.mark("function_call_arguments.done", call_id=event.get("call_id"))
             await self.handle_function_call(event, websocket)
         elif event_type == "response.text.delta":
+            self.tracer.mark("first_text_delta", once_per_response=True)
             delta = event.get("delta", "")
             self.assistant_reply += delta
             print(f"Assistant: {delta}", end="", flush=True)
         elif event_type == "response.audio.delta":
-            self.audio_chunks.append(base64.b64decode(event["delta"]))
+            self.tracer.mark("first_audio_delta", once_per_response=True)
+            if self.barge_in:
+                self.handle_audio_delta(event)
+            else:
+                self.audio_chunks.append(base64.b64decode(event["delta"]))
         elif event_type == "response.done":
-            await self.handle_response_done()
+            await self.handle_response_done(event)
         elif event_type == "error":
             await self.handle_error(event, websocket)
         elif event_type == "input_audio_buffer.speech_started":
             logger.info("Speech detected, listening...")
+            if self.barge_in:
+                await self.handle_barge_in(websocket)
         elif event_type == "input_audio_buffer.speech_stopped":
             await self.handle_speech_stopped(websocket)
         elif event_type == "rate_limits.updated":
             self.response_in_progress = False
-            self.mic.is_recording = True
+            self.mic.start_recording()
             logger.info("Resumed recording after rate_limits.updated")
 
     async def handle_output_item_added(self, event):
@@ -163,6 +188,7 @@ class RealtimeAPI(AssistantAPI):
         if item.get("type") == "function_call":
             self.function_call = item
             self.function_call_args = ""
+            self.speculator.on_call_started(item.get("call_id"), item.get("name"))
 
     async def handle_function_call(self, event, websocket):
         if self.function_call:
@@ -179,21 +205,31 @@ class RealtimeAPI(AssistantAPI):
                 )
             except json.JSONDecodeError:
                 args = {}
+            self.speculator.on_arguments_done(call_id, args)
             await self.execute_function_call(function_name, call_id, args, websocket)
 
     async def execute_function_call(self, function_name, call_id, args, websocket):
-        if function_name in self.function_map:
+        spec = self.tool_registry.get(function_name)
+        if spec is not None:
+            self.tracer.start_span(f"tool:{function_name}", call_id=call_id)
             try:
-                result = await self.function_map[function_name](**args)
-                log_tool_call(function_name, args, result)
+                result = await spec.call(args)
+                log_tool_call(self.logger, function_name, args, result)
+            except asyncio.TimeoutError:
+                error_message = f"Function '{function_name}' timed out."
+                log_error(self.logger, error_message)
+                result = {"error": error_message}
+                await self.send_error_message_to_assistant(error_message, websocket)
             except Exception as e:
                 error_message = f"Error executing function '{function_name}': {str(e)}"
-                log_error(error_message)
+                log_error(self.logger, error_message)
                 result = {"error": error_message}
                 await self.send_error_message_to_assistant(error_message, websocket)
+            finally:
+                self.tracer.end_span(f"tool:{function_name}")
         else:
-            error_message = f"Function '{function_name}' not found. Add to function_map in tools.py."
-            log_error(error_message)
+            error_message = f"Function '{function_name}' not found. Register it with tool_registry.tool()."
+            log_error(self.logger, error_message)
             result = {"error": error_message}
             await self.send_error_message_to_assistant(error_message, websocket)
 
@@ -205,8 +241,9 @@ class RealtimeAPI(AssistantAPI):
                 "output": json.dumps(result),
             },
         }
-        log_ws_event("Outgoing", function_call_output)
+        log_ws_event(self.logger, "Outgoing", function_call_output)
         await websocket.send(json.dumps(function_call_output))
+        self.tracer.mark("function_output_sent", call_id=call_id)
         await websocket.send(json.dumps({"type": "response.create"}))
 
         # Reset function call state
@@ -222,34 +259,107 @@ class RealtimeAPI(AssistantAPI):
                 "content": [{"type": "text", "text": error_message}],
             },
         }
-        log_ws_event("Outgoing", error_item)
+        log_ws_event(self.logger, "Outgoing", error_item)
         await websocket.send(json.dumps(error_item))
 
-    async def handle_response_done(self):
+    async def handle_response_done(self, event=None):
+        response = (event or {}).get("response", {})
+        if response.get("id") == self.response_id:
+            self.response_id = None
+        # No audio of a response follows its response.done, so its cancellation can be forgotten
+        self.cancelled_response_ids.discard(response.get("id"))
+        if self.barge_in and response.get("status") == "cancelled":
+            # Barge-in already stopped playback and ended its turn; the user's next turn may have started since
+            return
+        self.tracer.end_span("response")
+        self.tracer.mark("response.done")
         if self.response_start_time is not None:
             response_end_time = time.perf_counter()
             response_duration = response_end_time - self.response_start_time
             self.log_runtime("realtime_api_response", response_duration)
             self.response_start_time = None
 
-        log_info("Assistant response complete.", style="bold blue")
+        log_info(self.logger, "Assistant response complete.", style="bold blue")
+        # A response that only called a tool is followed by another response in the same turn
+        output = response.get("output", [])
+        ends_turn = not any(item.get("type") == "function_call" for item in output)
+
+        if self.barge_in:
+            # Playback continues in the background so speech_started can still interrupt it
+            self.response_in_progress = False
+            self.assistant_reply = ""
+            self.playback_task = asyncio.create_task(self.finish_playback(ends_turn))
+            return
+
         if self.audio_chunks:
             audio_data = b"".join(self.audio_chunks)
             if self.logger.isEnabledFor(logging.DEBUG):
                 self.logger.debug(
-                    f"Sending {len(audio_data)} bytes of audio data to play_audio()"
+                    f"Sending {len(audio_data)} bytes of audio data to {type(self.speaker).__name__}"
                 )
-            await play_audio(audio_data)
+            self.tracer.start_span("playback", audio_bytes=len(audio_data))
+            await self.speaker.play(audio_data)
+            self.tracer.end_span("playback")
             if self.logger.isEnabledFor(logging.DEBUG):
-                self.logger.debug("Finished play_audio()")
+                self.logger.debug("Finished playback")
         self.assistant_reply = ""
         self.audio_chunks = []
         logger.info("Calling stop_receiving()")
         self.mic.stop_receiving()
 
+        if ends_turn:
+            self.tracer.end_turn()
+
+    def handle_audio_delta(self, event):
+        if event.get("response_id") in self.cancelled_response_ids:
+            # Audio already in flight when the response was cancelled
+            return
+        if not self.player.is_playing:
+            self.tracer.start_span("playback")
+        self.player.enqueue(base64.b64decode(event["delta"]), event.get("item_id"))
+
+    async def finish_playback(self, ends_turn):
+        await self.player.wait_until_done()
+        self.tracer.end_span("playback")
+        if ends_turn:
+            self.tracer.end_turn()
+
+    async def handle_barge_in(self, websocket):
+        """Cancels the in-flight response, stops playback and truncates the item to what was heard."""
+        if not self.response_in_progress and not self.player.is_playing:
+            return
+        logger.info("User started speaking, interrupting the assistant.")
+        self.tracer.mark("barge_in")
+
+        if self.response_in_progress:
+            if self.response_id:
+                self.cancelled_response_ids.add(self.response_id)
+            cancel_event = {"type": "response.cancel"}
+            log_ws_event(self.logger, "Outgoing", cancel_event)
+            await websocket.send(json.dumps(cancel_event))
+            self.response_in_progress = False
+            # Calls of the cancelled response will not complete
+            self.speculator.clear()
+
+        interrupted_item_id = self.player.stop()
+        if self.playback_task:
+            self.playback_task.cancel()
+            self.playback_task = None
+        if interrupted_item_id:
+            truncate_event = {
+                "type": "conversation.item.truncate",
+                "item_id": interrupted_item_id,
+                "content_index": 0,
+                "audio_end_ms": self.player.played_ms(interrupted_item_id),
+            }
+            log_ws_event(self.logger, "Outgoing", truncate_event)
+            await websocket.send(json.dumps(truncate_event))
+
+        self.tracer.end_turn(reason="barge_in")
+
     async def handle_error(self, event, websocket):
         error_message = event.get("error", {}).get("message", "")
-        log_error(f"Error: {error_message}")
+        log_error(self.logger, f"Error: {error_message}")
         if "buffer is empty" in error_message:
             logger.info("Received 'buffer is empty' error, no audio data sent.")
         elif "Conversation already has an active response" in error_message:
@@ -259,10 +369,13 @@ class RealtimeAPI(AssistantAPI):
             logger.error(f"Unhandled error: {error_message}")
 
     async def handle_speech_stopped(self, websocket):
-        self.mic.stop_recording()
+        if not self.barge_in:
+            self.mic.stop_recording()
         logger.info("Speech ended, processing...")
         self.response_start_time = time.perf_counter()
+        self.tracer.start_turn()
         await websocket.send(json.dumps({"type": "input_audio_buffer.commit"}))
+        self.tracer.mark("commit_sent")
 
     async def send_initial_prompts(self, websocket):
         logger.info(f"Sending {len(self.prompts)} prompts: {self.prompts}")
@@ -275,12 +388,12 @@ class RealtimeAPI(AssistantAPI):
                 "content": content,
             },
         }
-        log_ws_event("Outgoing", event)
+        log_ws_event(self.logger, "Outgoing", event)
         await websocket.send(json.dumps(event))
 
         # Trigger the assistant's response
         response_create_event = {"type": "response.create"}
-        log_ws_event("Outgoing", response_create_event)
+        log_ws_event(self.logger, "Outgoing", response_create_event)
         await websocket.send(json.dumps(response_create_event))
 
     async def send_audio_loop(self, websocket):
@@ -289,6 +402,8 @@ class RealtimeAPI(AssistantAPI):
                 await asyncio.sleep(0.1)  # Small delay to accumulate audio data
                 if not self.mic.is_receiving:
                     audio_data = self.mic.get_audio_data()
+                    if audio_data and self.vad:
+                        audio_data = self.vad.process(audio_data)
                     if audio_data and len(audio_data) > 0:
                         base64_audio = self.base64_encode_audio(audio_data)
                         if base64_audio:
@@ -296,7 +411,7 @@ class RealtimeAPI(AssistantAPI):
                                 "type": "input_audio_buffer.append",
                                 "audio": base64_audio,
                             }
-                            log_ws_event("Outgoing", audio_event)
+                            log_ws_event(self.logger, "Outgoing", audio_event)
                             await websocket.send(json.dumps(audio_event))
                         else:
                             logger.debug("No audio data to send")
@@ -305,6 +420,13 @@ class RealtimeAPI(AssistantAPI):
         except KeyboardInterrupt:
             logger.info("Keyboard interrupt received. Closing the connection.")
         finally:
+            if self.vad:
+                logger.info(
+                    f"Local VAD sent {self.vad.bytes_out} of {self.vad.bytes_in} captured bytes "
+                    f"({self.vad.savings():.0%} saved)"
+                )
+            if token_usage.stats:
+                logger.info(f"Tool LLM token usage: {json.dumps(token_usage.summary())}")
             self.exit_event.set()
             self.mic.stop_recording()
             self.mic.close()
@@ -325,10 +447,11 @@ class RealtimeAPI(AssistantAPI):
                     "prefix_padding_ms": PREFIX_PADDING_MS,
                     "silence_duration_ms": SILENCE_DURATION_MS,
                 },
-                "tools": tools,
+                # Built once per registry, not per session
+                "tools": self.tool_registry.realtime_tools(),
             },
         }
-        log_ws_event("Outgoing", session_update)
+        log_ws_event(self.logger, "Outgoing", session_update)
         await websocket.send(json.dumps(session_update))
 
     async def process_ws_messages(self, websocket):
@@ -336,10 +459,15 @@ class RealtimeAPI(AssistantAPI):
             try:
                 message = await websocket.recv()
                 event = json.loads(message)
-                log_ws_event("Incoming", event)
+                log_ws_event(self.logger, "Incoming", event)
+                for listener in self.event_listeners:
+                    result = listener(event)
+                    # Async listeners can apply backpressure by pausing this read loop
+                    if inspect.isawaitable(result):
+                        await result
                 await self.handle_event(event, websocket)
             except websockets.ConnectionClosed:
-                log_warning("⚠️ WebSocket connection lost.")
+                log_warning(self.logger, "⚠️ WebSocket connection lost.")
                 break
 
 
@@ -353,12 +481,31 @@ def main():
     )
     parser.add_argument("--prompts", type=str, help="Prompts separated by |")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument(
+        "--barge-in",
+        action="store_true",
+        help="Keep listening while the assistant speaks and interrupt it on user speech (use headphones to avoid echo)",
+    )
+    parser.add_argument(
+        "--local-vad",
+        action="store_true",
+        help="Drop silence locally and only send speech segments (with prefix padding) to the server",
+    )
+    parser.add_argument("--input-wav", type=str, help="Speak the contents of a 16-bit WAV file instead of using the microphone")
+    parser.add_argument("--output-wav", type=str, help="Write the assistant's audio to a WAV file instead of playing it")
     args = parser.parse_args()
 
     prompts = args.prompts.split("|") if args.prompts else None
 
     debug = args.debug
-    realtime_api_instance = RealtimeAPI(prompts, debug=debug)
+    realtime_api_instance = RealtimeAPI(
+        prompts,
+        debug=debug,
+        barge_in=args.barge_in,
+        local_vad=args.local_vad,
+        mic=WavFileSource(args.input_wav) if args.input_wav else None,
+        speaker=WavFileSink(args.output_wav) if args.output_wav else None,
+    )
     try:
         asyncio.run(realtime_api_instance.run())
     except KeyboardInterrupt:
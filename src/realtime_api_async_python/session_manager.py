@@ -0,0 +1,207 @@
+import asyncio
+import contextvars
+import os
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from src.modules.audio_io import StreamAudioSource
+from src.modules.logging import logger
+from src.modules.memory_management import MemoryManager
+from src.modules.metrics import metrics
+from src.modules.session_context import bind_session, get_scratch_pad_dir
+
+DEFAULT_MAX_SESSIONS = int(os.getenv("REALTIME_MAX_SESSIONS", "8"))
+
+# Sessions with no client activity for this long are closed by the reaper
+DEFAULT_IDLE_TIMEOUT_SECONDS = float(os.getenv("REALTIME_SESSION_IDLE_TIMEOUT_SECONDS", "300"))
+
+REAPER_INTERVAL_SECONDS = 10.0
+
+# Time a closing session gets to shut down its websocket before its task is cancelled
+SESSION_CLOSE_TIMEOUT_SECONDS = 5.0
+
+
+class SessionLimitExceeded(Exception):
+    """Raised when a session is requested while the server is full or shutting down."""
+
+
+class SessionMetrics(BaseModel):
+    session_id: str
+    started_at: float
+    last_activity: float
+    audio_chunks_in: int = 0
+    audio_bytes_in: int = 0
+    server_events: int = 0
+    responses: int = 0
+    function_calls: int = 0
+    errors: int = 0
+
+
+class RealtimeSession:
+    """
+    One isolated assistant session: its own RealtimeAPI, upstream websocket, scratch pad
+    and memory namespace.
+
+    The session's task runs in a copied context with the session bound, so tools executed
+    for it resolve the session's scratch pad and memory (see src.modules.session_context).
+    """
+
+    def __init__(self, session_id: str, assistant, scratch_pad_dir: str):
+        self.session_id = session_id
+        self.assistant = assistant
+        self.scratch_pad_dir = scratch_pad_dir
+        now = time.monotonic()
+        self.metrics = SessionMetrics(session_id=session_id, started_at=now, last_activity=now)
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+        # Called once when the session closes or its task ends, e.g. to end the client's stream
+        self.close_listeners: List[Callable[[], None]] = []
+        self.assistant.event_listeners.append(self.on_server_event)
+
+    def touch(self):
+        self.metrics.last_activity = time.monotonic()
+
+    def push_audio(self, audio_data: bytes):
+        self.touch()
+        self.metrics.audio_chunks_in += 1
+        self.metrics.audio_bytes_in += len(audio_data)
+        self.assistant.mic.push(audio_data)
+
+    def on_server_event(self, event: dict):
+        self.metrics.server_events += 1
+        event_type = event.get("type")
+        if event_type == "response.done":
+            self.metrics.responses += 1
+        elif event_type == "response.function_call_arguments.done":
+            self.metrics.function_calls += 1
+        elif event_type == "error":
+            self.metrics.errors += 1
+
+    def mark_closed(self):
+        if self.closed:
+            return
+        self.closed = True
+        for listener in self.close_listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Error in close listener of session {self.session_id}: {str(e)}")
+
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.metrics.last_activity
+
+    def start(self):
+        os.makedirs(self.scratch_pad_dir, exist_ok=True)
+        memory_manager = MemoryManager(os.path.join(self.scratch_pad_dir, "active_memory.json"))
+
+        def create_task():
+            bind_session(self.session_id, self.scratch_pad_dir, memory_manager)
+            return asyncio.create_task(self.assistant.run(), name=f"realtime-session-{self.session_id}")
+
+        self.task = contextvars.copy_context().run(create_task)
+        # The assistant ends on its own when its upstream websocket fails for good
+        self.task.add_done_callback(lambda task: self.mark_closed())
+
+    async def close(self):
+        self.mark_closed()
+        self.assistant.exit_event.set()
+        if self.task is not None and not self.task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self.task), SESSION_CLOSE_TIMEOUT_SECONDS)
+            except Exception:
+                self.task.cancel()
+        metrics.record("realtime_session", time.monotonic() - self.metrics.started_at)
+        logger.info(f"Session {self.session_id} closed: {self.metrics.model_dump()}")
+
+
+class SessionManager:
+    """
+    Creates, tracks and reaps realtime sessions.
+
+    Admission is limited to `max_sessions` concurrent sessions, and sessions idle for
+    longer than `idle_timeout` are closed by a background reaper.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[StreamAudioSource, Optional[List[str]]], object],
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.sessions: Dict[str, RealtimeSession] = {}
+        self.lock = asyncio.Lock()
+        self.accepting = True
+        self.reaper_task: Optional[asyncio.Task] = None
+        self.rejected_sessions = 0
+
+    def start(self):
+        if self.reaper_task is None:
+            self.reaper_task = asyncio.create_task(self._reap_loop())
+
+    async def create_session(self, prompts: Optional[List[str]] = None) -> RealtimeSession:
+        """
+        Admits and starts a new session.
+
+        Raises:
+            SessionLimitExceeded: If the server is full or shutting down.
+        """
+        async with self.lock:
+            if not self.accepting:
+                self.rejected_sessions += 1
+                raise SessionLimitExceeded("Server is shutting down.")
+            if len(self.sessions) >= self.max_sessions:
+                self.rejected_sessions += 1
+                raise SessionLimitExceeded(f"Maximum of {self.max_sessions} concurrent sessions reached.")
+            session_id = uuid.uuid4().hex[:12]
+            scratch_pad_dir = os.path.join(get_scratch_pad_dir(), "sessions", session_id)
+            session = RealtimeSession(session_id, self.session_factory(StreamAudioSource(), prompts), scratch_pad_dir)
+            self.sessions[session_id] = session
+        session.start()
+        logger.info(f"Session {session_id} started ({len(self.sessions)}/{self.max_sessions} active)")
+        return session
+
+    async def close_session(self, session_id: str):
+        async with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session is not None:
+            await session.close()
+
+    async def reap_idle_sessions(self) -> int:
+        idle_ids = [
+            session_id for session_id, session in list(self.sessions.items())
+            if session.idle_seconds() > self.idle_timeout or (session.task is not None and session.task.done())
+        ]
+        for session_id in idle_ids:
+            logger.info(f"Reaping session {session_id}")
+            await self.close_session(session_id)
+        return len(idle_ids)
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(REAPER_INTERVAL_SECONDS)
+            try:
+                await self.reap_idle_sessions()
+            except Exception as e:
+                logger.error(f"Error reaping sessions: {str(e)}")
+
+    def stats(self) -> dict:
+        return {
+            "active_sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "rejected_sessions": self.rejected_sessions,
+            "sessions": [session.metrics.model_dump() for session in self.sessions.values()],
+        }
+
+    async def shutdown(self):
+        self.accepting = False
+        if self.reaper_task is not None:
+            self.reaper_task.cancel()
+            self.reaper_task = None
+        for session_id in list(self.sessions):
+            await self.close_session(session_id)
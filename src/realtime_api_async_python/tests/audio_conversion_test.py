@@ -0,0 +1,38 @@
+import numpy as np
+
+from src.modules.audio_conversion import CaptureConverter, PlaybackConverter, Resampler
+
+
+def sine(rate, seconds=1.0, frequency=1000, amplitude=10000):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def test_streaming_matches_single_batch():
+    samples = sine(44100)
+    whole = Resampler(44100, 24000).process(samples)
+
+    resampler = Resampler(44100, 24000)
+    batches = [resampler.process(samples[start:start + 1234]) for start in range(0, len(samples), 1234)]
+
+    np.testing.assert_allclose(np.concatenate(batches), whole, atol=1e-3)
+    assert len(whole) == 24000
+
+
+def test_downsampling_removes_content_above_target_nyquist():
+    kept = Resampler(48000, 24000).process(sine(48000, frequency=1000))
+    aliased = Resampler(48000, 24000).process(sine(48000, frequency=20000))
+
+    assert abs(np.abs(kept[1000:-1000]).max() - 10000) < 100
+    assert np.abs(aliased[1000:-1000]).max() < 10
+
+
+def test_capture_and_playback_convert_device_formats():
+    stereo_48k = np.repeat(sine(48000, seconds=0.5), 2).astype(np.int16).tobytes()
+
+    mono_24k = CaptureConverter(48000, 2, 24000).convert(stereo_48k)
+    device_audio = PlaybackConverter(24000, 48000, 2).convert(mono_24k)
+
+    assert len(mono_24k) == 12000 * 2
+    assert len(device_audio) == len(stereo_48k)
+    assert CaptureConverter(24000, 1, 24000).convert(b"\x01\x02") == b"\x01\x02"
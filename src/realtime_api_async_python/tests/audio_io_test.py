@@ -0,0 +1,59 @@
+import asyncio
+import wave
+
+import numpy as np
+
+from src.modules.audio_io import NullAudioSource, StreamAudioSource, WavFileSink, WavFileSource
+
+
+def write_wav(path, rate, channels, seconds):
+    samples = np.zeros(int(rate * seconds) * channels, dtype=np.int16)
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(samples.tobytes())
+
+
+def test_wav_source_opens_lazily_and_converts_to_realtime_format(tmp_path):
+    wav_path = tmp_path / "input.wav"
+    write_wav(wav_path, 48000, 2, seconds=0.5)
+    source = WavFileSource(str(wav_path), realtime=False, trailing_silence_ms=100)
+
+    assert not source.is_open
+    assert source.get_audio_data() is None
+
+    source.start_recording()
+    audio = source.get_audio_data()
+
+    # 0.5 s + 0.1 s of trailing silence at 24 kHz mono PCM16
+    assert len(audio) == 24000 * 0.6 * 2
+    assert source.is_exhausted
+    assert source.get_audio_data() is None
+
+
+def test_stream_and_null_sources_gate_pushed_audio():
+    stream_source = StreamAudioSource()
+    null_source = NullAudioSource()
+
+    stream_source.push(b"\x01\x00")
+    for source in (stream_source, null_source):
+        source.start_recording()
+        source.push(b"\x02\x00")
+    stream_source.start_receiving()
+    stream_source.push(b"\x03\x00")
+
+    assert stream_source.get_audio_data() == b"\x02\x00"
+    assert null_source.get_audio_data() is None
+
+
+def test_wav_sink_writes_responses(tmp_path):
+    sink = WavFileSink(str(tmp_path / "output.wav"))
+
+    asyncio.run(sink.play(b"\x00\x00" * 2400))
+    asyncio.run(sink.play(b"\x00\x00" * 2400))
+    sink.close()
+
+    with wave.open(str(tmp_path / "output.wav"), "rb") as wav_file:
+        assert wav_file.getframerate() == 24000
+        assert wav_file.getnframes() == 4800
@@ -0,0 +1,103 @@
+import base64
+import json
+import os
+import queue
+import tempfile
+
+import pytest
+
+# main.py checks its environment and loads the personalization file at import time
+if not os.getenv("PERSONALIZATION_FILE"):
+    personalization_file = os.path.join(tempfile.mkdtemp(), "personalization.json")
+    with open(personalization_file, "w") as f:
+        json.dump({}, f)
+    os.environ["PERSONALIZATION_FILE"] = personalization_file
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SCRATCH_PAD_DIR", tempfile.mkdtemp())
+pytest.importorskip("pyaudio")
+
+from src.modules import tracing
+from src.modules.audio_io import NullAudioSink
+from src.modules.metrics import MetricsRecorder
+from src.modules.tracing import TurnTracer
+from src.realtime_api_async_python import main
+
+
+class FakeMic:
+    def stop_receiving(self):
+        pass
+
+
+class FakeConverter:
+    def convert(self, audio_data):
+        return audio_data
+
+    def reset(self):
+        pass
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+@pytest.fixture
+def api(monkeypatch):
+    # No trace files or runtime table are written
+    monkeypatch.setattr(main, "default_turn_tracer", TurnTracer)
+    monkeypatch.setattr(tracing, "metrics", MetricsRecorder())
+    return main.RealtimeAPI(barge_in=True, mic=FakeMic(), speaker=NullAudioSink())
+
+
+def start_playback(player, item_id, played_bytes, queued_chunks):
+    """Puts an AudioPlayer in the middle of playing `item_id`, without an output device."""
+    player.thread = object()
+    player.converter = FakeConverter()
+    # 24 kHz mono PCM16
+    player.bytes_per_ms = 48
+    player.current_item_id = item_id
+    player.played_bytes[item_id] = played_bytes
+    for _ in range(queued_chunks):
+        player.queue.put((player.generation, item_id, b"\0" * 4800))
+
+
+async def test_barge_in_cancels_the_response_and_truncates_to_the_played_audio(api):
+    websocket = FakeWebSocket()
+    api.tracer.start_turn()
+    await api.handle_event({"type": "response.created", "response": {"id": "resp_1"}}, websocket)
+    start_playback(api.player, "item_1", played_bytes=48 * 250, queued_chunks=2)
+
+    await api.handle_barge_in(websocket)
+
+    assert websocket.sent == [
+        {"type": "response.cancel"},
+        {"type": "conversation.item.truncate", "item_id": "item_1", "content_index": 0, "audio_end_ms": 250},
+    ]
+    assert not api.player.is_playing
+    assert not api.response_in_progress
+
+    # Audio of the cancelled response that was already in flight is dropped
+    api.handle_audio_delta({"response_id": "resp_1", "item_id": "item_1", "delta": base64.b64encode(b"\0" * 480).decode()})
+    with pytest.raises(queue.Empty):
+        api.player.queue.get_nowait()
+
+    # The cancelled response's response.done arrives after the user's next turn started
+    next_turn = api.tracer.start_turn()
+    await api.handle_response_done(
+        {"type": "response.done", "response": {"id": "resp_1", "status": "cancelled", "output": []}}
+    )
+    assert not api.cancelled_response_ids
+    assert api.response_id is None
+    assert api.tracer.turn is next_turn
+    assert api.playback_task is None
+
+
+async def test_barge_in_is_ignored_when_the_assistant_is_silent(api):
+    websocket = FakeWebSocket()
+
+    await api.handle_barge_in(websocket)
+
+    assert websocket.sent == []
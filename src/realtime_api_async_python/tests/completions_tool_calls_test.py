@@ -0,0 +1,87 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from src.completions_api_python.main import CompletionsAPI
+from src.modules import memory_management, tokens
+from src.modules.conversation import ConversationContext, SummaryCache
+from src.modules.memory_management import MemoryManager
+from src.modules.metrics import MetricsRecorder
+from src.modules.tokens import TokenUsageRecorder
+from src.modules.tools.registry import ToolConcurrency, ToolRegistry
+
+
+def chunk(content=None, tool_calls=None, finish_reason=None):
+    delta = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+def tool_call_delta(index, id=None, name=None, arguments=None):
+    return SimpleNamespace(index=index, id=id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+class FakeCompletions:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append({**kwargs, "messages": list(kwargs["messages"])})
+        chunks = self.responses.pop(0)
+
+        async def stream():
+            for item in chunks:
+                yield item
+
+        return stream()
+
+
+async def test_parallel_tool_calls_run_concurrently_and_are_answered_in_one_follow_up(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    # Usage is counted without writing the token usage file
+    monkeypatch.setattr(tokens, "token_usage", TokenUsageRecorder(MetricsRecorder()))
+    # Memory is kept out of the working directory
+    monkeypatch.setattr(memory_management, "default_memory_manager", MemoryManager(str(tmp_path / "active_memory.json")))
+    running = []
+    peak = []
+
+    async def lookup(city: str) -> dict:
+        """Looks up the weather for a city."""
+        running.append(city)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(city)
+        return {"city": city, "weather": "sunny"}
+
+    registry = ToolRegistry()
+    registry.register(lookup, concurrency=ToolConcurrency.shared)
+
+    # Two calls interleaved in one response, then the follow-up answer
+    completions = FakeCompletions([
+        [
+            chunk(tool_calls=[tool_call_delta(0, id="call_a", name="lookup", arguments='{"city": ')]),
+            chunk(tool_calls=[tool_call_delta(1, id="call_b", name="lookup", arguments='{"city": "Oslo"}')]),
+            chunk(tool_calls=[tool_call_delta(0, arguments='"Rome"}')]),
+            chunk(finish_reason="tool_calls"),
+        ],
+        [chunk(content="Both are sunny."), chunk(finish_reason="stop")],
+    ])
+    assistant = CompletionsAPI()
+    assistant.tool_registry = registry
+    assistant.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    conversation = ConversationContext(summary_cache=SummaryCache(str(tmp_path / "summaries.json")))
+    conversation.add_user_message("Weather in Rome and Oslo?")
+    reply = await assistant.stream_completion(conversation)
+    messages = conversation.turns[0]
+
+    assert reply.strip() == "Both are sunny."
+    assert max(peak) == 2
+    assert [call["function"]["arguments"] for call in messages[1]["tool_calls"]] == ['{"city": "Rome"}', '{"city": "Oslo"}']
+    assert [(message["tool_call_id"], json.loads(message["content"])["city"]) for message in messages[2:4]] == [
+        ("call_a", "Rome"),
+        ("call_b", "Oslo"),
+    ]
+    assert len(completions.requests) == 2
+    assert completions.requests[1]["messages"] == messages[:4]
+    assert messages[4] == {"role": "assistant", "content": "Both are sunny."}
@@ -0,0 +1,88 @@
+import asyncio
+
+from src.modules.conversation import ConversationContext, SummaryCache
+
+
+def add_turn(conversation, index):
+    conversation.add_user_message(f"question {index} " + "word " * 40)
+    conversation.add({"role": "assistant", "content": f"answer {index} " + "word " * 40})
+
+
+def new_conversation(tmp_path, summaries):
+    async def summarize(prompt):
+        summaries.append(prompt)
+        return f"summary {len(summaries)}"
+
+    return ConversationContext(
+        token_budget=400,
+        recent_turns=2,
+        summarize=summarize,
+        summary_cache=SummaryCache(str(tmp_path / "summaries.json")),
+    )
+
+
+async def test_payload_stays_bounded_and_old_turns_are_summarized(tmp_path):
+    summaries = []
+    conversation = new_conversation(tmp_path, summaries)
+    for index in range(6):
+        add_turn(conversation, index)
+
+    # Before the summary exists, the oldest turns are left out rather than exceeding the budget
+    messages = conversation.request_messages()
+    assert messages[-1]["content"].startswith("answer 5")
+    assert not any(message["content"].startswith("question 0") for message in messages)
+
+    conversation.schedule_compaction()
+    await conversation.compaction_task
+    assert conversation.summarized_turns == 4
+    assert "question 0" in summaries[0]
+
+    messages = conversation.request_messages()
+    assert messages[0] == {"role": "system", "content": "Summary of the earlier conversation:\nsummary 1"}
+    assert [message["content"].split()[:2] for message in messages[1::2]] == [["question", "4"], ["question", "5"]]
+
+
+async def test_persisted_summaries_are_reused(tmp_path):
+    summaries = []
+    for _ in range(2):
+        conversation = new_conversation(tmp_path, summaries)
+        for index in range(6):
+            add_turn(conversation, index)
+        conversation.schedule_compaction()
+        await conversation.compaction_task
+        assert conversation.summary == "summary 1"
+    assert len(summaries) == 1
+
+
+async def test_summary_is_used_when_it_cannot_be_cached(tmp_path, monkeypatch):
+    conversation = new_conversation(tmp_path, [])
+    for index in range(6):
+        add_turn(conversation, index)
+
+    def put(key, summary):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(conversation.summary_cache, "put", put)
+    conversation.schedule_compaction()
+    await conversation.compaction_task
+
+    assert conversation.summary == "summary 1"
+
+
+async def test_close_waits_for_a_cancelled_compaction(tmp_path):
+    started = asyncio.Event()
+
+    async def summarize(prompt):
+        started.set()
+        await asyncio.sleep(10)
+
+    conversation = new_conversation(tmp_path, [])
+    conversation.summarize = summarize
+    for index in range(6):
+        add_turn(conversation, index)
+    conversation.schedule_compaction()
+    await started.wait()
+
+    await conversation.close()
+
+    assert conversation.compaction_task.cancelled()
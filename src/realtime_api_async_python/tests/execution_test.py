@@ -0,0 +1,124 @@
+import os
+import sys
+
+from src.modules import execution
+from src.modules.execution import RunResult, UvEnvironmentPool, parse_script_dependencies, run_command
+
+
+def test_parse_script_dependencies():
+    python_code = '''# /// script
+# requires-python = ">=3.12"
+# dependencies = [
+#   "rich",
+#   "requests<3",
+# ]
+# ///
+import requests
+'''
+
+    assert parse_script_dependencies(python_code) == ("requests<3", "rich")
+    assert parse_script_dependencies("import os\n") == ()
+
+
+async def test_run_command_reports_exit_code_and_separate_streams():
+    result = await run_command(
+        [sys.executable, "-c", "import sys; print('out'); sys.stderr.write('Error: bad'); sys.exit(2)"]
+    )
+
+    assert result.exit_code == 2
+    assert not result.success
+    assert result.stdout == "out\n"
+    assert result.stderr == "Error: bad"
+
+
+async def test_run_command_success_ignores_error_text_in_output():
+    result = await run_command([sys.executable, "-c", "print('Error handling works')"])
+
+    assert result.success
+
+
+async def test_run_command_caps_output():
+    result = await run_command([sys.executable, "-c", "print('x' * 10000)"], max_output_bytes=100)
+
+    assert result.stdout_truncated_bytes == 10001 - 100
+    assert result.stdout.startswith("x" * 100)
+
+
+async def test_run_command_times_out():
+    result = await run_command([sys.executable, "-c", "import time; time.sleep(10)"], timeout=0.2)
+
+    assert result.timed_out
+    assert not result.success
+
+
+async def test_run_command_times_out_when_the_process_outlives_its_streams():
+    code = "import os, time; os.close(1); os.close(2); time.sleep(10)"
+    result = await run_command([sys.executable, "-c", code], timeout=0.5)
+
+    assert result.timed_out
+    assert result.wall_time < 5
+
+
+def fake_uv(commands, fail_install=False):
+    async def run(command, timeout):
+        commands.append(command[:3])
+        if command[1] == "venv":
+            os.makedirs(os.path.join(command[-1], "bin"))
+            open(os.path.join(command[-1], "bin", "python"), "w").close()
+        exit_code = 1 if fail_install and command[1] == "pip" else 0
+        return RunResult(run_id="run", command=command, exit_code=exit_code, timed_out=False, wall_time=0.0, stdout="", stderr="")
+
+    return run
+
+
+async def test_warm_script_environment_prepares_declared_dependencies(tmp_path, monkeypatch):
+    commands = []
+    monkeypatch.setattr(execution, "run_command", fake_uv(commands))
+    monkeypatch.setattr(execution, "uv_environment_pool", UvEnvironmentPool(str(tmp_path)))
+
+    assert execution.warm_script_environment("import os\n") is None
+    task = execution.warm_script_environment('# /// script\n# dependencies = ["rich"]\n# ///\nimport rich\n')
+    assert await task
+    assert commands == [["uv", "venv", "--quiet"], ["uv", "pip", "install"]]
+    assert not execution.warming_tasks
+
+
+async def test_environments_of_interrupted_installs_are_recreated(tmp_path, monkeypatch):
+    commands = []
+    monkeypatch.setattr(execution, "run_command", fake_uv(commands))
+    pool = UvEnvironmentPool(str(tmp_path), max_environments=2)
+    # An earlier process created the venv but died during `uv pip install`
+    environment_dir = tmp_path / pool._environment_dir_name(("rich",))
+    (environment_dir / "bin").mkdir(parents=True)
+    (environment_dir / "bin" / "python").write_text("")
+
+    assert await pool.get_python(("rich",)) == str(environment_dir / "bin" / "python")
+    assert commands == [["uv", "venv", "--quiet"], ["uv", "pip", "install"]]
+
+    # A finished environment is reused by the next process
+    commands.clear()
+    assert await UvEnvironmentPool(str(tmp_path)).get_python(("rich",)) is not None
+    assert commands == []
+
+
+async def test_failed_installs_leave_no_environment(tmp_path, monkeypatch):
+    monkeypatch.setattr(execution, "run_command", fake_uv([], fail_install=True))
+    pool = UvEnvironmentPool(str(tmp_path))
+
+    assert await pool.get_python(("rich",)) is None
+    assert os.listdir(tmp_path) == []
+
+
+async def test_environments_on_disk_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(execution, "run_command", fake_uv([]))
+    # Environments left by earlier processes, least recently used first
+    for index, name in enumerate(["old", "older_process", "recent"]):
+        (tmp_path / name).mkdir()
+        marker = tmp_path / name / execution.ENVIRONMENT_READY_MARKER
+        marker.write_text("")
+        os.utime(marker, (1000 + index, 1000 + index))
+    pool = UvEnvironmentPool(str(tmp_path), max_environments=2)
+
+    await pool.get_python(("rich",))
+
+    assert sorted(os.listdir(tmp_path)) == sorted(["recent", pool._environment_dir_name(("rich",))])
@@ -0,0 +1,45 @@
+from src.modules.file_reader import ChunkedFile, read_excerpt
+
+
+def write_log(path, lines):
+    path.write_text("".join(f"line {index:06d}\n" for index in range(lines)))
+    return str(path)
+
+
+def test_small_files_are_read_whole(tmp_path):
+    path = write_log(tmp_path / "small.log", 10)
+    content, metadata = read_excerpt(path, max_bytes=1024)
+    assert content == open(path).read()
+    assert metadata is None
+
+
+def test_large_files_are_previewed_with_a_chunk_index(tmp_path):
+    path = write_log(tmp_path / "large.log", 100_000)
+    chunked_file = ChunkedFile(path, chunk_bytes=64 * 1024)
+
+    preview = chunked_file.preview()
+    assert len(preview) < 20 * 1024
+    assert preview.startswith("line 000000\n")
+    assert preview.rstrip().endswith("line 099999")
+    assert "omitted ..." in preview
+    # Excerpts are cut on line breaks
+    assert all(line.startswith("line ") or "omitted" in line for line in preview.splitlines() if line)
+
+    chunks = chunked_file.chunks()
+    assert chunks[0][0] == 0 and chunks[-1][1] == chunked_file.size
+    assert all(previous[1] == current[0] for previous, current in zip(chunks, chunks[1:]))
+    assert "".join(chunked_file.read_chunk(index) for index in range(len(chunks))) == open(path).read()
+    assert len(chunked_file.metadata()["chunk_index"]) <= 32
+
+
+def test_files_without_line_breaks_are_cut_into_bounded_chunks(tmp_path):
+    path = tmp_path / "minified.json"
+    # Multi-byte characters must not be split at the cut
+    path.write_bytes(("a" + "é" * 500_000).encode("utf-8"))
+    chunked_file = ChunkedFile(str(path), chunk_bytes=64 * 1024)
+
+    chunks = chunked_file.chunks()
+    assert len(chunks) > 1
+    assert all(end - start <= 2 * 64 * 1024 for start, end in chunks)
+    assert chunks[-1][1] == chunked_file.size
+    assert all("�" not in chunked_file.read_chunk(index) for index in range(len(chunks)))
@@ -0,0 +1,48 @@
+from src.modules.tools.pulumi.findings_cache import (
+    NamingFindingsCache,
+    content_hash,
+    split_top_level_blocks,
+)
+
+
+SOURCE_CODE = '''import pulumi
+
+bucket_a = Bucket("a")
+
+
+@decorator
+def helper():
+    return 1
+'''
+
+
+def test_split_top_level_blocks_includes_decorators():
+    blocks = split_top_level_blocks(SOURCE_CODE)
+
+    assert [(block.start_line, block.end_line) for block in blocks] == [(1, 1), (3, 3), (6, 8)]
+    assert blocks[2].text.startswith("@decorator\n")
+    assert blocks[1].digest == content_hash('bucket_a = Bucket("a")\n')
+
+
+def test_split_top_level_blocks_digest_ignores_position():
+    shifted = "\n\n" + SOURCE_CODE
+
+    original_digests = [block.digest for block in split_top_level_blocks(SOURCE_CODE)]
+    shifted_digests = [block.digest for block in split_top_level_blocks(shifted)]
+
+    assert original_digests == shifted_digests
+
+
+def test_cache_round_trip_and_eviction(tmp_path):
+    cache_file = str(tmp_path / "cache.json")
+    cache = NamingFindingsCache(cache_file, max_entries=2)
+
+    cache.put("variables", "digest1", 1, "model", [{"original_name": "a"}])
+    cache.put("variables", "digest2", 1, "model", [])
+    cache.put("variables", "digest3", 1, "model", [])
+    cache.save()
+
+    reloaded = NamingFindingsCache(cache_file, max_entries=2)
+    assert reloaded.get("variables", "digest1", 1, "model") is None
+    assert reloaded.get("variables", "digest2", 1, "model") == []
+    assert reloaded.get("variables", "digest3", 2, "model") is None
@@ -0,0 +1,108 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+grpc = pytest.importorskip("grpc")
+# The protobuf modules are generated from realtime_api.proto at build time
+pytest.importorskip("src.realtime_api_async_python.realtime_api_pb2")
+
+from src.realtime_api_async_python import grpc_server
+from src.realtime_api_async_python.session_manager import SessionManager
+
+
+class FakeAssistant:
+    def __init__(self, mic, prompts=None):
+        self.mic = mic
+        self.prompts = prompts
+        self.exit_event = asyncio.Event()
+        self.event_listeners = []
+        self.function_call = None
+
+    async def run(self):
+        await self.exit_event.wait()
+
+    async def emit(self, event):
+        for listener in self.event_listeners:
+            result = listener(event)
+            if asyncio.iscoroutine(result):
+                await result
+
+
+class FakeContext:
+    def __init__(self):
+        self.code = None
+        self.details = None
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+
+@pytest.fixture
+def servicer(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRATCH_PAD_DIR", str(tmp_path))
+    return grpc_server.RealtimeAPIServicer(SessionManager(FakeAssistant))
+
+
+def test_event_to_response_maps_client_events():
+    assistant = SimpleNamespace(function_call={"name": "update_file"})
+
+    text = grpc_server.event_to_response({"type": "response.text.delta", "delta": "Hi"}, assistant)
+    call = grpc_server.event_to_response(
+        {"type": "response.function_call_arguments.done", "arguments": "{}", "call_id": "call_1"}, assistant
+    )
+
+    assert text.text.text == "Hi"
+    assert (call.function_call.function_name, call.function_call.call_id) == ("update_file", "call_1")
+    assert grpc_server.event_to_response({"type": "session.updated"}, assistant) is None
+
+
+async def test_stream_ends_with_an_error_when_the_session_closes_mid_stream(servicer):
+    client_done = asyncio.Event()
+
+    async def audio_requests():
+        yield SimpleNamespace(audio_data=b"\x01\x02")
+        # The client keeps its side of the stream open
+        await client_done.wait()
+
+    context = FakeContext()
+    responses = []
+
+    async def consume():
+        async for response in servicer.StreamAudio(audio_requests(), context):
+            responses.append(response)
+
+    rpc = asyncio.create_task(consume())
+    await asyncio.sleep(0.01)
+    (session,) = servicer.session_manager.sessions.values()
+    await session.assistant.emit({"type": "response.text.delta", "delta": "Hello"})
+    await asyncio.sleep(0)
+
+    # e.g. the reaper closing the session
+    await servicer.session_manager.close_session(session.session_id)
+    await asyncio.wait_for(rpc, 1)
+
+    assert [response.text.text for response in responses] == ["Hello"]
+    assert context.code == grpc.StatusCode.UNAVAILABLE
+    assert not servicer.session_manager.sessions
+    client_done.set()
+
+
+async def test_text_prompt_ends_when_the_assistant_task_finishes(servicer):
+    context = FakeContext()
+    rpc = asyncio.create_task(collect(servicer.SendTextPrompt(SimpleNamespace(prompt="hi"), context)))
+    await asyncio.sleep(0.01)
+    (session,) = servicer.session_manager.sessions.values()
+
+    # The assistant gives up, e.g. after its websocket failed
+    session.assistant.exit_event.set()
+
+    assert await asyncio.wait_for(rpc, 1) == []
+    assert context.code == grpc.StatusCode.UNAVAILABLE
+
+
+async def collect(stream):
+    return [response async for response in stream]
@@ -0,0 +1,34 @@
+import sys
+
+import pytest
+
+from src.modules.lazy import LazyTool, lazy_import
+
+
+def test_lazy_import_defers_execution_until_first_use(tmp_path, monkeypatch):
+    marker = tmp_path / "executed"
+    (tmp_path / "slow_dependency.py").write_text(f"open({str(marker)!r}, 'w').close()\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "slow_dependency", raising=False)
+
+    module = lazy_import("slow_dependency")
+    assert not marker.exists()
+
+    assert module.VALUE == 42
+    assert marker.exists()
+
+
+def test_missing_module_fails_on_use_only():
+    module = lazy_import("definitely_not_installed_module")
+
+    with pytest.raises(ModuleNotFoundError):
+        module.connect
+
+
+async def test_lazy_tool_imports_its_module_on_first_call():
+    tool = LazyTool("src.modules.session_context", "get_scratch_pad_dir")
+    assert tool.function is None
+
+    # Any async callable works; resolve() is what function maps rely on
+    assert tool.resolve().__name__ == "get_scratch_pad_dir"
+    assert tool.__name__ == "get_scratch_pad_dir"
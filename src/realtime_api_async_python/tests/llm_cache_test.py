@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+from src.modules import llm, tokens
+from src.modules.llm_cache import LLMResponseCache
+from src.modules.metrics import MetricsRecorder
+from src.modules.tokens import TokenUsageRecorder
+
+
+class FileNameResponse(BaseModel):
+    file_name: str
+
+
+def test_entries_expire_and_least_recently_used_are_evicted(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite"), ttl=60, max_bytes=25)
+    first = cache.key("gpt-4o", None, "first prompt\n")
+    assert first == cache.key("gpt-4o", None, "\nfirst prompt  \r\n")
+    assert first != cache.key("gpt-4o", FileNameResponse, "first prompt")
+
+    cache.put(first, "gpt-4o", "a" * 10)
+    cache.put(cache.key("gpt-4o", None, "second"), "gpt-4o", "b" * 10)
+    assert cache.get(first) == "a" * 10
+    # Over budget: the second entry is now the least recently used
+    cache.put(cache.key("gpt-4o", None, "third"), "gpt-4o", "c" * 10)
+
+    assert cache.get(cache.key("gpt-4o", None, "second")) is None
+    assert cache.get(first) == "a" * 10
+    assert cache.get(first, ttl=0) is None
+
+
+def test_indentation_is_part_of_the_key():
+    assert LLMResponseCache.key("gpt-4o", None, "if x:\n    y()") != LLMResponseCache.key("gpt-4o", None, "if x:\ny()")
+    assert LLMResponseCache.key("gpt-4o", None, "a = 1") != LLMResponseCache.key("gpt-4o", None, "a  =  1")
+
+
+def test_structured_output_prompt_reuses_cached_responses(tmp_path, monkeypatch):
+    calls = []
+
+    def parse(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(parsed=FileNameResponse(file_name="notes.txt"), refusal=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    client = SimpleNamespace(beta=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(parse=parse))))
+    monkeypatch.setattr(llm, "openai", SimpleNamespace(OpenAI=lambda api_key: client))
+    monkeypatch.setattr(llm, "llm_cache", LLMResponseCache(str(tmp_path / "cache.sqlite")))
+    # Usage is counted without writing the token usage file
+    monkeypatch.setattr(tokens, "token_usage", TokenUsageRecorder(MetricsRecorder()))
+
+    for _ in range(2):
+        response = llm.structured_output_prompt("Name this file", FileNameResponse, cache=True)
+        assert response == FileNameResponse(file_name="notes.txt")
+    llm.structured_output_prompt("Name this file", FileNameResponse)
+
+    assert len(calls) == 2
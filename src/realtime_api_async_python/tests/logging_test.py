@@ -0,0 +1,28 @@
+import logging
+
+from src.modules.logging import EventSampler, log_ws_event
+
+
+def test_sampler_counts_events_between_log_lines():
+    sampler = EventSampler(interval=60)
+
+    assert sampler.sample("append") == 1
+    assert [sampler.sample("append") for _ in range(3)] == [0, 0, 0]
+    assert sampler.sample("delta") == 1
+
+    sampler.interval = 0
+    assert sampler.sample("append") == 4
+
+
+def test_log_ws_event_samples_audio_appends(caplog):
+    logger = logging.getLogger("ws_event_test")
+    logger.setLevel(logging.DEBUG)
+
+    with caplog.at_level(logging.DEBUG, logger="ws_event_test"):
+        for _ in range(20):
+            log_ws_event(logger, "Outgoing", {"type": "input_audio_buffer.append"})
+        log_ws_event(logger, "Incoming", {"type": "response.done"})
+
+    messages = [str(record.msg) for record in caplog.records]
+    assert sum("input_audio_buffer.append" in message for message in messages) <= 1
+    assert any("response.done" in message for message in messages)
@@ -0,0 +1,46 @@
+import json
+
+from src.modules.metrics import JsonlExporter, MetricsRecorder
+
+
+def test_summary_reports_percentiles_per_name():
+    recorder = MetricsRecorder()
+    for duration in range(1, 101):
+        recorder.record("tool", duration / 100)
+    recorder.record("other", 0.5)
+
+    summary = recorder.summary()
+
+    assert summary["tool"]["count"] == 100
+    assert summary["tool"]["p50"] == 0.51
+    assert summary["tool"]["p95"] == 0.95
+    assert summary["tool"]["p99"] == 0.99
+    assert summary["other"]["count"] == 1
+    recorder.close()
+
+
+def test_flush_writes_batched_jsonl(tmp_path):
+    jsonl_file = tmp_path / "runtime.jsonl"
+    recorder = MetricsRecorder(exporters=[JsonlExporter(str(jsonl_file))], flush_interval=60)
+
+    recorder.record("first", 0.25)
+    recorder.record("second", 1.0)
+    assert not jsonl_file.exists()
+
+    recorder.flush()
+
+    records = [json.loads(line) for line in jsonl_file.read_text().splitlines()]
+    assert [(r["function"], r["duration"]) for r in records] == [("first", "0.2500"), ("second", "1.0000")]
+    recorder.close()
+
+
+def test_ring_buffer_drops_oldest_records():
+    recorder = MetricsRecorder(capacity=2, flush_interval=60)
+
+    for name in ["a", "b", "c"]:
+        recorder.record(name, 0.1)
+
+    assert [record["function"] for record in recorder.pending] == ["b", "c"]
+    assert recorder.dropped_records == 1
+    assert recorder.summary("a")["count"] == 1
+    recorder.close()
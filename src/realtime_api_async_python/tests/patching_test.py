@@ -0,0 +1,54 @@
+import pytest
+
+from src.modules import memory_management
+from src.modules.memory_management import MemoryManager
+from src.modules.patching import FileEdit, FilePatchResponse, PatchError, apply_edits
+from src.modules.tools.base import tools
+from src.modules.utils import ModelName
+
+
+def test_edits_are_applied_in_order():
+    content = "def greet():\n    return 'hi'\n\nprint(greet())\n"
+    edits = [
+        FileEdit(search="return 'hi'", replace="return 'hello'"),
+        FileEdit(search="print(greet())", replace="print(greet().upper())"),
+    ]
+    assert apply_edits(content, edits) == "def greet():\n    return 'hello'\n\nprint(greet().upper())\n"
+
+
+@pytest.mark.parametrize(
+    "edits",
+    [
+        [],
+        [FileEdit(search="", replace="x")],
+        [FileEdit(search="missing", replace="x")],
+        [FileEdit(search="a = 1", replace="a = 2")],
+    ],
+)
+def test_invalid_edits_are_rejected(edits):
+    with pytest.raises(PatchError):
+        apply_edits("a = 1\na = 1\n", edits)
+
+
+def test_patch_records_savings_and_falls_back_when_edits_do_not_apply(monkeypatch, tmp_path):
+    # Memory is kept out of the working directory
+    monkeypatch.setattr(memory_management, "default_memory_manager", MemoryManager(str(tmp_path / "active_memory.json")))
+    savings = []
+    monkeypatch.setattr(tools.token_usage, "record_savings", lambda saved, baseline: savings.append((saved, baseline)))
+    content = "line\n" * 200 + "total = 1\n"
+
+    monkeypatch.setattr(
+        tools,
+        "structured_output_prompt",
+        lambda *args, **kwargs: FilePatchResponse(edits=[FileEdit(search="total = 1", replace="total = 2")]),
+    )
+    update = tools.patch_file("set total to 2", "totals.py", content, "", ModelName.base_model)
+    assert update == {"content": "line\n" * 200 + "total = 2\n", "mode": "patch"}
+    assert savings[0][0] > 0
+
+    monkeypatch.setattr(
+        tools,
+        "structured_output_prompt",
+        lambda *args, **kwargs: FilePatchResponse(edits=[FileEdit(search="total = 3", replace="total = 2")]),
+    )
+    assert tools.patch_file("set total to 2", "totals.py", content, "", ModelName.base_model) is None
@@ -0,0 +1,150 @@
+import os
+
+# The refactor module builds an OpenAI client at import time; no request is made in these tests.
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import json
+
+from src.modules.tools.pulumi import refactor as refactor_module
+from src.modules.tools.pulumi.refactor import (
+    ResourceNamingFindingList,
+    VariableNamingFinding,
+    VariableNamingFindingList,
+    discover_pulumi_programs,
+    perform_variable_refactoring,
+    refactor_stack,
+    replace_quoted_strings,
+)
+
+
+def test_replace_quoted_strings_counts_per_name():
+    source_code = "a = Bucket(\"abc\")\nb = Bucket('abc')\nc = Bucket(\"xyz\")\n"
+
+    result, counts = replace_quoted_strings(source_code, {"abc": "logs", "xyz": "assets"})
+
+    assert result == "a = Bucket(\"logs\")\nb = Bucket('logs')\nc = Bucket(\"assets\")\n"
+    assert counts == {"abc": 2, "xyz": 1}
+
+
+def test_replace_quoted_strings_requires_matching_quotes_and_whole_string():
+    source_code = "a = \"abc'\nb = \"abcd\"\nc = abc\n"
+
+    result, counts = replace_quoted_strings(source_code, {"abc": "logs"})
+
+    assert result == source_code
+    assert counts == {"abc": 0}
+
+
+def test_replace_quoted_strings_prefers_longest_name():
+    result, counts = replace_quoted_strings('"ab" "abc"', {"ab": "x", "abc": "y"})
+
+    assert result == '"x" "y"'
+    assert counts == {"ab": 1, "abc": 1}
+
+
+def test_replace_quoted_strings_does_not_chain_replacements():
+    result, counts = replace_quoted_strings('"a" "b"', {"a": "b", "b": "c"})
+
+    assert result == '"b" "c"'
+    assert counts == {"a": 1, "b": 1}
+
+
+def write_program(path, body):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(body)
+    return str(path)
+
+
+def test_discover_pulumi_programs_skips_other_files_and_excluded_directories(tmp_path):
+    main = write_program(tmp_path / "__main__.py", "import pulumi\n")
+    storage = write_program(tmp_path / "infra" / "storage.py", "from pulumi_aws import s3\n")
+    write_program(tmp_path / "helpers.py", "import os\n")
+    write_program(tmp_path / ".venv" / "site.py", "import pulumi\n")
+    write_program(tmp_path / "README.md", "import pulumi\n")
+
+    assert discover_pulumi_programs(str(tmp_path)) == sorted([main, storage])
+
+
+async def test_naming_cache_only_requests_edited_blocks(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRATCH_PAD_DIR", str(tmp_path))
+    requested_sources = []
+
+    async def request_findings(source):
+        requested_sources.append(source)
+        findings = [
+            VariableNamingFinding(
+                severity=3, line_number=line_number, original_name=name, replacement_name=f"{name}_count", reason="Too short"
+            )
+            for line_number, line in enumerate(source.splitlines(), start=1)
+            for name in ("a", "b")
+            if line.startswith(f"{name} =")
+        ]
+        return VariableNamingFindingList(findings=findings)
+
+    def analyze(source):
+        return refactor_module._analyze_naming_with_cache("variables", source, request_findings, VariableNamingFindingList)
+
+    original = "import pulumi\na = 1\nb = 2\n"
+    first = await analyze(original)
+    assert [(finding.original_name, finding.line_number) for finding in first.findings] == [("a", 2), ("b", 3)]
+
+    # The unchanged file is served whole from the cache
+    await analyze(original)
+    assert requested_sources == [original]
+
+    # Only the edited block is sent; the cached finding of `b` moves with its block
+    edited = "import pulumi\na = (\n    1\n)\nb = 2\n"
+    merged = await analyze(edited)
+    assert requested_sources[1:] == ["a = (\n    1\n)\n"]
+    assert [(finding.original_name, finding.line_number) for finding in merged.findings] == [("a", 2), ("b", 5)]
+
+
+async def test_refactor_stack_renames_same_named_variables_in_each_file(tmp_path, monkeypatch):
+    stack = tmp_path / "stack"
+    scratch_pad = tmp_path / "scratchpad"
+    monkeypatch.setenv("SCRATCH_PAD_DIR", str(scratch_pad))
+    first = write_program(stack / "first.py", "import pulumi\nb = 1\npulumi.export('b', b)\n")
+    second = write_program(stack / "second.py", "import pulumi\nb = 2\npulumi.export('b', b)\n")
+    replacements = {first: "first_bucket", second: "second_bucket"}
+
+    async def variable_findings(file_path):
+        finding = VariableNamingFinding(
+            severity=3, line_number=2, original_name="b", replacement_name=replacements[file_path], reason="Too short"
+        )
+        return VariableNamingFindingList(findings=[finding])
+
+    async def resource_findings(file_path):
+        return ResourceNamingFindingList(findings=[])
+
+    monkeypatch.setattr(refactor_module, "refactor_poorly_named_variables", variable_findings)
+    monkeypatch.setattr(refactor_module, "refactor_poorly_named_resources", resource_findings)
+
+    result = await refactor_stack(str(stack))
+
+    assert result["status"] == "success"
+    assert open(first).read() == "import pulumi\nfirst_bucket = 1\npulumi.export('b', first_bucket)\n"
+    assert open(second).read() == "import pulumi\nsecond_bucket = 2\npulumi.export('b', second_bucket)\n"
+    with open(result["results_file"]) as f:
+        timings = json.load(f)["timings"]
+    assert [timing["variables_renamed"] for timing in timings] == [1, 1]
+    assert not (scratch_pad / "refactor.lock").exists()
+    with open(scratch_pad / "refactored_stack_variables.json") as f:
+        assert json.load(f) == {f"{first}:b": "first_bucket", f"{second}:b": "second_bucket"}
+
+    # A second run finds the renames recorded per file and leaves the sources alone
+    result = await refactor_stack(str(stack))
+    with open(result["results_file"]) as f:
+        timings = json.load(f)["timings"]
+    assert [timing["variables_renamed"] for timing in timings] == [0, 0]
+
+
+def test_single_file_renames_are_recorded_by_variable_name(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRATCH_PAD_DIR", str(tmp_path / "scratchpad"))
+    program = write_program(tmp_path / "stack" / "__main__.py", "import pulumi\nb = 1\npulumi.export('b', b)\n")
+    persistent_file = tmp_path / "refactored_variables.json"
+    finding = VariableNamingFinding(severity=3, line_number=2, original_name="b", replacement_name="bucket", reason="Too short")
+
+    perform_variable_refactoring([finding], program, str(persistent_file))
+
+    assert open(program).read() == "import pulumi\nbucket = 1\npulumi.export('b', bucket)\n"
+    assert json.loads(persistent_file.read_text()) == {"b": "bucket"}
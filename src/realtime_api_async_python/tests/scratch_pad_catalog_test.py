@@ -0,0 +1,53 @@
+import hashlib
+import os
+
+from src.modules import scratch_pad_catalog as catalog_module
+from src.modules.scratch_pad_catalog import ScratchPadCatalog, format_listing
+
+
+async def test_listing_describes_files_and_filters_by_extension(tmp_path):
+    scratch_pad = tmp_path / "scratchpad"
+    scratch_pad.mkdir()
+    (scratch_pad / "sales.csv").write_text("region,total\nnorth,10\n")
+    (scratch_pad / "report.sql").write_text("SELECT * FROM sales;\n")
+    (scratch_pad / "nested").mkdir()
+    catalog = ScratchPadCatalog(str(tmp_path / "catalog.sqlite"))
+
+    listing = format_listing(await catalog.scan(str(scratch_pad))).splitlines()
+    assert listing[0].startswith("report.sql (21 B, modified ")
+    assert listing[0].endswith("starts: SELECT * FROM sales;)")
+    assert listing[1].endswith("columns: region, total)")
+    assert [file["name"] for file in await catalog.scan(str(scratch_pad), [".csv"])] == ["sales.csv"]
+
+
+def test_refresh_only_rereads_changed_files(tmp_path, monkeypatch):
+    scratch_pad = tmp_path / "scratchpad"
+    scratch_pad.mkdir()
+    (scratch_pad / "a.py").write_text("print('a')\n")
+    (scratch_pad / "b.py").write_text("print('b')\n")
+    catalog = ScratchPadCatalog(str(tmp_path / "catalog.sqlite"))
+    catalog.refresh(str(scratch_pad))
+
+    described = []
+    describe_file = catalog_module.describe_file
+    monkeypatch.setattr(catalog_module, "describe_file", lambda path, size: described.append(os.path.basename(path)) or describe_file(path, size))
+    (scratch_pad / "a.py").write_text("print('changed')\n")
+    (scratch_pad / "b.py").unlink()
+
+    files = catalog.files(str(scratch_pad))
+    assert described == ["a.py"]
+    assert [(file["name"], file["first_lines"]) for file in files] == [("a.py", "print('changed')")]
+
+
+def test_large_files_are_hashed_on_request(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_module, "HASH_MAX_BYTES", 10)
+    scratch_pad = tmp_path / "scratchpad"
+    scratch_pad.mkdir()
+    (scratch_pad / "big.log").write_text("x" * 100)
+    catalog = ScratchPadCatalog(str(tmp_path / "catalog.sqlite"))
+
+    (entry,) = catalog.files(str(scratch_pad))
+    assert entry["sha256"] is None
+    digest = catalog.sha256(str(scratch_pad), "big.log")
+    assert digest == hashlib.sha256(b"x" * 100).hexdigest()
+    assert catalog.files(str(scratch_pad))[0]["sha256"] == digest
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from src.modules import memory_management
+from src.modules.memory_management import MemoryManager, memory_manager
+from src.modules.metrics import MetricsRecorder
+from src.realtime_api_async_python import session_manager
+from src.modules.session_context import get_scratch_pad_dir
+from src.realtime_api_async_python.session_manager import SessionLimitExceeded, SessionManager
+
+
+class FakeAssistant:
+    def __init__(self, mic, prompts=None):
+        self.mic = mic
+        self.prompts = prompts
+        self.exit_event = asyncio.Event()
+        self.event_listeners = []
+        self.seen_scratch_pad_dir = None
+
+    async def run(self):
+        self.mic.start_recording()
+        self.seen_scratch_pad_dir = get_scratch_pad_dir()
+        memory_manager.upsert("owner", self.seen_scratch_pad_dir)
+        await self.exit_event.wait()
+
+
+@pytest.fixture
+def scratch_pad(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCRATCH_PAD_DIR", str(tmp_path))
+    # Session durations are recorded without writing the runtime table
+    monkeypatch.setattr(session_manager, "metrics", MetricsRecorder())
+    # Memory is kept out of the working directory
+    monkeypatch.setattr(memory_management, "default_memory_manager", MemoryManager(str(tmp_path / "active_memory.json")))
+    return tmp_path
+
+
+async def test_sessions_are_isolated(scratch_pad):
+    manager = SessionManager(FakeAssistant, max_sessions=2)
+    first = await manager.create_session()
+    second = await manager.create_session()
+    await asyncio.sleep(0)
+
+    first.push_audio(b"\x01\x02")
+
+    assert first.assistant.mic.get_audio_data() == b"\x01\x02"
+    assert second.assistant.mic.get_audio_data() is None
+    assert first.assistant.seen_scratch_pad_dir != second.assistant.seen_scratch_pad_dir
+    assert (scratch_pad / "sessions" / first.session_id / "active_memory.json").exists()
+    assert get_scratch_pad_dir() == str(scratch_pad)
+    await manager.shutdown()
+
+
+async def test_admission_limit_and_idle_reaping(scratch_pad):
+    manager = SessionManager(FakeAssistant, max_sessions=1, idle_timeout=60)
+    session = await manager.create_session()
+
+    with pytest.raises(SessionLimitExceeded):
+        await manager.create_session()
+    assert manager.stats()["rejected_sessions"] == 1
+
+    session.metrics.last_activity -= 120
+    assert await manager.reap_idle_sessions() == 1
+    assert session.task.done()
+    assert manager.stats()["active_sessions"] == 0
+
+    await manager.create_session()
+    await manager.shutdown()
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from src.modules.tools.pulumi.source_index import SourceIndex
+
+
+SOURCE_CODE = '''import pulumi
+bucket = 1
+label = "é"; total = bucket + 1
+print(total)
+'''
+
+
+def finding(name):
+    return SimpleNamespace(original_name=name)
+
+
+def test_offsets_are_character_offsets():
+    index = SourceIndex(SOURCE_CODE)
+
+    total_offset = index.definition_offset("total")
+
+    assert SOURCE_CODE[total_offset:total_offset + len("total")] == "total"
+    assert index.lineno(total_offset) == 3
+    assert index.offset(2, 0) == SOURCE_CODE.index("bucket")
+
+
+def test_validate_findings_drops_unassigned_names():
+    index = SourceIndex(SOURCE_CODE)
+
+    valid = index.validate_findings([finding("total"), finding("pulumi"), finding("missing"), finding("bucket")])
+
+    assert [f.original_name for f in valid] == ["bucket", "total"]
+
+
+def test_shifted_offset_tracks_applied_renames():
+    index = SourceIndex(SOURCE_CODE)
+    renamed_source = SOURCE_CODE.replace("bucket", "logs_bucket")
+
+    offset = index.shifted_offset(index.definition_offset("total"), [("bucket", "logs_bucket")])
+
+    assert renamed_source[offset:offset + len("total")] == "total"
@@ -0,0 +1,63 @@
+import asyncio
+
+from src.modules.speculation import ArgumentSpeculator, SpeculationCache, complete_string_fields
+from src.modules.tools.registry import ToolRegistry
+
+
+def test_only_closed_string_fields_are_returned():
+    assert complete_string_fields('{"prompt": "update the') == {}
+    assert complete_string_fields('{"prompt": "say \\"hi\\"", "model": "fa') == {"prompt": 'say "hi"'}
+
+
+def make_speculator(started):
+    cache = SpeculationCache()
+
+    async def select(prompt):
+        started.append(prompt)
+        await asyncio.sleep(0.05)
+        return f"selected for {prompt}"
+
+    def speculate(arguments):
+        if "prompt" not in arguments:
+            return None
+        key = ("select", arguments["prompt"])
+        cache.start(key, lambda: select(arguments["prompt"]))
+        return [key]
+
+    async def update_file(prompt: str) -> dict:
+        """Updates a file."""
+        return {}
+
+    registry = ToolRegistry()
+    registry.register(update_file, speculate=speculate)
+    return ArgumentSpeculator(registry, cache), cache, select
+
+
+async def test_speculation_starts_on_partial_arguments_and_is_reused():
+    started = []
+    speculator, cache, select = make_speculator(started)
+
+    speculator.on_call_started("call_1", "update_file")
+    assert not speculator.on_arguments_delta("call_1", '{"prompt": "fix the ')
+    assert speculator.on_arguments_delta("call_1", 'readme"')
+    speculator.on_arguments_delta("call_1", "}")
+    await asyncio.sleep(0)
+    assert started == ["fix the readme"]
+
+    assert speculator.on_arguments_done("call_1", {"prompt": "fix the readme"})
+    result = await cache.result(("select", "fix the readme"), lambda: select("fix the readme"))
+    assert result == "selected for fix the readme"
+    assert started == ["fix the readme"] and cache.hits == 1
+
+
+async def test_speculation_is_cancelled_when_final_arguments_differ():
+    started = []
+    speculator, cache, _ = make_speculator(started)
+
+    speculator.on_call_started("call_1", "update_file")
+    speculator.on_arguments_delta("call_1", '{"prompt": "fix the readme"')
+    task = cache.tasks[("select", "fix the readme")]
+
+    assert speculator.on_arguments_done("call_1", {"prompt": "fix the changelog"}) is False
+    await asyncio.sleep(0)
+    assert task.cancelled() and not cache.tasks
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from src.modules.metrics import MetricsRecorder
+from src.modules.session_context import current_tool_name
+from src.modules.tokens import OTHER_SECTION, TokenUsageRecorder, count_prompt_sections, count_tokens
+
+
+class ListExporter:
+    def __init__(self):
+        self.records = []
+
+    def export(self, records):
+        self.records.extend(records)
+
+
+def test_prompt_tokens_are_split_by_section():
+    file_content = "line of code\n" * 50
+    prompt = f"<purpose>\nDiscuss the file.\n</purpose>\n\n<memory><notes>short</notes></memory>\n\n<file-content>\n{file_content}</file-content>"
+
+    sections = count_prompt_sections([{"role": "user", "content": prompt}])
+
+    assert sections["file-content"] == count_tokens(f"\n{file_content}")
+    assert sections["file-content"] > sections["memory"] > 0
+    assert set(sections) == {"purpose", "memory", "file-content", OTHER_SECTION}
+
+
+def test_usage_is_attributed_to_the_running_tool():
+    exporter = ListExporter()
+    recorder = TokenUsageRecorder(MetricsRecorder(exporters=[exporter]))
+    messages = [{"role": "user", "content": "<user-prompt>hello</user-prompt>"}]
+
+    token = current_tool_name.set("discuss_file")
+    try:
+        recorder.record("gpt-4o", messages, SimpleNamespace(prompt_tokens=12, completion_tokens=30), duration=0.5)
+    finally:
+        current_tool_name.reset(token)
+    recorder.record("gpt-4o", messages, call_site="scenario")
+    recorder.recorder.flush()
+
+    summary = recorder.summary()
+    assert summary["discuss_file"]["prompt_tokens"] == 12
+    assert summary["discuss_file"]["completion_tokens"] == 30
+    assert summary["scenario"]["completion_tokens"] == 0
+    assert [record["call_site"] for record in exporter.records] == ["discuss_file", "scenario"]
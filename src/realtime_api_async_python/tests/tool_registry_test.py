@@ -0,0 +1,62 @@
+from enum import Enum
+from typing import Optional
+
+import pytest
+
+from src.modules.tools.registry import ToolConcurrency, ToolRegistry
+
+
+class Color(str, Enum):
+    RED = "red"
+    BLUE = "blue"
+
+
+async def paint(prompt: str, color: Color = Color.RED, coats: Optional[int] = None) -> dict:
+    """
+    Paints something based on the user's prompt.
+
+    Args:
+        prompt (str): The user's prompt describing what
+            to paint.
+        color (Color): The color to use.
+        coats (Optional[int]): How many coats to apply.
+
+    Returns:
+        dict: The result.
+    """
+    return {"painted": prompt}
+
+
+def test_schema_is_derived_from_signature_and_docstring():
+    registry = ToolRegistry()
+    registry.tool(timeout=5, concurrency=ToolConcurrency.shared)(paint)
+
+    spec = registry.get("paint")
+    assert spec.description == "Paints something based on the user's prompt."
+    assert spec.parameters == {
+        "type": "object",
+        "properties": {
+            "prompt": {"type": "string", "description": "The user's prompt describing what to paint."},
+            "color": {"type": "string", "enum": ["red", "blue"], "description": "The color to use."},
+            "coats": {"type": "integer", "description": "How many coats to apply."},
+        },
+        "required": ["prompt"],
+    }
+    assert spec.timeout == 5 and spec.concurrency == ToolConcurrency.shared
+
+
+def test_payloads_are_cached_until_a_tool_is_registered():
+    registry = ToolRegistry()
+    registry.register(paint)
+
+    payload = registry.realtime_tools()
+    assert registry.realtime_tools() is payload
+    assert [tool["name"] for tool in payload] == ["paint"]
+
+    async def rinse():
+        """Rinses the brushes."""
+
+    registry.register(rinse)
+    assert [tool["function"]["name"] for tool in registry.chat_tools()] == ["paint", "rinse"]
+    with pytest.raises(ValueError):
+        registry.register(rinse)
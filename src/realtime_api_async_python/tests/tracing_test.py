@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from src.modules import tracing
+from src.modules.metrics import MetricsRecorder
+from src.modules.tracing import ChromeTraceExporter, SpanJsonlExporter, TurnTracer
+
+
+@pytest.fixture(autouse=True)
+def metrics(monkeypatch):
+    # Turn latencies are recorded without writing the runtime table
+    monkeypatch.setattr(tracing, "metrics", MetricsRecorder())
+
+
+def run_turn_with_tool_call(tracer):
+    tracer.start_turn()
+    tracer.mark("commit_sent")
+    tracer.bind_response("resp_1")
+    tracer.mark("function_call_arguments.done", call_id="call_1")
+    tracer.start_span("tool:get_current_time", call_id="call_1")
+    tracer.end_span("tool:get_current_time")
+    tracer.mark("function_output_sent", call_id="call_1")
+    tracer.end_span("response")
+    tracer.bind_response("resp_2")
+    tracer.mark("first_audio_delta", once_per_response=True)
+    tracer.mark("first_audio_delta", once_per_response=True)
+    tracer.end_span("response")
+    tracer.start_span("playback")
+    tracer.end_span("playback")
+    tracer.end_turn()
+
+
+def test_turn_spans_are_correlated_by_response_id(tmp_path):
+    jsonl_file = tmp_path / "spans.jsonl"
+    tracer = TurnTracer(exporters=[SpanJsonlExporter(str(jsonl_file))])
+
+    run_turn_with_tool_call(tracer)
+    # Turns are written by the background flusher, not by end_turn
+    assert not jsonl_file.exists()
+    tracer.flush()
+
+    records = [json.loads(line) for line in jsonl_file.read_text().splitlines()]
+    by_name = {}
+    for record in records:
+        by_name.setdefault(record["name"], []).append(record)
+    assert len({record["turn_id"] for record in records}) == 1
+    assert by_name["tool:get_current_time"][0]["response_id"] == "resp_1"
+    assert len(by_name["first_audio_delta"]) == 1
+    assert by_name["first_audio_delta"][0]["response_id"] == "resp_2"
+    assert [record["response_id"] for record in by_name["response"]] == ["resp_1", "resp_2"]
+    assert by_name["turn"][0]["args"]["response_ids"] == ["resp_1", "resp_2"]
+    assert tracer.turn is None
+
+
+def test_chrome_trace_is_loadable_after_each_turn(tmp_path):
+    trace_file = tmp_path / "turns.trace.json"
+    tracer = TurnTracer(exporters=[ChromeTraceExporter(str(trace_file))])
+
+    run_turn_with_tool_call(tracer)
+    run_turn_with_tool_call(tracer)
+    tracer.flush()
+
+    # Viewers accept the unterminated array; close it here to parse with json
+    events = json.loads(trace_file.read_text().rstrip().rstrip(",") + "]")
+    turns = [event for event in events if event["name"] == "turn"]
+    assert len(turns) == 2
+    assert all(event["ph"] in ("X", "i") for event in events)
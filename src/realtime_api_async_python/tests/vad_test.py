@@ -0,0 +1,38 @@
+import numpy as np
+
+from src.modules.vad import EnergyVAD
+
+RATE = 24000
+
+
+def tone(ms, amplitude=8000):
+    t = np.arange(int(RATE * ms / 1000)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype(np.int16).tobytes()
+
+
+def silence(ms):
+    return b"\x00\x00" * int(RATE * ms / 1000)
+
+
+def test_silence_is_dropped():
+    vad = EnergyVAD(RATE, prefix_padding_ms=300, silence_duration_ms=700)
+
+    assert vad.process(silence(2000)) == b""
+    assert vad.savings() == 1.0
+
+
+def test_speech_is_sent_with_prefix_padding_and_trailing_silence():
+    vad = EnergyVAD(RATE, prefix_padding_ms=300, silence_duration_ms=700)
+    bytes_per_ms = RATE * 2 // 1000
+
+    sent = b""
+    # Captured in 100 ms chunks like the send loop
+    audio = silence(1000) + tone(500) + silence(3000)
+    for start in range(0, len(audio), 100 * bytes_per_ms):
+        sent += vad.process(audio[start:start + 100 * bytes_per_ms])
+
+    # 300 ms of padding, the speech, then the server's silence window plus the margin
+    assert len(sent) == (300 + 500 + 900) * bytes_per_ms
+    assert sent[:300 * bytes_per_ms] == silence(300)
+    assert not vad.in_speech
+    assert 0.5 < vad.savings() < 0.7